@@ -2,7 +2,7 @@
 
 import os
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -39,8 +39,39 @@ class Config:
     # RAG Configuration
     RAG_SOURCE_DIR: Path = BASE_PATH / "rag_sources"  # Directory for source files
     RAG_EMBEDDINGS_DIR: Path = BASE_PATH / "rag_embeddings"  # Directory for cached embeddings
+    RAG_EMBEDDING_BACKEND: str = "openrouter"  # "openrouter" (OpenRouter API), "openai" (OpenAI API; OPENROUTER_API_KEY must be an OpenAI key) or "local" (hashed character n-grams, offline)
     RAG_EMBEDDING_MODEL: str = "text-embedding-3-small"  # OpenAI embedding model
+    RAG_EMBEDDING_DIMENSIONS: Optional[int] = None  # Shortened embedding size (None = model default)
     RAG_TOP_K: int = 5  # Number of retrieved documents
+    RAG_SEARCH_MODE: str = "dense"  # "dense" (embeddings), "bm25" (lexical, offline) or "hybrid" (rank fusion of both)
+    RAG_HYBRID_DEPTH: int = 50  # Candidates taken from each ranking before fusion
+    RAG_RRF_K: int = 60  # Reciprocal rank fusion constant
+    RAG_ANN_INDEX: str = "none"  # "none" (exact), "ivf", or "int8"/"pq" (quantized scan + exact re-ranking)
+    RAG_ANN_NPROBE: int = 16  # IVF lists scanned per query (higher = better recall, slower)
+    RAG_ANN_MIN_ROWS: int = 10000  # Stores smaller than this always use exact search
+    RAG_CHUNK_SIZE: int = 1000  # Max characters per indexed passage of a source file
+    RAG_CHUNK_OVERLAP: int = 200  # Max characters shared by consecutive passages
+    RAG_EMBEDDING_BATCH_SIZE: int = 256  # Max texts (passages or queries) per embedding request
+    RAG_EMBEDDING_BATCH_MAX_TOKENS: int = 100000  # Max estimated tokens per embedding request
+    RAG_EMBEDDING_WORKERS: int = 4  # Concurrent embedding requests
+    RAG_EMBEDDING_REQUESTS_PER_MINUTE: Optional[float] = 300  # Embedding request rate limit (None = unlimited)
+    RAG_EMBEDDING_MAX_RETRIES: int = 3  # Retries of a failed embedding request (exponential backoff)
+    RAG_COMPACT_GARBAGE_RATIO: float = 0.25  # Compact the embedding cache once this share of rows/records is unused
+    RAG_PRECOMPUTE_BATCH_SIZE: int = 256  # Queries ranked together when precomputing retrieval for a split
+    RAG_CONTEXT_SOURCE: str = "passages"  # "passages" (vector store), "graph" (known relations from train gold relations) or "both"
+    RAG_GRAPH_TOP_K: int = 20  # Known relations added to RAG prompts from the knowledge graph
+    RAG_PUBMED_TOP_K: int = 0  # Related abstracts from the local PubMed index added to RAG prompts (0 = off)
+    RAG_PREFETCH_DEPTH: int = 2  # RAG prompts built ahead of generation by a background thread (0 = build inline)
+    
+    # Local PubMed index (see PubMedRetriever)
+    PUBMED_SOURCES: Tuple[Path, ...] = (BASE_PATH / "data", BASE_PATH / "pubmed_sources")  # Corpus files or directories
+    PUBMED_INDEX_DIR: Path = BASE_PATH / "pubmed_index"  # Directory for the inverted index
+    
+    # Few-shot demonstrations (see DemonstrationIndex)
+    FEW_SHOT_K: int = 3  # Maximum demonstrations per prompt
+    FEW_SHOT_TOKEN_BUDGET: int = 3000  # Maximum estimated tokens of the demonstrations of one prompt
+    FEW_SHOT_METHOD: str = "bm25"  # "bm25" (lexical, offline) or "dense" (embeddings) similarity to training documents
+    DEMONSTRATION_INDEX_DIR: Path = BASE_PATH / "demonstration_index"  # Directory for the demonstration index
     
     # LLM Configuration
     MAX_TOKENS: int = 4000
@@ -48,6 +79,10 @@ class Config:
     
     # Evaluation Configuration
     MATCHING_STRATEGY: str = "exact"  # "exact" or "fuzzy"
+    EVALUATION_MODE: str = "serial"  # "serial" (per-document, verbose logs), "vectorized" or "parallel"
+    EVALUATION_WORKERS: Optional[int] = None  # Worker processes for "parallel" (None = CPU count)
+    GED_MODE: str = "approximate"  # "approximate", "exact" (structural) or "labeled"
+    GED_CACHE_SIZE: int = 10000  # Exact GED values kept in memory (least recently used evicted)
     
     # Logging Configuration
     LOG_LEVEL: str = "DEBUG"  # "DEBUG", "INFO", "WARNING", "ERROR"
@@ -11,7 +11,7 @@ This script runs the complete relation extraction pipeline:
 
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 
 from config import Config
 from utils.logging import setup_logger, get_log_file_path
@@ -22,9 +22,10 @@ from pipeline.llm_prompter import (
     ChainOfThoughtPrompter,
     RAGPrompter,
     ReActPrompter,
+    FewShotPrompter,
 )
 from pipeline.parsing import ResponseParser
-from pipeline.evaluation import Evaluator
+from pipeline.evaluation import CorpusMetrics, Evaluator
 from pipeline.aggregation import ResultAggregator, TechniqueComparator
 
 from pipeline.types import Document, GoldRelations, ParsedRelations, EvaluationResult, AggregateResults
@@ -44,7 +45,7 @@ def main(
         models: Optional dict mapping technique names to model keys
                 e.g., {"IO": "gpt-4o-mini", "CoT": "gpt-4o"}
         techniques: Optional list of techniques to run (defaults to all)
-                   e.g., ["IO", "CoT", "RAG", "ReAct"]
+                   e.g., ["IO", "CoT", "RAG", "ReAct", "FewShot"]
         max_documents: Optional limit on number of documents to process (for testing)
     """
     # ========== Configuration ==========
@@ -85,7 +86,7 @@ def main(
     
     # Default to all techniques if not specified
     if techniques is None:
-        techniques = ["IO", "CoT", "RAG", "ReAct"]
+        techniques = ["IO", "CoT", "RAG", "ReAct", "FewShot"]
     
     # Default models (can be overridden)
     if models is None:
@@ -174,9 +175,26 @@ def main(
         prompters.append(prompter)
         logger.info(f"  Initialized {prompter.name} prompter with model: {prompter.model}")
     
+    if "FewShot" in techniques:
+        model = models.get("FewShot")
+        prompter = FewShotPrompter(
+            entity_map=entity_map,
+            use_exact_spans=True,
+            model=model,
+            logger=logger
+        )
+        prompters.append(prompter)
+        logger.info(f"  Initialized {prompter.name} prompter with model: {prompter.model}")
+        logger.info(f"    Demonstrations: {len(prompter.demonstration_index)} annotated train documents")
+    
     # Initialize parser and evaluator
     parser = ResponseParser(entity_map=entity_map, logger=logger)
-    evaluator = Evaluator(entity_map=entity_map, logger=logger)
+    evaluator = Evaluator(
+        entity_map=entity_map,
+        ged_mode=Config.GED_MODE,
+        ged_cache_size=Config.GED_CACHE_SIZE,
+        logger=logger
+    )
     
     # Initialize aggregator and comparator
     aggregator = ResultAggregator()
@@ -189,8 +207,9 @@ def main(
     logger.info("Step 4: Running pipeline for each technique...")
     logger.info("=" * 80)
     
-    # Store results: technique_name -> list of evaluation results per document
-    all_results: Dict[str, List[EvaluationResult]] = {}
+    # Store results: technique_name -> per-document evaluation results, or their
+    # CorpusMetrics in "vectorized"/"parallel" mode (rows are written from its arrays)
+    all_results: Dict[str, Union[List[EvaluationResult], CorpusMetrics]] = {}
     aggregated_results: Dict[str, AggregateResults] = {}
     
     for prompter in prompters:
@@ -202,6 +221,9 @@ def main(
         # Store predictions for this technique
         predictions: List[ParsedRelations] = []
         
+        # Batched pre-pass (e.g. RAG query embeddings) before per-document prompting
+        prompter.prepare([doc.text for doc in documents], [doc.doc_id for doc in documents])
+        
         # Process each document
         for i, doc in enumerate(documents, 1):
             logger.info(f"\n--- Document {i}/{len(documents)}: {doc.doc_id} ---")
@@ -231,12 +253,22 @@ def main(
         logger.info(f"\n{'=' * 80}")
         logger.info(f"Evaluating {prompter.name} predictions...")
         logger.info(f"{'=' * 80}")
-        eval_results = evaluator.evaluate(predictions, gold_relations)
+        if Config.EVALUATION_MODE == "vectorized":
+            eval_results = evaluator.evaluate_corpus(predictions, gold_relations)
+        elif Config.EVALUATION_MODE == "parallel":
+            eval_results = evaluator.evaluate_parallel(
+                predictions, gold_relations, max_workers=Config.EVALUATION_WORKERS
+            )
+        else:
+            eval_results = evaluator.evaluate(predictions, gold_relations)
         
         all_results[prompter.name] = eval_results
         
         # Aggregate results for this technique
-        aggregated = aggregator.aggregate(eval_results, prompter.name)
+        if isinstance(eval_results, CorpusMetrics):
+            aggregated = aggregator.aggregate_corpus(eval_results, prompter.name)
+        else:
+            aggregated = aggregator.aggregate(eval_results, prompter.name)
         
         # Print detailed summary for this technique
         logger.info(f"\n{'=' * 80}")
@@ -347,11 +379,35 @@ def main(
     import json
     for technique_name, eval_results in all_results.items():
         results_path = run_dir / f"{technique_name}_{split}_results.json"
-        # Convert EvaluationResult objects to dicts for JSON serialization
-        results_dict = {
-            "technique": technique_name,
-            "num_documents": len(eval_results),
-            "results": [
+        if isinstance(eval_results, CorpusMetrics):
+            # Same rows, read straight from the per-document arrays
+            columns = {
+                name: getattr(eval_results, name).tolist()
+                for name in (
+                    "precision", "recall", "f1_score", "exact_match_rate",
+                    "omission_rate", "hallucination_rate", "redundancy_rate",
+                    "graph_edit_distance", "true_positives", "false_negatives",
+                )
+            }
+            rows = [
+                {
+                    "doc_id": doc_id,
+                    "precision": columns["precision"][i],
+                    "recall": columns["recall"][i],
+                    "f1_score": columns["f1_score"][i],
+                    "exact_match_rate": columns["exact_match_rate"][i],
+                    "omission_rate": columns["omission_rate"][i],
+                    "hallucination_rate": columns["hallucination_rate"][i],
+                    "redundancy_rate": columns["redundancy_rate"][i],
+                    "graph_edit_distance": columns["graph_edit_distance"][i],
+                    "num_true_positives": columns["true_positives"][i],
+                    "num_false_negatives": columns["false_negatives"][i],
+                }
+                for i, doc_id in enumerate(eval_results.doc_ids)
+            ]
+        else:
+            # Convert EvaluationResult objects to dicts for JSON serialization
+            rows = [
                 {
                     "doc_id": r.doc_id,
                     "precision": r.precision,
@@ -367,6 +423,10 @@ def main(
                 }
                 for r in eval_results
             ]
+        results_dict = {
+            "technique": technique_name,
+            "num_documents": len(eval_results),
+            "results": rows
         }
         with open(results_path, 'w', encoding='utf-8') as f:
             json.dump(results_dict, f, indent=2)
@@ -2,8 +2,11 @@
 
 from .aggregator import ResultAggregator
 from .comparator import TechniqueComparator
+from .streaming import StreamingAggregator, iter_spilled_results
 
 __all__ = [
     "ResultAggregator",
     "TechniqueComparator",
+    "StreamingAggregator",
+    "iter_spilled_results",
 ]
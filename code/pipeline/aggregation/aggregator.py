@@ -1,8 +1,9 @@
 """Result aggregator for aggregating results across documents."""
 
-from typing import List
+from typing import List, Optional
 
 from ..types import EvaluationResult, AggregateResults
+from ..evaluation.vectorized import CorpusMetrics
 
 
 class ResultAggregator:
@@ -79,6 +80,7 @@ class ResultAggregator:
         
         return AggregateResults(
             technique_name=technique_name,
+            num_documents=n,
             macro_precision=macro_precision,
             macro_recall=macro_recall,
             macro_f1=macro_f1,
@@ -101,3 +103,83 @@ class ResultAggregator:
             fuzzy_macro_f1=fuzzy_macro_f1,
             per_document_results=eval_results
         )
+    
+    def aggregate_corpus(
+        self,
+        corpus_metrics: CorpusMetrics,
+        technique_name: str,
+        per_document_results: Optional[List[EvaluationResult]] = None
+    ) -> AggregateResults:
+        """
+        Aggregate vectorized corpus metrics without per-document objects.
+        
+        Gives the same numbers as aggregate() on the results of
+        Evaluator.evaluate() for the same predictions.
+        
+        Args:
+            corpus_metrics: Per-document counts from MetricsCalculator.calculate_corpus_metrics
+            technique_name: Name of the prompting technique
+            per_document_results: Optional materialized per-document results to attach
+            
+        Returns:
+            AggregateResults object with aggregated metrics
+        """
+        n = len(corpus_metrics)
+        if n == 0:
+            return AggregateResults(
+                technique_name=technique_name,
+                per_document_results=per_document_results or []
+            )
+        
+        def mean(values) -> float:
+            # Built-in sum (as in aggregate()), so results match bit for bit
+            return sum(values.tolist()) / n
+        
+        total_tp = int(corpus_metrics.true_positives.sum())
+        # Evaluator does not keep false positives on EvaluationResult (they are
+        # ParsedRelations), so aggregate() always sees zero of them
+        total_fp = 0
+        total_fn = int(corpus_metrics.false_negatives.sum())
+        total_partial_matches = int(corpus_metrics.partial_matches.sum())
+        
+        micro_precision = total_tp / (total_tp + total_fp) if (total_tp + total_fp) > 0 else 0.0
+        micro_recall = total_tp / (total_tp + total_fn) if (total_tp + total_fn) > 0 else 0.0
+        micro_f1 = (
+            2 * (micro_precision * micro_recall) / (micro_precision + micro_recall)
+            if (micro_precision + micro_recall) > 0 else 0.0
+        )
+        
+        fuzzy_tp = total_tp + total_partial_matches
+        fuzzy_fp = total_fp - total_partial_matches
+        fuzzy_micro_precision = fuzzy_tp / (fuzzy_tp + fuzzy_fp) if (fuzzy_tp + fuzzy_fp) > 0 else 0.0
+        fuzzy_micro_recall = fuzzy_tp / (fuzzy_tp + total_fn) if (fuzzy_tp + total_fn) > 0 else 0.0
+        fuzzy_micro_f1 = (
+            2 * (fuzzy_micro_precision * fuzzy_micro_recall) / (fuzzy_micro_precision + fuzzy_micro_recall)
+            if (fuzzy_micro_precision + fuzzy_micro_recall) > 0 else 0.0
+        )
+        
+        return AggregateResults(
+            technique_name=technique_name,
+            num_documents=n,
+            macro_precision=mean(corpus_metrics.precision),
+            macro_recall=mean(corpus_metrics.recall),
+            macro_f1=mean(corpus_metrics.f1_score),
+            micro_precision=micro_precision,
+            micro_recall=micro_recall,
+            micro_f1=micro_f1,
+            avg_exact_match_rate=mean(corpus_metrics.exact_match_rate),
+            avg_omission_rate=mean(corpus_metrics.omission_rate),
+            avg_hallucination_rate=mean(corpus_metrics.hallucination_rate),
+            avg_redundancy_rate=mean(corpus_metrics.redundancy_rate),
+            avg_graph_edit_distance=mean(corpus_metrics.graph_edit_distance),
+            avg_bertscore=0.0,
+            total_partial_matches=total_partial_matches,
+            avg_partial_matches=total_partial_matches / n,
+            fuzzy_micro_precision=fuzzy_micro_precision,
+            fuzzy_micro_recall=fuzzy_micro_recall,
+            fuzzy_micro_f1=fuzzy_micro_f1,
+            fuzzy_macro_precision=mean(corpus_metrics.fuzzy_precision),
+            fuzzy_macro_recall=mean(corpus_metrics.fuzzy_recall),
+            fuzzy_macro_f1=mean(corpus_metrics.fuzzy_f1),
+            per_document_results=per_document_results or []
+        )
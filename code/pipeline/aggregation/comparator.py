@@ -48,7 +48,7 @@ class TechniqueComparator:
                 "avg_redundancy_rate": results.avg_redundancy_rate,
                 "avg_graph_edit_distance": results.avg_graph_edit_distance,
                 "avg_bertscore": results.avg_bertscore,
-                "num_documents": len(results.per_document_results)
+                "num_documents": results.num_documents
             }
         
         # Create rankings by different metrics
@@ -156,7 +156,7 @@ class TechniqueComparator:
                 "avg_redundancy_rate": float(results.avg_redundancy_rate),
                 "avg_graph_edit_distance": float(results.avg_graph_edit_distance),
                 "avg_bertscore": float(results.avg_bertscore),
-                "num_documents": len(results.per_document_results)
+                "num_documents": results.num_documents
             }
             for name, results in aggregated_results.items()
         }
@@ -0,0 +1,229 @@
+"""Streaming result aggregator with constant memory."""
+
+import json
+import math
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from ..types import EvaluationResult, AggregateResults, Relation, ParsedRelation
+
+
+# Per-document metrics that are averaged (macro) across documents
+_AVERAGED_FIELDS = (
+    "precision",
+    "recall",
+    "f1_score",
+    "fuzzy_precision",
+    "fuzzy_recall",
+    "fuzzy_f1",
+    "exact_match_rate",
+    "omission_rate",
+    "hallucination_rate",
+    "redundancy_rate",
+    "graph_edit_distance",
+    "bertscore",
+)
+
+
+class _RunningSum:
+    """
+    Running float sum with Neumaier compensation.
+
+    This is the algorithm built-in sum() uses for floats (Python 3.12+), so
+    running averages match ResultAggregator's sum(...) / n exactly.
+    """
+
+    def __init__(self):
+        self.total = 0.0
+        self.compensation = 0.0
+
+    def add(self, value: float) -> None:
+        value = float(value)
+        new_total = self.total + value
+        if abs(self.total) >= abs(value):
+            self.compensation += (self.total - new_total) + value
+        else:
+            self.compensation += (value - new_total) + self.total
+        self.total = new_total
+
+    @property
+    def value(self) -> float:
+        if self.compensation and math.isfinite(self.compensation):
+            return self.total + self.compensation
+        return self.total
+
+
+class StreamingAggregator:
+    """
+    Aggregates evaluation results one document at a time.
+
+    Only running sums and counts are kept in memory. Per-document detail
+    (metrics and matched relations) is optionally spilled to a JSON Lines
+    file and can be read back with iter_spilled_results().
+    """
+
+    def __init__(self, technique_name: str, spill_path: Optional[Path] = None):
+        """
+        Initialize streaming aggregator.
+
+        Args:
+            technique_name: Name of the prompting technique
+            spill_path: Optional JSONL file for per-document detail (overwritten)
+        """
+        self.technique_name = technique_name
+        self.spill_path = Path(spill_path) if spill_path else None
+        self._spill_file = None
+        if self.spill_path:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            self._spill_file = open(self.spill_path, 'w', encoding='utf-8')
+
+        self.num_documents = 0
+        self._sums = {name: _RunningSum() for name in _AVERAGED_FIELDS}
+        self.total_tp = 0
+        self.total_fp = 0
+        self.total_fn = 0
+        self.total_partial_matches = 0
+
+    def add(self, result: EvaluationResult) -> None:
+        """
+        Add one per-document result.
+
+        Args:
+            result: Evaluation result for a single document
+        """
+        self.num_documents += 1
+        for name in _AVERAGED_FIELDS:
+            self._sums[name].add(getattr(result, name))
+
+        self.total_tp += len(result.true_positives)
+        self.total_fp += len(result.false_positives)
+        self.total_fn += len(result.false_negatives)
+        self.total_partial_matches += len(result.partial_matches)
+
+        if self._spill_file:
+            self._spill_file.write(json.dumps(_result_to_record(result)) + "\n")
+
+    def add_all(self, results: Iterable[EvaluationResult]) -> None:
+        """
+        Add results from any iterable (e.g. Evaluator.iter_evaluate).
+
+        Args:
+            results: Per-document evaluation results
+        """
+        for result in results:
+            self.add(result)
+
+    def result(self) -> AggregateResults:
+        """
+        Build aggregated metrics from the documents added so far.
+
+        Uses the same formulas (and summation order) as ResultAggregator,
+        but per_document_results is left empty; the detail lives in the
+        spill file.
+
+        Returns:
+            AggregateResults object with aggregated metrics
+        """
+        n = self.num_documents
+        if n == 0:
+            return AggregateResults(technique_name=self.technique_name)
+
+        avg = {name: running.value / n for name, running in self._sums.items()}
+
+        total_tp = self.total_tp
+        total_fp = self.total_fp
+        total_fn = self.total_fn
+
+        micro_precision = total_tp / (total_tp + total_fp) if (total_tp + total_fp) > 0 else 0.0
+        micro_recall = total_tp / (total_tp + total_fn) if (total_tp + total_fn) > 0 else 0.0
+        micro_f1 = (
+            2 * (micro_precision * micro_recall) / (micro_precision + micro_recall)
+            if (micro_precision + micro_recall) > 0 else 0.0
+        )
+
+        fuzzy_tp = total_tp + self.total_partial_matches
+        fuzzy_fp = total_fp - self.total_partial_matches
+        fuzzy_micro_precision = fuzzy_tp / (fuzzy_tp + fuzzy_fp) if (fuzzy_tp + fuzzy_fp) > 0 else 0.0
+        fuzzy_micro_recall = fuzzy_tp / (fuzzy_tp + total_fn) if (fuzzy_tp + total_fn) > 0 else 0.0
+        fuzzy_micro_f1 = (
+            2 * (fuzzy_micro_precision * fuzzy_micro_recall) / (fuzzy_micro_precision + fuzzy_micro_recall)
+            if (fuzzy_micro_precision + fuzzy_micro_recall) > 0 else 0.0
+        )
+
+        return AggregateResults(
+            technique_name=self.technique_name,
+            num_documents=n,
+            macro_precision=avg["precision"],
+            macro_recall=avg["recall"],
+            macro_f1=avg["f1_score"],
+            micro_precision=micro_precision,
+            micro_recall=micro_recall,
+            micro_f1=micro_f1,
+            avg_exact_match_rate=avg["exact_match_rate"],
+            avg_omission_rate=avg["omission_rate"],
+            avg_hallucination_rate=avg["hallucination_rate"],
+            avg_redundancy_rate=avg["redundancy_rate"],
+            avg_graph_edit_distance=avg["graph_edit_distance"],
+            avg_bertscore=avg["bertscore"],
+            total_partial_matches=self.total_partial_matches,
+            avg_partial_matches=self.total_partial_matches / n,
+            fuzzy_micro_precision=fuzzy_micro_precision,
+            fuzzy_micro_recall=fuzzy_micro_recall,
+            fuzzy_micro_f1=fuzzy_micro_f1,
+            fuzzy_macro_precision=avg["fuzzy_precision"],
+            fuzzy_macro_recall=avg["fuzzy_recall"],
+            fuzzy_macro_f1=avg["fuzzy_f1"],
+        )
+
+    def close(self) -> None:
+        """Flush and close the spill file."""
+        if self._spill_file:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def __enter__(self) -> "StreamingAggregator":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def iter_spilled_results(spill_path: Path) -> Iterator[EvaluationResult]:
+    """
+    Read per-document results back from a spill file, one at a time.
+
+    Args:
+        spill_path: JSONL file written by StreamingAggregator
+
+    Yields:
+        EvaluationResult per document, in the order they were added
+    """
+    with open(spill_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield _record_to_result(json.loads(line))
+
+
+def _result_to_record(result: EvaluationResult) -> dict:
+    """Convert an EvaluationResult into a JSON-serializable record."""
+    record = asdict(result)
+    # FPs are ParsedRelations elsewhere; partial matches are (pred, gold) pairs
+    record["partial_matches"] = [
+        [asdict(pred), asdict(gold)] for pred, gold in result.partial_matches
+    ]
+    return record
+
+
+def _record_to_result(record: dict) -> EvaluationResult:
+    """Rebuild an EvaluationResult from a spilled record."""
+    record["true_positives"] = [Relation(**r) for r in record["true_positives"]]
+    record["false_negatives"] = [Relation(**r) for r in record["false_negatives"]]
+    record["false_positives"] = [
+        ParsedRelation(**r) if "relation_type" in r else Relation(**r)
+        for r in record["false_positives"]
+    ]
+    record["partial_matches"] = [
+        (ParsedRelation(**pred), Relation(**gold)) for pred, gold in record["partial_matches"]
+    ]
+    return EvaluationResult(**record)
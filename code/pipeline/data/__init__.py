@@ -2,10 +2,35 @@
 
 from .loader import DocumentLoader, GoldRelationsLoader, DatasetLoader
 from .entity_map import GlobalEntityMap
+from .gold_index import GoldIndex, get_gold_index
+from .corpus import (
+    iter_bioc_documents,
+    iter_bioc_json_documents,
+    iter_bioc_xml_documents,
+    iter_pubtator_documents,
+    read_abstracts,
+    read_bioc_json,
+    read_pubtator,
+    read_records,
+)
+from .regeneration import OutputManifest, OutputSpec, regenerate
 
 __all__ = [
     "DocumentLoader",
     "GoldRelationsLoader",
     "DatasetLoader",
     "GlobalEntityMap",
+    "GoldIndex",
+    "get_gold_index",
+    "iter_bioc_documents",
+    "iter_bioc_json_documents",
+    "iter_bioc_xml_documents",
+    "iter_pubtator_documents",
+    "read_abstracts",
+    "read_bioc_json",
+    "read_pubtator",
+    "read_records",
+    "OutputManifest",
+    "OutputSpec",
+    "regenerate",
 ]
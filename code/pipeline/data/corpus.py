@@ -0,0 +1,420 @@
+"""Readers for annotated abstract collections (PubTator, BioC JSON/XML and record dumps)."""
+
+import json
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+
+PUBTATOR_SUFFIXES = (".pubtator",)
+BIOC_JSON_SUFFIXES = (".json",)
+BIOC_XML_SUFFIXES = (".xml",)
+RECORD_SUFFIXES = (".jsonl",)
+CORPUS_SUFFIXES = PUBTATOR_SUFFIXES + BIOC_JSON_SUFFIXES + RECORD_SUFFIXES
+# Files iter_bioc_documents reads as BioC documents
+BIOC_SOURCE_SUFFIXES = BIOC_JSON_SUFFIXES + BIOC_XML_SUFFIXES + PUBTATOR_SUFFIXES
+
+# "pmid|t|title" and "pmid|a|abstract" lines
+_TEXT_LINE = re.compile(r"^([^|\t]+)\|([ta])\|(.*)$")
+
+# Characters read at a time when streaming JSON
+_JSON_CHUNK_SIZE = 1 << 16
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_pubtator_documents(path: Path, encoding: str = "utf-8") -> Iterator[Dict[str, Any]]:
+    """
+    Stream the abstracts of a PubTator file as BioC documents, one at a time.
+
+    Each abstract is a "pmid|t|title" line, a "pmid|a|abstract" line,
+    tab-separated annotation lines (pmid, start, end, text, type,
+    identifier) and relation lines (pmid, type, entity1, entity2, novel),
+    ended by a blank line. The title becomes the passage at offset 0 and
+    the abstract the passage after it (offset len(title) + 1), with each
+    annotation in the passage containing its start; annotations and
+    relations are numbered per document as in the BioC exports.
+
+    Args:
+        path: PubTator file
+        encoding: Text encoding
+
+    Yields:
+        BioC documents (see iter_bioc_documents), in file order
+    """
+    pmid = None
+    texts: Dict[str, str] = {}
+    annotations: List[List[str]] = []
+    relations: List[List[str]] = []
+    with open(path, 'r', encoding=encoding) as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip():
+                if pmid is not None:
+                    yield _pubtator_document(pmid, texts, annotations, relations)
+                pmid = None
+                continue
+            match = _TEXT_LINE.match(line)
+            if match:
+                line_pmid, field, text = match.groups()
+                if line_pmid != pmid:
+                    if pmid is not None:
+                        yield _pubtator_document(pmid, texts, annotations, relations)
+                    pmid, texts, annotations, relations = line_pmid, {}, [], []
+                texts[field] = text
+                continue
+            if pmid is None:
+                continue
+            fields = line.split("\t")
+            if len(fields) == 6:
+                annotations.append(fields)
+            elif len(fields) == 5:
+                relations.append(fields)
+    if pmid is not None:
+        yield _pubtator_document(pmid, texts, annotations, relations)
+
+
+def read_pubtator(path: Path, encoding: str = "utf-8") -> Iterator[Dict[str, Any]]:
+    """
+    Read abstracts from a PubTator file (see iter_pubtator_documents).
+
+    Args:
+        path: PubTator file
+        encoding: Text encoding
+
+    Yields:
+        Abstract records (see read_abstracts)
+    """
+    for doc in iter_pubtator_documents(path, encoding):
+        yield _bioc_record(doc)
+
+
+def iter_bioc_json_documents(path: Path, encoding: str = "utf-8") -> Iterator[Dict[str, Any]]:
+    """
+    Stream the documents of a BioC JSON file, one at a time.
+
+    The file is read in chunks and each document decoded as soon as it is
+    complete, so memory holds one document and one chunk however large the
+    collection is. Collection fields before "documents" (source, date, key)
+    are skipped; reading stops at the end of the documents list.
+
+    Args:
+        path: BioC JSON file, with a top-level "documents" list or a list of documents
+        encoding: Text encoding
+
+    Yields:
+        BioC documents as decoded JSON objects, in file order
+
+    Raises:
+        ValueError: If the file is not valid JSON of either shape
+    """
+    with open(path, 'r', encoding=encoding) as f:
+        stream = _JsonStream(f)
+        if stream.expect("[{") == "{":
+            # Collection object: skip to its "documents" list
+            if stream.peek() == "}":
+                return
+            while True:
+                key = stream.value()
+                stream.expect(":")
+                if key == "documents":
+                    stream.expect("[")
+                    break
+                stream.value()
+                if stream.expect(",}") == "}":
+                    return
+        if stream.peek() == "]":
+            return
+        while True:
+            yield stream.value()
+            if stream.expect(",]") == "]":
+                return
+
+
+def iter_bioc_xml_documents(path: Path, encoding: str = "utf-8") -> Iterator[Dict[str, Any]]:
+    """
+    Stream the documents of a BioC XML file, one at a time.
+
+    The file is parsed incrementally and each <document> element discarded
+    once converted, so memory holds one document however large the
+    collection is. Documents have the structure of the BioC JSON export,
+    with "infons" on documents and passages that have any.
+
+    Args:
+        path: BioC XML file
+        encoding: Text encoding (overrides the XML declaration)
+
+    Yields:
+        BioC documents (see iter_bioc_documents), in file order
+    """
+    parser = ET.XMLParser(encoding=encoding)
+    root = None
+    for event, element in ET.iterparse(path, events=("start", "end"), parser=parser):
+        if event == "start":
+            if root is None:
+                root = element
+            continue
+        if element.tag == "document":
+            yield _bioc_xml_document(element)
+            # Drop converted documents from the collection element
+            root.clear()
+
+
+def iter_bioc_documents(path: Path, encoding: str = "utf-8") -> Iterator[Dict[str, Any]]:
+    """
+    Stream the documents of a BioC JSON, BioC XML or PubTator file (by suffix).
+
+    Documents have the structure of the BioC JSON export: {"id",
+    "passages": [{"offset", "text", "annotations": [{"id", "infons":
+    {"identifier", "type"}, "text", "locations": [{"offset", "length"}]}]}],
+    "relations": [{"id", "infons": {"entity1", "entity2", "type", "novel"}}]}.
+
+    Args:
+        path: Collection file
+        encoding: Text encoding
+
+    Yields:
+        BioC documents, in file order
+    """
+    suffix = path.suffix.lower()
+    if suffix in BIOC_JSON_SUFFIXES:
+        return iter_bioc_json_documents(path, encoding)
+    if suffix in BIOC_XML_SUFFIXES:
+        return iter_bioc_xml_documents(path, encoding)
+    if suffix in PUBTATOR_SUFFIXES:
+        return iter_pubtator_documents(path, encoding)
+    raise ValueError(f"Unsupported BioC file: {path}. Expected one of {BIOC_SOURCE_SUFFIXES}")
+
+
+def read_bioc_json(path: Path, encoding: str = "utf-8") -> Iterator[Dict[str, Any]]:
+    """
+    Read abstracts from a BioC JSON file.
+
+    The first passage (by offset) is the title and the others form the
+    abstract, as in scripts/generate_gold_graph_output.py. Documents are
+    streamed (see iter_bioc_json_documents).
+
+    Args:
+        path: BioC JSON file, with a top-level "documents" list or a list of documents
+        encoding: Text encoding
+
+    Yields:
+        Abstract records (see read_abstracts)
+    """
+    for doc in iter_bioc_json_documents(path, encoding):
+        yield _bioc_record(doc)
+
+
+def read_records(path: Path, encoding: str = "utf-8") -> Iterator[Dict[str, Any]]:
+    """
+    Read abstracts from a JSON Lines dump with one record per line.
+
+    Missing fields get their empty defaults, so a dump may hold just
+    {"pmid", "title", "abstract"}.
+
+    Args:
+        path: JSON Lines file
+        encoding: Text encoding
+
+    Yields:
+        Abstract records (see read_abstracts)
+    """
+    with open(path, 'r', encoding=encoding) as f:
+        for line in f:
+            if line.strip():
+                data = json.loads(line)
+                record = _new_record(str(data.get("pmid", "")))
+                record.update({key: value for key, value in data.items() if key in record})
+                yield record
+
+
+def read_abstracts(path: Path, encoding: str = "utf-8") -> Iterator[Dict[str, Any]]:
+    """
+    Read abstracts from a PubTator, BioC JSON or JSON Lines record file (by suffix).
+
+    Records are {"pmid", "title", "abstract", "entities": [{"id", "type",
+    "text"}, ...], "relations": [{"head_id", "tail_id", "type", "novel"},
+    ...]}, with one entity entry per annotated mention.
+
+    Args:
+        path: Corpus file
+        encoding: Text encoding
+
+    Yields:
+        Abstract records, in file order
+    """
+    suffix = path.suffix.lower()
+    if suffix in BIOC_JSON_SUFFIXES:
+        return read_bioc_json(path, encoding)
+    if suffix in PUBTATOR_SUFFIXES:
+        return read_pubtator(path, encoding)
+    if suffix in RECORD_SUFFIXES:
+        return read_records(path, encoding)
+    raise ValueError(f"Unsupported corpus file: {path}. Expected one of {CORPUS_SUFFIXES}")
+
+
+def _bioc_record(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Abstract record of a BioC document."""
+    record = _new_record(str(doc.get("id", "")))
+    passages = sorted(doc.get("passages", []) or [], key=lambda p: p.get("offset", 0))
+    texts = [(p.get("text") or "").strip() for p in passages]
+    if texts:
+        record["title"] = texts[0]
+        record["abstract"] = " ".join(text for text in texts[1:] if text)
+    for passage in passages:
+        for ann in passage.get("annotations", []) or []:
+            infons = ann.get("infons", {}) or {}
+            identifier = str(infons.get("identifier", "")).strip()
+            if identifier:
+                record["entities"].append({
+                    "id": identifier,
+                    "type": str(infons.get("type", "")).strip(),
+                    "text": (ann.get("text") or "").strip(),
+                })
+    for rel in doc.get("relations", []) or []:
+        infons = rel.get("infons", {}) or {}
+        record["relations"].append({
+            "head_id": str(infons.get("entity1", "")).strip(),
+            "tail_id": str(infons.get("entity2", "")).strip(),
+            "type": str(infons.get("type", "")).strip(),
+            "novel": str(infons.get("novel", "")).strip(),
+        })
+    return record
+
+
+def _pubtator_document(
+    pmid: str,
+    texts: Dict[str, str],
+    annotations: List[List[str]],
+    relations: List[List[str]]
+) -> Dict[str, Any]:
+    """BioC document of a PubTator abstract."""
+    passages = [{"offset": 0, "text": texts.get("t", ""), "annotations": []}]
+    if "a" in texts:
+        passages.append({"offset": len(passages[0]["text"]) + 1, "text": texts["a"], "annotations": []})
+    for number, (_, start, end, text, entity_type, identifier) in enumerate(annotations):
+        start, end = int(start), int(end)
+        passage = passages[-1] if start >= passages[-1]["offset"] else passages[0]
+        passage["annotations"].append({
+            "id": str(number),
+            "infons": {"identifier": identifier, "type": entity_type},
+            "text": text,
+            "locations": [{"offset": start, "length": end - start}],
+        })
+    return {
+        "id": pmid,
+        "passages": passages,
+        "relations": [
+            {
+                "id": f"R{number}",
+                "infons": {"entity1": entity1, "entity2": entity2, "type": relation_type, "novel": novel},
+            }
+            for number, (_, relation_type, entity1, entity2, novel) in enumerate(relations)
+        ],
+    }
+
+
+def _bioc_xml_document(element: ET.Element) -> Dict[str, Any]:
+    """BioC document of a <document> element."""
+    doc: Dict[str, Any] = {"id": element.findtext("id", "")}
+    if element.find("infon") is not None:
+        doc["infons"] = _xml_infons(element)
+    doc["passages"] = []
+    for passage_element in element.findall("passage"):
+        passage: Dict[str, Any] = {}
+        if passage_element.find("infon") is not None:
+            passage["infons"] = _xml_infons(passage_element)
+        passage["offset"] = int(passage_element.findtext("offset", "0"))
+        passage["text"] = passage_element.findtext("text", "")
+        passage["annotations"] = [
+            {
+                "id": annotation.get("id", ""),
+                "infons": _xml_infons(annotation),
+                "text": annotation.findtext("text", ""),
+                "locations": [
+                    {"offset": int(location.get("offset", 0)), "length": int(location.get("length", 0))}
+                    for location in annotation.findall("location")
+                ],
+            }
+            for annotation in passage_element.findall("annotation")
+        ]
+        doc["passages"].append(passage)
+    doc["relations"] = [
+        {"id": relation.get("id", ""), "infons": _xml_infons(relation)}
+        for relation in element.findall("relation")
+    ]
+    return doc
+
+
+def _xml_infons(element: ET.Element) -> Dict[str, str]:
+    """The <infon key="..."> children of a BioC element."""
+    return {infon.get("key", ""): infon.text or "" for infon in element.findall("infon")}
+
+
+def _new_record(pmid: str) -> Dict[str, Any]:
+    """Empty abstract record."""
+    return {"pmid": pmid, "title": "", "abstract": "", "entities": [], "relations": []}
+
+
+class _JsonStream:
+    """Reads consecutive JSON values and separators from a text file, a chunk at a time."""
+
+    def __init__(self, f, chunk_size: int = _JSON_CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: int) -> bool:
+        """Append up to size characters, dropping consumed text; False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it ("" at end of file)."""
+        while True:
+            self.pos = _JSON_WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill(self.chunk_size):
+                return ""
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of chars."""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(
+                f"Invalid BioC JSON in {getattr(self.f, 'name', 'input')}: "
+                f"expected one of {chars!r}, found {char or 'end of file'!r}"
+            )
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next value, reading until it is complete."""
+        self.peek()
+        while True:
+            error = None
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A value ending at the end of the buffer may be a cut-off number
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                error = e
+            # Read at least as much again as is buffered, so a large value
+            # is decoded a logarithmic number of times
+            if not self._fill(max(self.chunk_size, len(self.buffer) - self.pos)) and error is not None:
+                raise ValueError(
+                    f"Invalid BioC JSON in {getattr(self.f, 'name', 'input')}: {error}"
+                ) from error
@@ -0,0 +1,99 @@
+"""Per-document gold relation index, built once at load time."""
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Tuple
+
+from ..types import GoldRelations
+
+
+@dataclass(frozen=True)
+class GoldIndex:
+    """
+    Lookup structures derived from a document's gold relations.
+
+    Built once when gold relations are loaded and shared by every technique's
+    evaluation, so matching and metrics never re-derive them. Treat all
+    fields as read-only.
+    """
+    doc_id: str
+    # Directed (head_id, tail_id, type) keys
+    typed_keys: FrozenSet[Tuple[str, str, str]]
+    # Directed (head_id, tail_id) keys, i.e. the edges of the gold graph
+    pair_keys: FrozenSet[Tuple[str, str]]
+    # Nodes of the gold graph
+    nodes: FrozenSet[str]
+    # Number of gold relations per relation type
+    type_counts: Dict[str, int]
+    # Unordered (entity, entity, type) -> rows of the first occurrence of each
+    # distinct directed typed key, in gold order
+    typed_groups: Dict[Tuple[str, str, str], Tuple[int, ...]]
+    # Unordered (entity, entity) -> rows of the first occurrence of each
+    # distinct directed key, in gold order
+    untyped_groups: Dict[Tuple[str, str], Tuple[int, ...]]
+    # Unordered (entity, entity) -> all rows with that entity pair, in gold order
+    pair_rows: Dict[Tuple[str, str], Tuple[int, ...]]
+
+    @classmethod
+    def build(cls, gold_relations: GoldRelations) -> "GoldIndex":
+        """
+        Build the index for one document.
+
+        Args:
+            gold_relations: Gold relations of the document
+
+        Returns:
+            GoldIndex instance
+        """
+        relations = gold_relations.relations
+
+        typed_groups: Dict[Tuple[str, str, str], List[int]] = {}
+        untyped_groups: Dict[Tuple[str, str], List[int]] = {}
+        pair_rows: Dict[Tuple[str, str], List[int]] = {}
+        seen_typed = set()
+        seen_untyped = set()
+
+        for row, rel in enumerate(relations):
+            pair = unordered_pair(rel.head_id, rel.tail_id)
+            pair_rows.setdefault(pair, []).append(row)
+
+            typed_key = (rel.head_id, rel.tail_id, rel.type)
+            if typed_key not in seen_typed:
+                seen_typed.add(typed_key)
+                typed_groups.setdefault(pair + (rel.type,), []).append(row)
+
+            untyped_key = (rel.head_id, rel.tail_id)
+            if untyped_key not in seen_untyped:
+                seen_untyped.add(untyped_key)
+                untyped_groups.setdefault(pair, []).append(row)
+
+        return cls(
+            doc_id=gold_relations.doc_id,
+            typed_keys=frozenset(seen_typed),
+            pair_keys=frozenset(seen_untyped),
+            nodes=frozenset(node for key in seen_untyped for node in key),
+            type_counts=dict(Counter(rel.type for rel in relations)),
+            typed_groups={key: tuple(rows) for key, rows in typed_groups.items()},
+            untyped_groups={key: tuple(rows) for key, rows in untyped_groups.items()},
+            pair_rows={key: tuple(rows) for key, rows in pair_rows.items()},
+        )
+
+
+def unordered_pair(entity_a: str, entity_b: str) -> Tuple[str, str]:
+    """Direction-independent key for an entity pair."""
+    return (entity_a, entity_b) if entity_a <= entity_b else (entity_b, entity_a)
+
+
+def get_gold_index(gold_relations: GoldRelations) -> GoldIndex:
+    """
+    Return the precomputed index of a document, building it if missing.
+
+    Args:
+        gold_relations: Gold relations of the document
+
+    Returns:
+        GoldIndex instance (cached on gold_relations.index)
+    """
+    if gold_relations.index is None:
+        gold_relations.index = GoldIndex.build(gold_relations)
+    return gold_relations.index
@@ -6,6 +6,7 @@ from pathlib import Path
 from typing import List, Tuple, Optional
 
 from ..types import Document, GoldRelations, Entity, Relation, Mention
+from .gold_index import GoldIndex
 
 
 class DocumentLoader:
@@ -155,6 +156,8 @@ class GoldRelationsLoader:
                 body=body,
                 file_path=str(json_file)
             )
+            # Built once here and reused by every technique's evaluation
+            gold_relations.index = GoldIndex.build(gold_relations)
             gold_relations_list.append(gold_relations)
             
             self.logger.debug(
@@ -222,6 +225,7 @@ class DatasetLoader:
                     title=doc.title,
                     body=doc.body
                 )
+                empty_gold.index = GoldIndex.build(empty_gold)
                 matched_gold_relations.append(empty_gold)
         
         return matched_documents, matched_gold_relations
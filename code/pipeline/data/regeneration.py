@@ -0,0 +1,222 @@
+"""Incremental, parallel regeneration of per-document output files."""
+
+import hashlib
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# Manifest of every output directory. Neither *.txt nor *.json, so the
+# document loaders never read it as a document.
+MANIFEST_NAME = ".manifest.jsonl"
+
+# Documents handed to a worker process at a time
+_BATCH_SIZE = 64
+
+
+@dataclass
+class OutputSpec:
+    """
+    One kind of per-document output file.
+
+    file_name, render and source are called with BioC documents (see
+    corpus.iter_bioc_documents); they are module-level functions so the
+    spec can be sent to worker processes.
+    """
+    output_dir: Path
+    # Name and format version of the renderer, part of every source hash:
+    # bump the version when render() changes its output
+    generator: str
+    file_name: Callable[[Dict[str, Any]], Optional[str]]  # None skips the document
+    render: Callable[[Dict[str, Any]], str]
+    encoding: str = "utf-8"
+    # Parts of the document the file is rendered from, hashed to detect
+    # changes (None hashes the whole document)
+    source: Optional[Callable[[Dict[str, Any]], Any]] = None
+
+
+class OutputManifest:
+    """
+    Source hash of every file written to an output directory.
+
+    Kept as <output_dir>/.manifest.jsonl with one {"file", "source_hash"}
+    line per written file, later lines overriding earlier ones. Lines are
+    appended as files are written, so an interrupted run keeps what it
+    recorded; compact() rewrites the file with one line per output.
+    """
+
+    def __init__(self, output_dir: Path):
+        """
+        Load the manifest of an output directory, if present.
+
+        Args:
+            output_dir: Output directory
+        """
+        self.output_dir = output_dir
+        self.path = output_dir / MANIFEST_NAME
+        self.hashes: Dict[str, str] = {}
+        self._lines = 0
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Cut off by an interrupted run
+                    self.hashes[record["file"]] = record["source_hash"]
+                    self._lines += 1
+
+    def is_current(self, file_name: str, source_hash: str) -> bool:
+        """Whether a file exists and was written from a source with this hash."""
+        return (
+            self.hashes.get(file_name) == source_hash
+            and (self.output_dir / file_name).exists()
+        )
+
+    def record(self, entries: List[Tuple[str, str]]) -> None:
+        """
+        Record written files.
+
+        Args:
+            entries: (file name, source hash) pairs
+        """
+        if not entries:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for file_name, source_hash in entries:
+                f.write(json.dumps({"file": file_name, "source_hash": source_hash}) + "\n")
+        self.hashes.update(entries)
+        self._lines += len(entries)
+
+    def compact(self) -> None:
+        """Rewrite the manifest with one line per file, if it has superseded lines."""
+        if self._lines <= len(self.hashes):
+            return
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for file_name, source_hash in sorted(self.hashes.items()):
+                f.write(json.dumps({"file": file_name, "source_hash": source_hash}) + "\n")
+        os.replace(tmp_path, self.path)
+        self._lines = len(self.hashes)
+
+
+def source_hash(source: Any, generator: str) -> str:
+    """
+    Hash of the source of an output file and its renderer.
+
+    Args:
+        source: JSON-serializable source (a BioC document or parts of it)
+        generator: Name, format version and settings of the renderer
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = json.dumps(source, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{generator}\n{payload}".encode("utf-8")).hexdigest()
+
+
+def regenerate(
+    documents: Iterable[Dict[str, Any]],
+    outputs: Sequence[OutputSpec],
+    workers: int = 1,
+    incremental: bool = True
+) -> Dict[str, int]:
+    """
+    Write the output files of a stream of documents.
+
+    Every output file is recorded in its directory's manifest with the
+    hash of the source it was rendered from (see OutputSpec.source). In
+    incremental mode, files whose recorded hash matches are left untouched.
+    The others are rendered and written by a pool of worker processes, each
+    file to a temporary name and renamed into place, so readers never see a
+    partial file. Documents are read as the workers progress, so memory stays
+    bounded for large collections.
+
+    Args:
+        documents: BioC documents (see corpus.iter_bioc_documents)
+        outputs: Output files written per document
+        workers: Worker processes (1 writes in this process)
+        incremental: Skip files whose source is unchanged (False rewrites all)
+
+    Returns:
+        {"written", "unchanged"} file counts over all outputs
+    """
+    manifests = []
+    for spec in outputs:
+        spec.output_dir.mkdir(parents=True, exist_ok=True)
+        manifests.append(OutputManifest(spec.output_dir))
+    counts = {"written": 0, "unchanged": 0}
+
+    def finish(written: List[Tuple[int, str, str]]) -> None:
+        for index, manifest in enumerate(manifests):
+            manifest.record([(name, digest) for i, name, digest in written if i == index])
+        counts["written"] += len(written)
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    pending: deque = deque()
+    batch: List[Tuple[Dict[str, Any], List[Tuple[int, str, str]]]] = []
+
+    def submit() -> None:
+        if executor is None:
+            finish(_write_batch(outputs, batch))
+        else:
+            pending.append(executor.submit(_write_batch, outputs, list(batch)))
+        batch.clear()
+
+    try:
+        for document in documents:
+            tasks = []
+            for index, (spec, manifest) in enumerate(zip(outputs, manifests)):
+                file_name = spec.file_name(document)
+                if file_name is None:
+                    continue
+                source = document if spec.source is None else spec.source(document)
+                digest = source_hash(source, f"{spec.generator}|{spec.encoding}")
+                if incremental and manifest.is_current(file_name, digest):
+                    counts["unchanged"] += 1
+                else:
+                    tasks.append((index, file_name, digest))
+            if tasks:
+                batch.append((document, tasks))
+            if len(batch) >= _BATCH_SIZE:
+                submit()
+            # Bound the documents held by queued batches
+            while len(pending) > 2 * workers:
+                finish(pending.popleft().result())
+        if batch:
+            submit()
+        while pending:
+            finish(pending.popleft().result())
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        for manifest in manifests:
+            manifest.compact()
+    return counts
+
+
+def _write_batch(
+    outputs: Sequence[OutputSpec],
+    batch: List[Tuple[Dict[str, Any], List[Tuple[int, str, str]]]]
+) -> List[Tuple[int, str, str]]:
+    """Worker entry point: render and write the files of a batch of documents."""
+    written = []
+    for document, tasks in batch:
+        for index, file_name, digest in tasks:
+            spec = outputs[index]
+            _write_atomic(spec.output_dir / file_name, spec.render(document), spec.encoding)
+            written.append((index, file_name, digest))
+    return written
+
+
+def _write_atomic(path: Path, content: str, encoding: str) -> None:
+    """Write a file under a temporary name and rename it into place."""
+    # Hidden and process-specific, so neither loaders nor other writers see it
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding=encoding) as f:
+        f.write(content)
+    os.replace(tmp_path, path)
@@ -3,9 +3,12 @@
 from .evaluator import Evaluator
 from .matcher import RelationMatcher
 from .metrics import MetricsCalculator
+from .vectorized import CorpusMetrics, RelationEncoder
 
 __all__ = [
     "Evaluator",
     "RelationMatcher",
     "MetricsCalculator",
+    "CorpusMetrics",
+    "RelationEncoder",
 ]
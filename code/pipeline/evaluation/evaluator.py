@@ -1,12 +1,17 @@
 """Main evaluator class."""
 
 import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 from ..types import ParsedRelations, GoldRelations, EvaluationResult
+from ..data.gold_index import get_gold_index
 from .matcher import RelationMatcher
 from .metrics import MetricsCalculator
+from .vectorized import CorpusMetrics, RelationEncoder, merge_corpus_metrics
 
 
 class Evaluator:
@@ -16,6 +21,8 @@ class Evaluator:
         self, 
         entity_map=None, 
         match_type: bool = True,
+        ged_mode: str = "approximate",
+        ged_cache_size: int = 10000,
         logger: Optional[logging.Logger] = None
     ):
         """
@@ -24,11 +31,17 @@ class Evaluator:
         Args:
             entity_map: Optional global entity map
             match_type: Whether to require relation type to match
+            ged_mode: Graph edit distance mode ("approximate", "exact" or "labeled")
+            ged_cache_size: Most exact GED values cached (see MetricsCalculator)
             logger: Optional logger instance
         """
         self.entity_map = entity_map
         self.matcher = RelationMatcher(match_type=match_type)
-        self.metrics_calculator = MetricsCalculator()
+        self.metrics_calculator = MetricsCalculator(
+            ged_mode=ged_mode, ged_cache_size=ged_cache_size
+        )
+        # Shared across calls so the gold corpus is encoded once for all techniques
+        self.encoder = RelationEncoder()
         self.logger = logger or logging.getLogger(__name__)
     
     def evaluate(
@@ -52,9 +65,29 @@ class Evaluator:
                 f"{len(gold_relations_list)} gold relations"
             )
         
-        results = []
+        return list(self.iter_evaluate(predictions, gold_relations_list))
+    
+    def iter_evaluate(
+        self,
+        predictions: Iterable[ParsedRelations],
+        gold_relations_list: Iterable[GoldRelations]
+    ) -> Iterator[EvaluationResult]:
+        """
+        Evaluate predictions against gold standard one document at a time.
+        
+        Yields each result as soon as it is computed, so callers such as
+        StreamingAggregator never need to hold the whole result list.
+        
+        Args:
+            predictions: ParsedRelations (one per document)
+            gold_relations_list: GoldRelations (one per document, same order)
+            
+        Yields:
+            EvaluationResult per document
+        """
+        debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
         
-        for pred, gold in zip(predictions, gold_relations_list):
+        for pred, gold in zip(predictions, gold_relations_list, strict=True):
             doc_id = gold.doc_id
             gold_file_name = Path(gold.file_path).name if gold.file_path else "unknown"
             self.logger.info(
@@ -71,6 +104,7 @@ class Evaluator:
             # Convert ParsedRelations to list of ParsedRelation
             predicted_relations = pred.relations
             gold_relations = gold.relations
+            gold_index = get_gold_index(gold)
             
             self.logger.info(
                 f"[Evaluator] Document {doc_id}: "
@@ -78,64 +112,67 @@ class Evaluator:
                 f"{len(gold_relations)} gold relations"
             )
             
-            # Debug: Show LLM relations and gold relations
-            self.logger.debug(f"\n[Evaluator] Document {doc_id} - LLM Predicted Relations:")
-            if predicted_relations:
-                for i, rel in enumerate(predicted_relations, 1):
-                    head_display = rel.head_mention
-                    tail_display = rel.tail_mention
-                    if rel.head_id:
-                        head_display += f" (ID: {rel.head_id})"
-                    else:
-                        head_display += " [RESOLUTION ERROR]"
-                    if rel.tail_id:
-                        tail_display += f" (ID: {rel.tail_id})"
-                    else:
-                        tail_display += " [RESOLUTION ERROR]"
+            # Debug: Show LLM relations and gold relations (skip building the
+            # messages entirely unless DEBUG is enabled for this logger)
+            if debug_enabled:
+                self.logger.debug(f"\n[Evaluator] Document {doc_id} - LLM Predicted Relations:")
+                if predicted_relations:
+                    for i, rel in enumerate(predicted_relations, 1):
+                        head_display = rel.head_mention
+                        tail_display = rel.tail_mention
+                        if rel.head_id:
+                            head_display += f" (ID: {rel.head_id})"
+                        else:
+                            head_display += " [RESOLUTION ERROR]"
+                        if rel.tail_id:
+                            tail_display += f" (ID: {rel.tail_id})"
+                        else:
+                            tail_display += " [RESOLUTION ERROR]"
                     
-                    self.logger.debug(
-                        f"  {i}. {head_display} -> {tail_display} "
-                        f"({rel.relation_type})"
-                    )
-            else:
-                self.logger.debug("  (no relations predicted)")
-            
-            self.logger.debug(f"\n[Evaluator] Document {doc_id} - Gold Relations:")
-            if gold_relations:
-                for i, rel in enumerate(gold_relations, 1):
-                    # Try to resolve entity IDs to mentions using entity map
-                    head_display = rel.head_id
-                    tail_display = rel.tail_id
+                        self.logger.debug(
+                            f"  {i}. {head_display} -> {tail_display} "
+                            f"({rel.relation_type})"
+                        )
+                else:
+                    self.logger.debug("  (no relations predicted)")
+            
+                self.logger.debug(f"\n[Evaluator] Document {doc_id} - Gold Relations:")
+                if gold_relations:
+                    for i, rel in enumerate(gold_relations, 1):
+                        # Try to resolve entity IDs to mentions using entity map
+                        head_display = rel.head_id
+                        tail_display = rel.tail_id
                     
-                    if self.entity_map:
-                        head_entity = self.entity_map.get_entity(rel.head_id)
-                        tail_entity = self.entity_map.get_entity(rel.tail_id)
+                        if self.entity_map:
+                            head_entity = self.entity_map.get_entity(rel.head_id)
+                            tail_entity = self.entity_map.get_entity(rel.tail_id)
                         
-                        if head_entity and head_entity.canonical_name:
-                            head_display = f"{head_entity.canonical_name} (ID: {rel.head_id})"
-                        elif head_entity and head_entity.common_mentions:
-                            head_display = f"{head_entity.common_mentions[0]} (ID: {rel.head_id})"
-                        else:
-                            head_display = f"{rel.head_id} [ENTITY NOT FOUND IN MAP]"
+                            if head_entity and head_entity.canonical_name:
+                                head_display = f"{head_entity.canonical_name} (ID: {rel.head_id})"
+                            elif head_entity and head_entity.common_mentions:
+                                head_display = f"{head_entity.common_mentions[0]} (ID: {rel.head_id})"
+                            else:
+                                head_display = f"{rel.head_id} [ENTITY NOT FOUND IN MAP]"
                         
-                        if tail_entity and tail_entity.canonical_name:
-                            tail_display = f"{tail_entity.canonical_name} (ID: {rel.tail_id})"
-                        elif tail_entity and tail_entity.common_mentions:
-                            tail_display = f"{tail_entity.common_mentions[0]} (ID: {rel.tail_id})"
-                        else:
-                            tail_display = f"{rel.tail_id} [ENTITY NOT FOUND IN MAP]"
+                            if tail_entity and tail_entity.canonical_name:
+                                tail_display = f"{tail_entity.canonical_name} (ID: {rel.tail_id})"
+                            elif tail_entity and tail_entity.common_mentions:
+                                tail_display = f"{tail_entity.common_mentions[0]} (ID: {rel.tail_id})"
+                            else:
+                                tail_display = f"{rel.tail_id} [ENTITY NOT FOUND IN MAP]"
                     
-                    self.logger.debug(
-                        f"  {i}. {head_display} -> {tail_display} "
-                        f"({rel.type}) [relation_id: {rel.id}]"
-                    )
-            else:
-                self.logger.debug("  (no gold relations)")
+                        self.logger.debug(
+                            f"  {i}. {head_display} -> {tail_display} "
+                            f"({rel.type}) [relation_id: {rel.id}]"
+                        )
+                else:
+                    self.logger.debug("  (no gold relations)")
             
             # Match relations
             true_positives, false_positives, false_negatives, partial_matches = self.matcher.match(
                 predicted_relations,
-                gold_relations
+                gold_relations,
+                gold_index=gold_index
             )
             
             tp_count = len(true_positives)
@@ -150,7 +187,7 @@ class Evaluator:
             )
             
             # Log partial matches (entities match but type differs)
-            if partial_matches:
+            if debug_enabled and partial_matches:
                 self.logger.debug(f"\n[Evaluator] Document {doc_id} - Partial Matches (entities correct, type wrong):")
                 for i, (pred, gold) in enumerate(partial_matches, 1):
                     # Resolve entity names for display
@@ -170,14 +207,14 @@ class Evaluator:
                     )
             
             # Log some examples
-            if tp_count > 0:
+            if debug_enabled and tp_count > 0:
                 self.logger.debug(f"[Evaluator] Document {doc_id} True Positives (first 3):")
                 for i, tp in enumerate(true_positives[:3], 1):
                     self.logger.debug(
                         f"[Evaluator]   TP {i}: {tp.head_id} -> {tp.tail_id} ({tp.type})"
                     )
             
-            if fp_count > 0:
+            if debug_enabled and fp_count > 0:
                 self.logger.debug(f"[Evaluator] Document {doc_id} False Positives (first 3):")
                 for i, fp in enumerate(false_positives[:3], 1):
                     self.logger.debug(
@@ -185,7 +222,7 @@ class Evaluator:
                         f"({fp.relation_type})"
                     )
             
-            if fn_count > 0:
+            if debug_enabled and fn_count > 0:
                 self.logger.debug(f"[Evaluator] Document {doc_id} False Negatives (first 3):")
                 for i, fn in enumerate(false_negatives[:3], 1):
                     self.logger.debug(
@@ -198,7 +235,8 @@ class Evaluator:
                 false_positives=false_positives,
                 false_negatives=false_negatives,
                 gold_relations=gold_relations,
-                predicted_relations=predicted_relations
+                predicted_relations=predicted_relations,
+                gold_index=gold_index
             )
             
             # Calculate fuzzy metrics (treating partial matches as correct for entities)
@@ -242,6 +280,168 @@ class Evaluator:
                 f"F1={result.f1_score:.3f}"
             )
             
-            results.append(result)
+            yield result
+    
+    def evaluate_vectorized(
+        self,
+        predictions: List[ParsedRelations],
+        gold_relations_list: List[GoldRelations]
+    ) -> List[EvaluationResult]:
+        """
+        Evaluate predictions against gold standard for the whole corpus at once.
+        
+        Gives the same results as evaluate(), without per-document logging.
+        
+        Args:
+            predictions: List of ParsedRelations (one per document)
+            gold_relations_list: List of GoldRelations (one per document)
+            
+        Returns:
+            List of EvaluationResult objects
+        """
+        corpus_metrics = self.evaluate_corpus(predictions, gold_relations_list)
+        return corpus_metrics.to_evaluation_results(predictions, gold_relations_list)
+    
+    def evaluate_corpus(
+        self,
+        predictions: List[ParsedRelations],
+        gold_relations_list: List[GoldRelations]
+    ) -> CorpusMetrics:
+        """
+        Evaluate the whole corpus at once without per-document objects.
+        
+        Pass the result to ResultAggregator.aggregate_corpus(), or call
+        to_evaluation_results() on it to get the results of evaluate().
+        
+        Args:
+            predictions: List of ParsedRelations (one per document)
+            gold_relations_list: List of GoldRelations (one per document)
+            
+        Returns:
+            CorpusMetrics for all documents, in input order
+        """
+        corpus_metrics = self.metrics_calculator.calculate_corpus_metrics(
+            predictions,
+            gold_relations_list,
+            match_type=self.matcher.match_type,
+            encoder=self.encoder
+        )
+        
+        self.logger.info(
+            f"[Evaluator] Evaluated {len(corpus_metrics)} documents (vectorized): "
+            f"TP={int(corpus_metrics.true_positives.sum())}, "
+            f"FP={int(corpus_metrics.false_positives.sum())}, "
+            f"FN={int(corpus_metrics.false_negatives.sum())}, "
+            f"Partial Matches={int(corpus_metrics.partial_matches.sum())}"
+        )
+        
+        return corpus_metrics
+    
+    def evaluate_parallel(
+        self,
+        predictions: List[ParsedRelations],
+        gold_relations_list: List[GoldRelations],
+        max_workers: Optional[int] = None,
+        shards_per_worker: int = 4
+    ) -> CorpusMetrics:
+        """
+        Evaluate predictions across a process pool.
+        
+        Documents are split into contiguous shards. Each worker computes the
+        vectorized counts for its shard and returns only arrays (no relation
+        objects); shards are merged back in document order. Each worker
+        keeps one MetricsCalculator, so its GED cache spans all the shards it
+        evaluates. Call to_evaluation_results() on the result to materialize
+        EvaluationResult objects identical to evaluate().
+        
+        Args:
+            predictions: List of ParsedRelations (one per document)
+            gold_relations_list: List of GoldRelations (one per document)
+            max_workers: Number of worker processes (defaults to CPU count)
+            shards_per_worker: Shards per worker, for load balancing
+            
+        Returns:
+            CorpusMetrics for all documents, in input order
+        """
+        if len(predictions) != len(gold_relations_list):
+            raise ValueError(
+                f"Mismatch: {len(predictions)} predictions vs "
+                f"{len(gold_relations_list)} gold relations"
+            )
+        
+        max_workers = max_workers or os.cpu_count() or 1
+        num_shards = max(1, min(len(predictions), max_workers * shards_per_worker))
+        shard_size = max(1, math.ceil(len(predictions) / num_shards))
+        
+        calculator = self.metrics_calculator
+        ged_settings = (
+            calculator.ged_mode, calculator.ged_timeout,
+            calculator.ged_max_nodes, calculator.ged_cache_size
+        )
+        
+        # Ship only what matching needs: gold entities and mentions stay behind
+        shards = []
+        for start in range(0, len(predictions), shard_size):
+            shard_predictions = [
+                ParsedRelations(relations=pred.relations, doc_id=pred.doc_id)
+                for pred in predictions[start:start + shard_size]
+            ]
+            shard_gold = [
+                GoldRelations(doc_id=gold.doc_id, entities=[], relations=gold.relations)
+                for gold in gold_relations_list[start:start + shard_size]
+            ]
+            shards.append((shard_predictions, shard_gold, self.matcher.match_type))
         
-        return results
+        self.logger.info(
+            f"[Evaluator] Evaluating {len(predictions)} documents in {len(shards)} shards "
+            f"with {max_workers} worker processes"
+        )
+        
+        if max_workers == 1 or len(shards) <= 1:
+            parts = [_evaluate_shard(shard, calculator) for shard in shards]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(ged_settings,)
+            ) as executor:
+                # map() yields results in submission order, i.e. document order
+                parts = list(executor.map(_evaluate_shard, shards))
+        
+        corpus_metrics = merge_corpus_metrics(parts)
+        
+        self.logger.info(
+            f"[Evaluator] Evaluated {len(corpus_metrics)} documents (parallel): "
+            f"TP={int(corpus_metrics.true_positives.sum())}, "
+            f"FP={int(corpus_metrics.false_positives.sum())}, "
+            f"FN={int(corpus_metrics.false_negatives.sum())}, "
+            f"Partial Matches={int(corpus_metrics.partial_matches.sum())}"
+        )
+        
+        return corpus_metrics
+
+
+# Calculator of a worker process, set by _init_worker and kept across shards
+_worker_calculator: Optional[MetricsCalculator] = None
+
+
+def _init_worker(ged_settings: Tuple[str, float, int, int]) -> None:
+    """Worker initializer: create the calculator shared by the worker's shards."""
+    global _worker_calculator
+    ged_mode, ged_timeout, ged_max_nodes, ged_cache_size = ged_settings
+    _worker_calculator = MetricsCalculator(
+        ged_mode=ged_mode, ged_timeout=ged_timeout,
+        ged_max_nodes=ged_max_nodes, ged_cache_size=ged_cache_size
+    )
+
+
+def _evaluate_shard(
+    shard: Tuple[List[ParsedRelations], List[GoldRelations], bool],
+    calculator: Optional[MetricsCalculator] = None
+) -> CorpusMetrics:
+    """Worker entry point: compute corpus metrics for one shard of documents."""
+    predictions, gold_relations_list, match_type = shard
+    calculator = calculator or _worker_calculator
+    return calculator.calculate_corpus_metrics(
+        predictions, gold_relations_list, match_type=match_type
+    )
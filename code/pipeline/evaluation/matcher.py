@@ -1,7 +1,8 @@
 """Relation matcher for matching predictions to gold standard."""
 
-from typing import List, Tuple, Set, Optional
+from typing import Dict, List, Tuple, Set, Optional
 from ..types import Relation, ParsedRelation
+from ..data.gold_index import GoldIndex, unordered_pair
 
 
 class RelationMatcher:
@@ -19,7 +20,8 @@ class RelationMatcher:
     def match(
         self,
         predicted_relations: List[ParsedRelation],
-        gold_relations: List[Relation]
+        gold_relations: List[Relation],
+        gold_index: Optional[GoldIndex] = None
     ) -> Tuple[List[Relation], List[ParsedRelation], List[Relation], List[Tuple[ParsedRelation, Relation]]]:
         """
         Match predicted relations to gold relations.
@@ -27,11 +29,17 @@ class RelationMatcher:
         Args:
             predicted_relations: List of predicted relations
             gold_relations: List of gold standard relations
+            gold_index: Optional precomputed index of gold_relations; when
+                given, each prediction is matched with dictionary lookups
+                instead of a scan over all gold relations
             
         Returns:
             Tuple of (true_positives, false_positives, false_negatives, partial_matches)
             where partial_matches are (predicted, gold) pairs where entities match but type differs
         """
+        if gold_index is not None:
+            return self._match_indexed(predicted_relations, gold_relations, gold_index)
+        
         # Convert gold relations to set of tuples for matching
         gold_set = self._relations_to_set(gold_relations)
         
@@ -83,6 +91,74 @@ class RelationMatcher:
         
         return true_positives, false_positives, false_negatives, partial_matches
     
+    def _match_indexed(
+        self,
+        predicted_relations: List[ParsedRelation],
+        gold_relations: List[Relation],
+        gold_index: GoldIndex
+    ) -> Tuple[List[Relation], List[ParsedRelation], List[Relation], List[Tuple[ParsedRelation, Relation]]]:
+        """
+        Match predicted relations using a precomputed gold index.
+        
+        Gives exactly the same result as the scan in match(): the k-th
+        prediction for an entity pair (and type) takes the k-th distinct gold
+        relation for it in gold order, and a partial match reports the last
+        gold relation between the same entities with a different type.
+        
+        Args:
+            predicted_relations: List of predicted relations
+            gold_relations: List of gold standard relations
+            gold_index: Index built from gold_relations
+            
+        Returns:
+            Tuple of (true_positives, false_positives, false_negatives, partial_matches)
+        """
+        groups = gold_index.typed_groups if self.match_type else gold_index.untyped_groups
+        
+        matched_gold_tuples = set()
+        taken: Dict[tuple, int] = {}  # group key -> distinct gold relations already matched
+        true_positives = []
+        false_positives = []
+        partial_matches = []
+        
+        for pred_rel in predicted_relations:
+            if not pred_rel.head_id or not pred_rel.tail_id:
+                false_positives.append(pred_rel)
+                continue
+            
+            pair = unordered_pair(pred_rel.head_id, pred_rel.tail_id)
+            key = pair + (pred_rel.relation_type,) if self.match_type else pair
+            rows = groups.get(key, ())
+            count = taken.get(key, 0)
+            if count < len(rows):
+                gold_rel = gold_relations[rows[count]]
+                taken[key] = count + 1
+                true_positives.append(gold_rel)
+                matched_gold_tuples.add(self._relation_to_tuple_from_gold(gold_rel))
+                continue
+            
+            partial_match_found = None
+            if self.match_type:
+                for row in reversed(gold_index.pair_rows.get(pair, ())):
+                    if gold_relations[row].type != pred_rel.relation_type:
+                        partial_match_found = gold_relations[row]
+                        break
+            
+            if partial_match_found:
+                partial_matches.append((pred_rel, partial_match_found))
+            else:
+                false_positives.append(pred_rel)
+        
+        if matched_gold_tuples:
+            false_negatives = [
+                gold_rel for gold_rel in gold_relations
+                if self._relation_to_tuple_from_gold(gold_rel) not in matched_gold_tuples
+            ]
+        else:
+            false_negatives = list(gold_relations)
+        
+        return true_positives, false_positives, false_negatives, partial_matches
+    
     def _entities_match(self, pred_rel: ParsedRelation, gold_rel: Relation) -> bool:
         """
         Check if entities match (ignoring relation type).
@@ -1,21 +1,59 @@
 """Metrics calculator for computing evaluation metrics."""
 
-from typing import List, Dict
-import networkx as nx
+from collections import OrderedDict
+from typing import List, Dict, Optional, Set, Tuple
+import numpy as np
 
-from ..types import Relation, ParsedRelation, EvaluationResult
+from ..types import Relation, ParsedRelation, EvaluationResult, ParsedRelations, GoldRelations
+from ..data.gold_index import GoldIndex
+from .graph_edit import bounded_graph_edit_distance
+from .vectorized import CorpusMetrics, RelationEncoder, compute_corpus_metrics
+
+
+GED_MODES = ("approximate", "exact", "labeled")
 
 
 class MetricsCalculator:
     """Calculates evaluation metrics for relation extraction."""
     
+    def __init__(
+        self,
+        ged_mode: str = "approximate",
+        ged_timeout: float = 0.5,
+        ged_max_nodes: int = 16,
+        ged_cache_size: int = 10000
+    ):
+        """
+        Initialize metrics calculator.
+        
+        Args:
+            ged_mode: "approximate" (node/edge set differences), "exact"
+                (structural GED, labels ignored) or "labeled" (GED where
+                entity IDs and relation types must match)
+            ged_timeout: Time limit in seconds for one exact GED computation
+            ged_max_nodes: Largest graph (in nodes) for which exact GED is
+                attempted; bigger graphs fall back to the approximation
+            ged_cache_size: Most exact GED values kept, least recently used
+                evicted first (0 disables the cache)
+        """
+        if ged_mode not in GED_MODES:
+            raise ValueError(f"Invalid ged_mode: {ged_mode}. Must be one of {GED_MODES}")
+        self.ged_mode = ged_mode
+        self.ged_timeout = ged_timeout
+        self.ged_max_nodes = ged_max_nodes
+        self.ged_cache_size = ged_cache_size
+        # (mode, gold edges, predicted edges) -> GED; documents are re-evaluated
+        # across runs and techniques with identical graphs
+        self._ged_cache: OrderedDict[tuple, float] = OrderedDict()
+    
     def calculate_metrics(
         self,
         true_positives: List[Relation],
         false_positives: List[ParsedRelation],
         false_negatives: List[Relation],
         gold_relations: List[Relation],
-        predicted_relations: List[ParsedRelation]
+        predicted_relations: List[ParsedRelation],
+        gold_index: Optional[GoldIndex] = None
     ) -> Dict[str, float]:
         """
         Calculate all evaluation metrics.
@@ -26,6 +64,7 @@ class MetricsCalculator:
             false_negatives: List of missed gold relations
             gold_relations: All gold relations
             predicted_relations: All predicted relations
+            gold_index: Optional precomputed index of gold_relations
             
         Returns:
             Dictionary of metric names to values
@@ -62,7 +101,9 @@ class MetricsCalculator:
         metrics['redundancy_rate'] = redundancy_rate
         
         # Graph edit distance
-        ged = self._calculate_graph_edit_distance(gold_relations, predicted_relations)
+        ged = self._calculate_graph_edit_distance(
+            gold_relations, predicted_relations, gold_index=gold_index
+        )
         metrics['graph_edit_distance'] = ged
         
         # Per-type metrics
@@ -73,6 +114,43 @@ class MetricsCalculator:
         
         return metrics
     
+    def calculate_corpus_metrics(
+        self,
+        predictions: List[ParsedRelations],
+        gold_relations_list: List[GoldRelations],
+        match_type: bool = True,
+        encoder: Optional[RelationEncoder] = None
+    ) -> CorpusMetrics:
+        """
+        Calculate metrics for all documents at once (vectorized).
+        
+        Produces the same per-document numbers as matching each document and
+        calling calculate_metrics, but in a single NumPy pass over the corpus.
+        
+        Args:
+            predictions: List of ParsedRelations (one per document)
+            gold_relations_list: List of GoldRelations (one per document)
+            match_type: Whether to require relation type to match
+            encoder: Optional encoder to share ID vocabularies across techniques
+            
+        Returns:
+            CorpusMetrics with per-document and per-type counts
+        """
+        corpus_metrics = compute_corpus_metrics(
+            predictions, gold_relations_list, match_type=match_type, encoder=encoder
+        )
+        
+        # The kernel computes the approximate GED; true GED stays per document
+        if self.ged_mode != "approximate":
+            corpus_metrics.graph_edit_distance = np.array([
+                self._calculate_graph_edit_distance(
+                    gold.relations, pred.relations, gold_index=gold.index
+                )
+                for pred, gold in zip(predictions, gold_relations_list)
+            ], dtype=np.float64)
+        
+        return corpus_metrics
+    
     def _calculate_redundancy_rate(self, predicted_relations: List[ParsedRelation]) -> float:
         """
         Calculate redundancy rate (percentage of duplicate relations).
@@ -107,57 +185,120 @@ class MetricsCalculator:
     def _calculate_graph_edit_distance(
         self,
         gold_relations: List[Relation],
-        predicted_relations: List[ParsedRelation]
+        predicted_relations: List[ParsedRelation],
+        gold_index: Optional[GoldIndex] = None
     ) -> float:
         """
-        Calculate approximate graph edit distance.
+        Calculate graph edit distance according to the configured mode.
         
         Args:
             gold_relations: List of gold relations
             predicted_relations: List of predicted relations
+            gold_index: Optional precomputed index of gold_relations (its edge
+                and node sets are used instead of rebuilding them)
             
         Returns:
             Graph edit distance (number of edits needed)
         """
-        # Build graphs
-        gold_graph = self._build_graph(gold_relations)
-        pred_graph = self._build_graph_from_parsed(predicted_relations)
-        
-        # Calculate edit distance as sum of:
-        # - Nodes to add/remove
-        # - Edges to add/remove
-        gold_nodes = set(gold_graph.nodes())
-        pred_nodes = set(pred_graph.nodes())
+        if self.ged_mode == "approximate":
+            pred_pairs = {
+                (rel.head_id, rel.tail_id)
+                for rel in predicted_relations
+                if rel.head_id and rel.tail_id
+            }
+            if gold_index is not None:
+                return self._approximate_graph_edit_distance(
+                    gold_index.pair_keys, pred_pairs, gold_nodes=gold_index.nodes
+                )
+            gold_pairs = {(rel.head_id, rel.tail_id) for rel in gold_relations}
+            return self._approximate_graph_edit_distance(gold_pairs, pred_pairs)
         
-        gold_edges = set(gold_graph.edges())
-        pred_edges = set(pred_graph.edges())
+        if gold_index is not None:
+            gold_edges = gold_index.typed_keys
+        else:
+            gold_edges = {(rel.head_id, rel.tail_id, rel.type) for rel in gold_relations}
+        pred_edges = {
+            (rel.head_id, rel.tail_id, rel.relation_type)
+            for rel in predicted_relations
+            if rel.head_id and rel.tail_id
+        }
+        cache_key = (self.ged_mode, frozenset(gold_edges), frozenset(pred_edges))
+        ged = self._ged_cache.get(cache_key)
+        if ged is not None:
+            self._ged_cache.move_to_end(cache_key)
+            return ged
+        ged = self._exact_graph_edit_distance(gold_edges, pred_edges)
+        if self.ged_cache_size > 0:
+            self._ged_cache[cache_key] = ged
+            if len(self._ged_cache) > self.ged_cache_size:
+                self._ged_cache.popitem(last=False)
+        return ged
+    
+    def _approximate_graph_edit_distance(
+        self,
+        gold_pairs: Set[Tuple[str, str]],
+        pred_pairs: Set[Tuple[str, str]],
+        gold_nodes: Optional[Set[str]] = None
+    ) -> float:
+        """
+        Approximate GED from node and edge key sets.
         
-        # Node edits
-        nodes_to_add = len(pred_nodes - gold_nodes)
-        nodes_to_remove = len(gold_nodes - pred_nodes)
+        Edges are directed and unlabeled, so relations of different types
+        between the same entities count as one edge.
         
-        # Edge edits
-        edges_to_add = len(pred_edges - gold_edges)
-        edges_to_remove = len(gold_edges - pred_edges)
+        Args:
+            gold_pairs: Set of (head_id, tail_id) gold edges
+            pred_pairs: Set of (head_id, tail_id) predicted edges
+            gold_nodes: Optional precomputed node set of gold_pairs
+            
+        Returns:
+            Number of node and edge insertions and deletions
+        """
+        if gold_nodes is None:
+            gold_nodes = {node for pair in gold_pairs for node in pair}
+        pred_nodes = {node for pair in pred_pairs for node in pair}
         
-        total_edits = nodes_to_add + nodes_to_remove + edges_to_add + edges_to_remove
+        # Node edits + edge edits
+        total_edits = (
+            len(pred_nodes - gold_nodes) + len(gold_nodes - pred_nodes) +
+            len(pred_pairs - gold_pairs) + len(gold_pairs - pred_pairs)
+        )
         
         return float(total_edits)
     
-    def _build_graph(self, relations: List[Relation]) -> nx.DiGraph:
-        """Build NetworkX graph from relations."""
-        graph = nx.DiGraph()
-        for rel in relations:
-            graph.add_edge(rel.head_id, rel.tail_id, relation_type=rel.type)
-        return graph
-    
-    def _build_graph_from_parsed(self, relations: List[ParsedRelation]) -> nx.DiGraph:
-        """Build NetworkX graph from parsed relations."""
-        graph = nx.DiGraph()
-        for rel in relations:
-            if rel.head_id and rel.tail_id:
-                graph.add_edge(rel.head_id, rel.tail_id, relation_type=rel.relation_type)
-        return graph
+    def _exact_graph_edit_distance(
+        self,
+        gold_edges: Set[Tuple[str, str, str]],
+        pred_edges: Set[Tuple[str, str, str]]
+    ) -> float:
+        """
+        Compute true GED, bounded by graph size and time.
+        
+        Falls back to the approximation when either graph has more than
+        ged_max_nodes nodes; otherwise returns the best edit path found
+        within ged_timeout.
+        
+        Args:
+            gold_edges: Set of (head_id, tail_id, type) gold edges
+            pred_edges: Set of (head_id, tail_id, type) predicted edges
+            
+        Returns:
+            Graph edit distance
+        """
+        gold_pairs = {(head, tail) for head, tail, _ in gold_edges}
+        pred_pairs = {(head, tail) for head, tail, _ in pred_edges}
+        
+        gold_nodes = {node for pair in gold_pairs for node in pair}
+        pred_nodes = {node for pair in pred_pairs for node in pair}
+        if max(len(gold_nodes), len(pred_nodes)) > self.ged_max_nodes:
+            return self._approximate_graph_edit_distance(gold_pairs, pred_pairs)
+        
+        return bounded_graph_edit_distance(
+            gold_edges,
+            pred_edges,
+            labeled=self.ged_mode == "labeled",
+            timeout=self.ged_timeout
+        )
     
     def _calculate_per_type_metrics(
         self,
@@ -0,0 +1,669 @@
+"""Vectorized corpus-level evaluation kernels.
+
+The per-document path (``RelationMatcher`` + ``MetricsCalculator``) walks
+relation objects in Python. This module encodes every document's gold and
+predicted relations as integer arrays and computes the same counts for the
+whole corpus with NumPy grouped operations, reproducing the matcher's greedy
+semantics exactly.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..types import ParsedRelations, GoldRelations, EvaluationResult
+
+
+class RelationEncoder:
+    """Maps entity IDs and relation types to dense integer codes."""
+
+    def __init__(self):
+        """Initialize empty vocabularies."""
+        self.entity_codes: Dict[str, int] = {}
+        self.type_codes: Dict[str, int] = {}
+        # Documents and encoding of the last gold corpus; the same gold is
+        # evaluated once per technique, so it is encoded only once
+        self._gold_cache: Optional[Tuple[Tuple[GoldRelations, ...], "EncodedRelations"]] = None
+
+    def entity_code(self, entity_id: str) -> int:
+        """Return the code for an entity ID, assigning a new one if needed."""
+        return self.entity_codes.setdefault(entity_id, len(self.entity_codes))
+
+    def type_code(self, relation_type: str) -> int:
+        """Return the code for a relation type, assigning a new one if needed."""
+        return self.type_codes.setdefault(relation_type, len(self.type_codes))
+
+    @property
+    def type_names(self) -> List[str]:
+        """Relation type names ordered by code."""
+        return list(self.type_codes)
+
+    def encode_gold(self, gold_relations_list: List[GoldRelations]) -> "EncodedRelations":
+        """
+        Encode gold relations of all documents.
+
+        Re-encoding the same GoldRelations objects (in the same order) returns
+        the cached arrays; codes are never reassigned, so they stay valid.
+
+        Args:
+            gold_relations_list: List of GoldRelations (one per document)
+
+        Returns:
+            EncodedRelations with one row per gold relation
+        """
+        if self._gold_cache is not None:
+            cached_docs, cached = self._gold_cache
+            if len(cached_docs) == len(gold_relations_list) and all(
+                a is b for a, b in zip(cached_docs, gold_relations_list)
+            ):
+                return cached
+
+        entity_codes = self.entity_codes
+        type_codes = self.type_codes
+        relations = [rel for gold in gold_relations_list for rel in gold.relations]
+        sizes = [len(gold.relations) for gold in gold_relations_list]
+
+        head = [entity_codes.setdefault(rel.head_id, len(entity_codes)) for rel in relations]
+        tail = [entity_codes.setdefault(rel.tail_id, len(entity_codes)) for rel in relations]
+        rel_type = [type_codes.setdefault(rel.type, len(type_codes)) for rel in relations]
+        encoded = EncodedRelations.from_lists(sizes, head, tail, rel_type)
+        self._gold_cache = (tuple(gold_relations_list), encoded)
+        return encoded
+
+    def encode_predictions(self, predictions: List[ParsedRelations]) -> "EncodedRelations":
+        """
+        Encode predicted relations of all documents.
+
+        Relations without resolved entity IDs are encoded with head/tail -1.
+
+        Args:
+            predictions: List of ParsedRelations (one per document)
+
+        Returns:
+            EncodedRelations with one row per predicted relation
+        """
+        entity_codes = self.entity_codes
+        type_codes = self.type_codes
+        relations = [rel for pred in predictions for rel in pred.relations]
+        sizes = [len(pred.relations) for pred in predictions]
+
+        head = [
+            entity_codes.setdefault(rel.head_id, len(entity_codes))
+            if rel.head_id and rel.tail_id else -1
+            for rel in relations
+        ]
+        tail = [
+            entity_codes.setdefault(rel.tail_id, len(entity_codes))
+            if rel.head_id and rel.tail_id else -1
+            for rel in relations
+        ]
+        rel_type = [type_codes.setdefault(rel.relation_type, len(type_codes)) for rel in relations]
+        return EncodedRelations.from_lists(sizes, head, tail, rel_type)
+
+
+@dataclass
+class EncodedRelations:
+    """Relations of a corpus as parallel integer arrays."""
+    doc: np.ndarray  # Document index per relation
+    head: np.ndarray  # Head entity code (-1 if unresolved)
+    tail: np.ndarray  # Tail entity code (-1 if unresolved)
+    type: np.ndarray  # Relation type code
+    offsets: np.ndarray  # Row offsets per document (length num_docs + 1)
+
+    @classmethod
+    def from_lists(cls, sizes, head, tail, rel_type) -> "EncodedRelations":
+        """Build from per-document sizes and flat per-relation code lists."""
+        sizes = np.asarray(sizes, dtype=np.int64)
+        offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        return cls(
+            doc=np.repeat(np.arange(len(sizes), dtype=np.int64), sizes),
+            head=np.asarray(head, dtype=np.int64),
+            tail=np.asarray(tail, dtype=np.int64),
+            type=np.asarray(rel_type, dtype=np.int64),
+            offsets=offsets,
+        )
+
+    @property
+    def num_docs(self) -> int:
+        """Number of documents."""
+        return len(self.offsets) - 1
+
+
+@dataclass
+class CorpusMetrics:
+    """Per-document counts and metrics for a whole corpus, as arrays."""
+    doc_ids: List[str]
+    type_names: List[str]
+    # Per-document counts
+    true_positives: np.ndarray
+    false_positives: np.ndarray
+    false_negatives: np.ndarray
+    partial_matches: np.ndarray
+    num_gold: np.ndarray
+    num_predicted: np.ndarray
+    duplicates: np.ndarray
+    graph_edit_distance: np.ndarray
+    # Per-document, per-type counts (num_docs x num_types)
+    tp_by_type: np.ndarray
+    fp_by_type: np.ndarray
+    fn_by_type: np.ndarray
+    # Row-level match information used to materialize relation lists
+    pred_is_tp: np.ndarray = field(repr=False, default=None)
+    pred_is_partial: np.ndarray = field(repr=False, default=None)
+    pred_tp_gold_row: np.ndarray = field(repr=False, default=None)
+    gold_is_fn: np.ndarray = field(repr=False, default=None)
+    gold_offsets: np.ndarray = field(repr=False, default=None)
+    pred_offsets: np.ndarray = field(repr=False, default=None)
+
+    def __len__(self) -> int:
+        """Return number of documents."""
+        return len(self.doc_ids)
+
+    @property
+    def precision(self) -> np.ndarray:
+        """Per-document precision."""
+        return _safe_div(self.true_positives, self.true_positives + self.false_positives)
+
+    @property
+    def recall(self) -> np.ndarray:
+        """Per-document recall."""
+        return _safe_div(self.true_positives, self.true_positives + self.false_negatives)
+
+    @property
+    def f1_score(self) -> np.ndarray:
+        """Per-document F1 score."""
+        return _f1(self.precision, self.recall)
+
+    @property
+    def fuzzy_precision(self) -> np.ndarray:
+        """Per-document precision counting partial matches as correct."""
+        # Same convention as Evaluator: partial matches move from FP to TP
+        fuzzy_tp = self.true_positives + self.partial_matches
+        fuzzy_fp = self.false_positives - self.partial_matches
+        return _safe_div(fuzzy_tp, fuzzy_tp + fuzzy_fp)
+
+    @property
+    def fuzzy_recall(self) -> np.ndarray:
+        """Per-document recall counting partial matches as correct."""
+        fuzzy_tp = self.true_positives + self.partial_matches
+        return _safe_div(fuzzy_tp, fuzzy_tp + self.false_negatives)
+
+    @property
+    def fuzzy_f1(self) -> np.ndarray:
+        """Per-document F1 counting partial matches as correct."""
+        return _f1(self.fuzzy_precision, self.fuzzy_recall)
+
+    @property
+    def exact_match_rate(self) -> np.ndarray:
+        """Per-document exact match rate."""
+        return _safe_div(self.true_positives, self.num_gold)
+
+    @property
+    def omission_rate(self) -> np.ndarray:
+        """Per-document omission rate."""
+        return _safe_div(self.false_negatives, self.num_gold)
+
+    @property
+    def hallucination_rate(self) -> np.ndarray:
+        """Per-document hallucination rate."""
+        return _safe_div(self.false_positives, self.num_predicted)
+
+    @property
+    def redundancy_rate(self) -> np.ndarray:
+        """Per-document redundancy rate."""
+        return _safe_div(self.duplicates, self.num_predicted)
+
+    def per_type_metrics(self, doc_index: int) -> Dict[str, Dict[str, float]]:
+        """
+        Build the per-type metrics dictionary for one document.
+
+        Args:
+            doc_index: Position of the document in the corpus
+
+        Returns:
+            Dictionary mapping relation type to metrics (as MetricsCalculator)
+        """
+        tp_row = self.tp_by_type[doc_index].tolist()
+        fp_row = self.fp_by_type[doc_index].tolist()
+        fn_row = self.fn_by_type[doc_index].tolist()
+
+        per_type_metrics = {}
+        for type_idx, rel_type in enumerate(self.type_names):
+            tp = tp_row[type_idx]
+            fp = fp_row[type_idx]
+            fn = fn_row[type_idx]
+            if not (tp or fp or fn):
+                continue
+
+            precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
+            recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
+            f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0.0
+
+            per_type_metrics[rel_type] = {
+                'precision': precision,
+                'recall': recall,
+                'f1_score': f1,
+                'true_positives': tp,
+                'false_positives': fp,
+                'false_negatives': fn
+            }
+        return per_type_metrics
+
+    def to_evaluation_results(
+        self,
+        predictions: Optional[List[ParsedRelations]] = None,
+        gold_relations_list: Optional[List[GoldRelations]] = None
+    ) -> List[EvaluationResult]:
+        """
+        Materialize per-document EvaluationResult objects.
+
+        When the original predictions and gold relations are passed, the
+        true positive, false negative and partial match lists are filled in
+        exactly as the serial Evaluator would; otherwise only metrics are set.
+
+        Args:
+            predictions: Optional list of ParsedRelations used for encoding
+            gold_relations_list: Optional list of GoldRelations used for encoding
+
+        Returns:
+            List of EvaluationResult objects
+        """
+        with_relations = predictions is not None and gold_relations_list is not None
+
+        columns = {
+            name: getattr(self, name).tolist()
+            for name in (
+                'precision', 'recall', 'f1_score',
+                'fuzzy_precision', 'fuzzy_recall', 'fuzzy_f1',
+                'exact_match_rate', 'omission_rate', 'hallucination_rate',
+                'redundancy_rate', 'graph_edit_distance',
+            )
+        }
+        if with_relations:
+            pred_is_tp = self.pred_is_tp.tolist()
+            pred_is_partial = self.pred_is_partial.tolist()
+            pred_tp_gold_row = self.pred_tp_gold_row.tolist()
+            gold_is_fn = self.gold_is_fn.tolist()
+            gold_offsets = self.gold_offsets.tolist()
+            pred_offsets = self.pred_offsets.tolist()
+
+        results = []
+        for i, doc_id in enumerate(self.doc_ids):
+            result = EvaluationResult(
+                doc_id=doc_id,
+                precision=columns['precision'][i],
+                recall=columns['recall'][i],
+                f1_score=columns['f1_score'][i],
+                fuzzy_precision=columns['fuzzy_precision'][i],
+                fuzzy_recall=columns['fuzzy_recall'][i],
+                fuzzy_f1=columns['fuzzy_f1'][i],
+                exact_match_rate=columns['exact_match_rate'][i],
+                omission_rate=columns['omission_rate'][i],
+                hallucination_rate=columns['hallucination_rate'][i],
+                redundancy_rate=columns['redundancy_rate'][i],
+                graph_edit_distance=columns['graph_edit_distance'][i],
+                per_type_metrics=self.per_type_metrics(i)
+            )
+
+            if with_relations:
+                gold_rels = gold_relations_list[i].relations
+                pred_rels = predictions[i].relations
+                g_start = gold_offsets[i]
+                p_start = pred_offsets[i]
+
+                for j, pred_rel in enumerate(pred_rels):
+                    row = p_start + j
+                    if pred_is_tp[row]:
+                        result.true_positives.append(gold_rels[pred_tp_gold_row[row] - g_start])
+                    elif pred_is_partial[row]:
+                        result.partial_matches.append(
+                            (pred_rel, _last_partial_gold(pred_rel, gold_rels))
+                        )
+                result.false_negatives = [
+                    gold_rel for k, gold_rel in enumerate(gold_rels)
+                    if gold_is_fn[g_start + k]
+                ]
+
+            results.append(result)
+
+        return results
+
+
+def compute_corpus_metrics(
+    predictions: List[ParsedRelations],
+    gold_relations_list: List[GoldRelations],
+    match_type: bool = True,
+    encoder: Optional[RelationEncoder] = None
+) -> CorpusMetrics:
+    """
+    Compute per-document counts for a whole corpus in one vectorized pass.
+
+    Args:
+        predictions: List of ParsedRelations (one per document)
+        gold_relations_list: List of GoldRelations (one per document)
+        match_type: Whether to require relation type to match
+        encoder: Optional encoder to reuse vocabularies across techniques
+
+    Returns:
+        CorpusMetrics with the same numbers as the per-document path
+    """
+    if len(predictions) != len(gold_relations_list):
+        raise ValueError(
+            f"Mismatch: {len(predictions)} predictions vs "
+            f"{len(gold_relations_list)} gold relations"
+        )
+
+    encoder = encoder or RelationEncoder()
+    gold = encoder.encode_gold(gold_relations_list)
+    pred = encoder.encode_predictions(predictions)
+
+    return _compute_from_encoded(
+        gold,
+        pred,
+        num_entities=len(encoder.entity_codes),
+        type_names=encoder.type_names,
+        doc_ids=[g.doc_id for g in gold_relations_list],
+        match_type=match_type,
+    )
+
+
+def merge_corpus_metrics(parts: List[CorpusMetrics]) -> CorpusMetrics:
+    """
+    Concatenate metrics of consecutive document shards, in order.
+
+    Per-type columns are aligned by type name and row-level indices are
+    shifted so the merged object behaves as if computed in one pass.
+
+    Args:
+        parts: CorpusMetrics of consecutive shards
+
+    Returns:
+        CorpusMetrics covering all shards
+    """
+    type_names: List[str] = []
+    type_index: Dict[str, int] = {}
+    for part in parts:
+        for rel_type in part.type_names:
+            if rel_type not in type_index:
+                type_index[rel_type] = len(type_names)
+                type_names.append(rel_type)
+
+    def by_type(name: str) -> np.ndarray:
+        blocks = []
+        for part in parts:
+            block = np.zeros((len(part), len(type_names)), dtype=np.int64)
+            columns = [type_index[rel_type] for rel_type in part.type_names]
+            block[:, columns] = getattr(part, name)[:, :len(columns)]
+            blocks.append(block)
+        return np.concatenate(blocks) if blocks else np.zeros((0, len(type_names)), dtype=np.int64)
+
+    def concat(name: str, dtype=np.int64) -> np.ndarray:
+        arrays = [getattr(part, name) for part in parts]
+        return np.concatenate(arrays) if arrays else np.zeros(0, dtype=dtype)
+
+    # Shift row offsets and gold row references by the preceding shards' sizes
+    gold_offsets = [np.zeros(1, dtype=np.int64)]
+    pred_offsets = [np.zeros(1, dtype=np.int64)]
+    pred_tp_gold_row = []
+    gold_base = pred_base = 0
+    for part in parts:
+        gold_offsets.append(part.gold_offsets[1:] + gold_base)
+        pred_offsets.append(part.pred_offsets[1:] + pred_base)
+        pred_tp_gold_row.append(
+            np.where(part.pred_tp_gold_row >= 0, part.pred_tp_gold_row + gold_base, -1)
+        )
+        gold_base += int(part.gold_offsets[-1])
+        pred_base += int(part.pred_offsets[-1])
+
+    return CorpusMetrics(
+        doc_ids=[doc_id for part in parts for doc_id in part.doc_ids],
+        type_names=type_names,
+        true_positives=concat('true_positives'),
+        false_positives=concat('false_positives'),
+        false_negatives=concat('false_negatives'),
+        partial_matches=concat('partial_matches'),
+        num_gold=concat('num_gold'),
+        num_predicted=concat('num_predicted'),
+        duplicates=concat('duplicates'),
+        graph_edit_distance=concat('graph_edit_distance', dtype=np.float64),
+        tp_by_type=by_type('tp_by_type'),
+        fp_by_type=by_type('fp_by_type'),
+        fn_by_type=by_type('fn_by_type'),
+        pred_is_tp=concat('pred_is_tp', dtype=bool),
+        pred_is_partial=concat('pred_is_partial', dtype=bool),
+        pred_tp_gold_row=np.concatenate(pred_tp_gold_row) if parts else np.zeros(0, dtype=np.int64),
+        gold_is_fn=concat('gold_is_fn', dtype=bool),
+        gold_offsets=np.concatenate(gold_offsets),
+        pred_offsets=np.concatenate(pred_offsets),
+    )
+
+
+def _compute_from_encoded(
+    gold: EncodedRelations,
+    pred: EncodedRelations,
+    num_entities: int,
+    type_names: List[str],
+    doc_ids: List[str],
+    match_type: bool
+) -> CorpusMetrics:
+    """Run the grouped matching and counting kernels on encoded relations."""
+    num_docs = gold.num_docs
+    num_types = max(len(type_names), 1)
+    # Keys are built as mixed-radix integers over (doc, entity, entity, type)
+    base = max(num_entities, 1)
+    match_types = num_types if match_type else 1
+
+    # ---- Gold side ----
+    g_lo = np.minimum(gold.head, gold.tail)
+    g_hi = np.maximum(gold.head, gold.tail)
+    g_mtype = gold.type if match_type else np.zeros_like(gold.type)
+    g_pair = (gold.doc * base + g_lo) * base + g_hi
+    g_group = g_pair * match_types + g_mtype
+    g_directed = ((gold.doc * base + gold.head) * base + gold.tail) * match_types + g_mtype
+
+    # Matching is against distinct directed gold tuples, first occurrence wins
+    tuple_first_row, gold_tuple = _first_occurrences(g_directed)
+    tuple_group = g_group[tuple_first_row]
+    tuple_rank = _group_ranks(tuple_group, tuple_first_row)
+
+    # ---- Prediction side ----
+    valid = pred.head >= 0
+    p_rows = np.flatnonzero(valid)
+    p_doc = pred.doc[p_rows]
+    p_head = pred.head[p_rows]
+    p_tail = pred.tail[p_rows]
+    p_type = pred.type[p_rows]
+    p_lo = np.minimum(p_head, p_tail)
+    p_hi = np.maximum(p_head, p_tail)
+    p_pair = (p_doc * base + p_lo) * base + p_hi
+    p_group = p_pair * match_types + (p_type if match_type else 0)
+    p_rank = _group_ranks(p_group, p_rows)
+
+    # Each prediction takes the first unmatched gold tuple of its group, so
+    # the k-th prediction in a group matches iff the group has > k tuples.
+    tuple_groups, group_capacity = _unique_counts(tuple_group)
+    p_capacity = _lookup(tuple_groups, group_capacity, p_group)
+    p_is_tp = p_rank < p_capacity
+
+    pred_groups, group_demand = _unique_counts(p_group)
+    tuple_matched = tuple_rank < _lookup(pred_groups, group_demand, tuple_group)
+    gold_is_fn = ~tuple_matched[gold_tuple]
+
+    # Gold row matched by each true positive prediction: same group, same rank
+    rank_base = int(tuple_rank.max()) + 1 if len(tuple_rank) else 1
+    slot_keys = tuple_group * rank_base + tuple_rank
+    slot_order = np.argsort(slot_keys)
+    tp_slots = p_group[p_is_tp] * rank_base + p_rank[p_is_tp]
+    tp_gold_row = tuple_first_row[slot_order[np.searchsorted(slot_keys[slot_order], tp_slots)]]
+
+    # Partial matches: entity pair is in gold with a different relation type
+    p_is_partial = np.zeros(len(p_rows), dtype=bool)
+    if match_type and len(p_rows):
+        gold_pair_types = _unique(g_pair * num_types + gold.type)
+        pairs, types_per_pair = _unique_counts(gold_pair_types // num_types)
+        same_type = _contains(gold_pair_types, p_pair * num_types + p_type)
+        other_types = _lookup(pairs, types_per_pair, p_pair) - same_type
+        p_is_partial = ~p_is_tp & (other_types > 0)
+
+    # ---- Per-document counts ----
+    num_gold = np.diff(gold.offsets)
+    num_predicted = np.diff(pred.offsets)
+    tp_count = np.bincount(p_doc[p_is_tp], minlength=num_docs)
+    partial_count = np.bincount(p_doc[p_is_partial], minlength=num_docs)
+    fp_count = num_predicted - tp_count - partial_count
+    fn_count = np.bincount(gold.doc[gold_is_fn], minlength=num_docs)
+
+    # Redundancy: repeats of (pair, type) in either direction, type always counted
+    redundancy_group = p_pair * num_types + p_type
+    duplicate_count = np.bincount(
+        p_doc[_group_ranks(redundancy_group, p_rows) > 0], minlength=num_docs
+    )
+
+    # ---- Approximate graph edit distance from node and edge key sets ----
+    gold_nodes = _unique(np.concatenate([gold.doc * base + gold.head, gold.doc * base + gold.tail]))
+    pred_nodes = _unique(np.concatenate([p_doc * base + p_head, p_doc * base + p_tail]))
+    gold_edges = _unique((gold.doc * base + gold.head) * base + gold.tail)
+    pred_edges = _unique((p_doc * base + p_head) * base + p_tail)
+
+    ged = (
+        _count_missing(pred_nodes, gold_nodes, base, num_docs)
+        + _count_missing(gold_nodes, pred_nodes, base, num_docs)
+        + _count_missing(pred_edges, gold_edges, base * base, num_docs)
+        + _count_missing(gold_edges, pred_edges, base * base, num_docs)
+    ).astype(np.float64)
+
+    # ---- Per-type counts ----
+    all_pred_is_tp = np.zeros(len(pred.doc), dtype=bool)
+    all_pred_is_tp[p_rows[p_is_tp]] = True
+    all_pred_is_partial = np.zeros(len(pred.doc), dtype=bool)
+    all_pred_is_partial[p_rows[p_is_partial]] = True
+    all_pred_is_fp = ~(all_pred_is_tp | all_pred_is_partial)
+
+    pred_tp_gold_row = np.full(len(pred.doc), -1, dtype=np.int64)
+    pred_tp_gold_row[p_rows[p_is_tp]] = tp_gold_row
+
+    tp_by_type = _count_by_type(p_doc[p_is_tp], gold.type[tp_gold_row], num_docs, num_types)
+    fp_by_type = _count_by_type(
+        pred.doc[all_pred_is_fp], pred.type[all_pred_is_fp], num_docs, num_types
+    )
+    fn_by_type = _count_by_type(gold.doc[gold_is_fn], gold.type[gold_is_fn], num_docs, num_types)
+
+    return CorpusMetrics(
+        doc_ids=doc_ids,
+        type_names=type_names,
+        true_positives=tp_count,
+        false_positives=fp_count,
+        false_negatives=fn_count,
+        partial_matches=partial_count,
+        num_gold=num_gold,
+        num_predicted=num_predicted,
+        duplicates=duplicate_count,
+        graph_edit_distance=ged,
+        tp_by_type=tp_by_type,
+        fp_by_type=fp_by_type,
+        fn_by_type=fn_by_type,
+        pred_is_tp=all_pred_is_tp,
+        pred_is_partial=all_pred_is_partial,
+        pred_tp_gold_row=pred_tp_gold_row,
+        gold_is_fn=gold_is_fn,
+        gold_offsets=gold.offsets,
+        pred_offsets=pred.offsets,
+    )
+
+
+def _group_ranks(keys: np.ndarray, sequence: np.ndarray) -> np.ndarray:
+    """Rank of each element among elements with equal key, ordered by sequence."""
+    n = len(keys)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort((sequence, keys))
+    sorted_keys = keys[order]
+    positions = np.arange(n)
+    is_start = _run_starts(sorted_keys)
+    group_start = np.maximum.accumulate(np.where(is_start, positions, 0))
+    ranks = np.empty(n, dtype=np.int64)
+    ranks[order] = positions - group_start
+    return ranks
+
+
+def _unique(keys: np.ndarray) -> np.ndarray:
+    """Sorted unique keys (sort-based; faster than np.unique for int64 keys)."""
+    sorted_keys = np.sort(keys)
+    return sorted_keys[_run_starts(sorted_keys)]
+
+
+def _unique_counts(keys: np.ndarray):
+    """Sorted unique keys and how often each occurs."""
+    sorted_keys = np.sort(keys)
+    starts = np.flatnonzero(_run_starts(sorted_keys))
+    counts = np.diff(np.append(starts, len(sorted_keys)))
+    return sorted_keys[starts], counts
+
+
+def _first_occurrences(keys: np.ndarray):
+    """Row of the first occurrence of each unique key, and each row's unique index."""
+    order = np.argsort(keys, kind='stable')
+    is_start = _run_starts(keys[order])
+    inverse = np.empty(len(keys), dtype=np.int64)
+    inverse[order] = np.cumsum(is_start) - 1
+    return order[is_start], inverse
+
+
+def _run_starts(sorted_keys: np.ndarray) -> np.ndarray:
+    """Boolean mask marking the first element of each run of equal keys."""
+    is_start = np.ones(len(sorted_keys), dtype=bool)
+    is_start[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    return is_start
+
+
+def _contains(sorted_keys: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Membership of query keys in sorted unique keys."""
+    return _lookup(sorted_keys, np.ones(len(sorted_keys), dtype=np.int64), queries) > 0
+
+
+def _lookup(sorted_keys: np.ndarray, values: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Look up values for query keys in sorted unique keys (0 if absent)."""
+    if len(sorted_keys) == 0 or len(queries) == 0:
+        return np.zeros(len(queries), dtype=np.int64)
+    pos = np.minimum(np.searchsorted(sorted_keys, queries), len(sorted_keys) - 1)
+    return np.where(sorted_keys[pos] == queries, values[pos], 0)
+
+
+def _count_missing(keys: np.ndarray, other: np.ndarray, doc_stride: int, num_docs: int) -> np.ndarray:
+    """Per-document count of unique keys that do not occur in other (both sorted)."""
+    missing = keys[~_contains(other, keys)]
+    # Key layout is doc * doc_stride + rest
+    return np.bincount(missing // doc_stride, minlength=num_docs)
+
+
+def _count_by_type(doc: np.ndarray, rel_type: np.ndarray, num_docs: int, num_types: int) -> np.ndarray:
+    """Count (doc, type) occurrences into a num_docs x num_types matrix."""
+    counts = np.bincount(doc * num_types + rel_type, minlength=num_docs * num_types)
+    return counts.reshape(num_docs, num_types)
+
+
+def _safe_div(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Elementwise division returning 0.0 where the denominator is not positive."""
+    out = np.zeros(len(numerator), dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def _f1(precision: np.ndarray, recall: np.ndarray) -> np.ndarray:
+    """Elementwise F1 from precision and recall arrays."""
+    return _safe_div(2 * (precision * recall), precision + recall)
+
+
+def _last_partial_gold(pred_rel, gold_rels):
+    """Return the gold relation the serial matcher reports for a partial match."""
+    found = None
+    for gold_rel in gold_rels:
+        same_entities = (
+            (pred_rel.head_id == gold_rel.head_id and pred_rel.tail_id == gold_rel.tail_id) or
+            (pred_rel.head_id == gold_rel.tail_id and pred_rel.tail_id == gold_rel.head_id)
+        )
+        if same_entities and gold_rel.type != pred_rel.relation_type:
+            found = gold_rel
+    return found
@@ -5,6 +5,7 @@ from .io_prompter import IOPrompter
 from .cot_prompter import ChainOfThoughtPrompter
 from .rag_prompter import RAGPrompter
 from .react_prompter import ReActPrompter
+from .few_shot_prompter import FewShotPrompter
 
 __all__ = [
     "LLMPrompter",
@@ -12,4 +13,5 @@ __all__ = [
     "ChainOfThoughtPrompter",
     "RAGPrompter",
     "ReActPrompter",
+    "FewShotPrompter",
 ]
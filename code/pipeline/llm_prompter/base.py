@@ -61,6 +61,19 @@ class LLMPrompter(ABC):
         """
         pass
     
+    def prepare(self, texts: List[str], doc_ids: Optional[List[str]] = None) -> None:
+        """
+        Optional pre-pass over all documents before they are prompted.
+        
+        Prompters override this to do batched setup work (e.g. embedding
+        retrieval queries) once instead of per document. Does nothing by default.
+        
+        Args:
+            texts: List of document texts
+            doc_ids: Optional list of document IDs
+        """
+        pass
+    
     @property
     @abstractmethod
     def name(self) -> str:
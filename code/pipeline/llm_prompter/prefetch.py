@@ -0,0 +1,121 @@
+"""Background construction of prompts ahead of generation."""
+
+import atexit
+import queue
+import threading
+from typing import Callable, List, Optional
+
+# Marks the end of the prefetched documents
+_DONE = object()
+
+
+class PromptPrefetcher:
+    """
+    Builds prompts on a background thread while earlier documents are generated.
+
+    start() is given the documents in the order they will be prompted; a
+    worker thread builds their prompts into a queue of at most lookahead
+    entries, so retrieval for the next documents overlaps the LLM request
+    of the current one without building far ahead. take() returns the
+    prompt of the next document. If documents are requested out of order,
+    or a prompt failed to build, it returns None and the caller builds the
+    prompt itself; after an out-of-order request the worker is stopped.
+    """
+
+    def __init__(self, build_prompt: Callable[[str, Optional[str]], str], lookahead: int = 2):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            build_prompt: Builds the prompt of (text, doc_id)
+            lookahead: Maximum number of built prompts waiting to be taken
+        """
+        self.build_prompt = build_prompt
+        self.lookahead = lookahead
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # Let a prompt being built finish before the interpreter shuts down
+        atexit.register(self.stop)
+
+    @property
+    def active(self) -> bool:
+        return self._queue is not None
+
+    def start(self, texts: List[str], doc_ids: Optional[List[Optional[str]]] = None) -> None:
+        """
+        Start building the prompts of documents, replacing any earlier run.
+
+        Args:
+            texts: Document texts, in the order they will be prompted
+            doc_ids: Document IDs (None for all if not given)
+        """
+        self.stop()
+        if doc_ids is None:
+            doc_ids = [None] * len(texts)
+        self._stop = threading.Event()
+        self._queue = queue.Queue(maxsize=max(self.lookahead, 1))
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(list(zip(texts, doc_ids)), self._queue, self._stop),
+            name="prompt-prefetch",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _run(self, documents, prompts: queue.Queue, stop: threading.Event) -> None:
+        """Worker: build prompts in order until done or stopped."""
+        for text, doc_id in documents:
+            if stop.is_set():
+                return
+            try:
+                prompt = self.build_prompt(text, doc_id)
+            except Exception:
+                prompt = None  # Rebuilt by the caller, which sees the error
+            if not self._put(prompts, stop, (doc_id, text, prompt)):
+                return
+        self._put(prompts, stop, _DONE)
+
+    @staticmethod
+    def _put(prompts: queue.Queue, stop: threading.Event, item) -> bool:
+        """Put an item once there is room; False if stopped first."""
+        while not stop.is_set():
+            try:
+                prompts.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def take(self, text: str, doc_id: Optional[str] = None) -> Optional[str]:
+        """
+        Prompt of the next document, waiting for it to be built.
+
+        Args:
+            text: Document text
+            doc_id: Document ID
+
+        Returns:
+            The prompt, or None if it must be built by the caller
+        """
+        if self._queue is None:
+            return None
+        item = self._queue.get()
+        if item is _DONE:
+            self.stop()
+            return None
+        item_doc_id, item_text, prompt = item
+        if item_doc_id != doc_id or item_text != text:
+            # Documents are prompted in another order than announced
+            self.stop()
+            return None
+        return prompt
+
+    def stop(self) -> None:
+        """Stop the worker and drop prompts not taken yet."""
+        self._stop.set()
+        if self._thread is not None:
+            # A prompt being built is finished before the worker exits
+            self._thread.join()
+        self._thread = None
+        self._queue = None
@@ -6,7 +6,17 @@ from typing import List, Optional
 
 from config import Config
 from .base import LLMPrompter
-from ..retrieval import VectorStore
+from .prefetch import PromptPrefetcher
+from ..retrieval import (
+    KnowledgeGraphRetriever,
+    PrecomputedRetrieval,
+    PubMedRetriever,
+    VectorStore,
+)
+
+
+# Where RAG context comes from: source passages, the gold relation graph, or both
+CONTEXT_SOURCES = ("passages", "graph", "both")
 
 
 class RAGPrompter(LLMPrompter):
@@ -20,6 +30,11 @@ class RAGPrompter(LLMPrompter):
         vector_store: Optional[VectorStore] = None,
         top_k: int = None,
         logger: Optional[logging.Logger] = None,
+        pubmed_retriever: Optional[PubMedRetriever] = None,
+        pubmed_top_k: Optional[int] = None,
+        graph_retriever: Optional[KnowledgeGraphRetriever] = None,
+        context_source: Optional[str] = None,
+        prefetch_depth: Optional[int] = None,
     ):
         """
         Initialize RAG Prompter.
@@ -28,44 +43,140 @@ class RAGPrompter(LLMPrompter):
             entity_map: Optional global entity map
             use_exact_spans: Whether to encourage exact text span extraction
             model: Model name/key (defaults to config default)
-            vector_store: Vector store instance (creates new one if None)
+            vector_store: Vector store instance (creates new one if None and
+                passages are a context source)
             top_k: Number of retrieved documents (defaults to config)
             logger: Optional logger instance
+            pubmed_retriever: Local PubMed retriever (created if None and
+                pubmed_top_k > 0)
+            pubmed_top_k: Number of related abstracts added to the prompt
+                (defaults to Config.RAG_PUBMED_TOP_K; 0 disables)
+            graph_retriever: Knowledge graph retriever (created if None and
+                the graph is a context source)
+            context_source: "passages" (vector store), "graph" (known
+                relations of the document's entities) or "both" (defaults
+                to Config.RAG_CONTEXT_SOURCE)
+            prefetch_depth: Prompts built ahead of generation by a background
+                thread after prepare() (defaults to Config.RAG_PREFETCH_DEPTH;
+                0 builds each prompt inline)
         """
         super().__init__(entity_map, use_exact_spans, logger)
         self.model = Config.get_model_name(model)
         self.api_key = Config.OPENROUTER_API_KEY
         self.base_url = Config.OPENROUTER_BASE_URL
         self.top_k = top_k or Config.RAG_TOP_K
+        self.context_source = context_source or Config.RAG_CONTEXT_SOURCE
+        if self.context_source not in CONTEXT_SOURCES:
+            raise ValueError(
+                f"Unknown context source: {self.context_source}. Must be one of {CONTEXT_SOURCES}"
+            )
         
         # Initialize or use provided vector store
-        if vector_store is None:
+        self.vector_store = vector_store
+        if self.vector_store is None and self.context_source != "graph":
             self.vector_store = VectorStore()
             # Load documents from source directory
             self.vector_store.add_documents_from_files(Config.RAG_SOURCE_DIR)
-        else:
-            self.vector_store = vector_store
+        # Passages ranked ahead of prompting by prepare()
+        self.precomputed = (
+            PrecomputedRetrieval(self.vector_store, self.top_k)
+            if self.vector_store is not None else None
+        )
+        
+        self.graph_retriever = graph_retriever
+        if self.graph_retriever is None and self.context_source != "passages":
+            self.graph_retriever = KnowledgeGraphRetriever()
+        
+        self.pubmed_top_k = Config.RAG_PUBMED_TOP_K if pubmed_top_k is None else pubmed_top_k
+        self.pubmed_retriever = pubmed_retriever
+        if self.pubmed_retriever is None and self.pubmed_top_k > 0:
+            self.pubmed_retriever = PubMedRetriever()
+        
+        prefetch_depth = Config.RAG_PREFETCH_DEPTH if prefetch_depth is None else prefetch_depth
+        self.prefetcher = (
+            PromptPrefetcher(self._build_prompt, prefetch_depth) if prefetch_depth > 0 else None
+        )
     
     @property
     def name(self) -> str:
         """Return technique name."""
         return "RAG"
     
-    def _retrieve_context(self, text: str) -> str:
+    def prepare(self, texts: List[str], doc_ids: Optional[List[str]] = None) -> None:
+        """
+        Retrieve the passages of all documents up front.
+        
+        Retrieval queries are embedded in batches and cached on disk, and
+        the passages of documents with IDs are ranked together and saved
+        (see PrecomputedRetrieval), so prompting neither embeds nor searches.
+        With prefetching enabled, a background thread then builds the
+        prompts of the documents, in order, ahead of get_response.
+        
+        Args:
+            texts: List of document texts, in the order they will be prompted
+            doc_ids: Optional list of document IDs
+        """
+        self._prepare_passages(texts, doc_ids)
+        if self.prefetcher is not None:
+            self.prefetcher.start(texts, doc_ids)
+    
+    def _prepare_passages(self, texts: List[str], doc_ids: Optional[List[str]]) -> None:
+        """Embed retrieval queries and precompute passage rankings."""
+        if self.vector_store is None:
+            return  # Graph retrieval needs no preparation
+        queries = [self.query_text(text) for text in texts]
+        if self.vector_store.search_mode != "bm25":
+            start_time = time.time()
+            try:
+                embedded = self.vector_store.embed_queries(queries)
+            except Exception as e:
+                if self.vector_store.search_mode != "hybrid":
+                    raise
+                # Hybrid retrieval falls back to BM25 for queries it cannot embed
+                self.logger.warning(f"[{self.name}] Failed to embed retrieval queries: {e}")
+                return
+            self.logger.info(
+                f"[{self.name}] Embedded {embedded} new retrieval queries "
+                f"({len(queries) - embedded} cached) in {time.time() - start_time:.2f} seconds"
+            )
+        
+        keyed = [(doc_id, query) for doc_id, query in zip(doc_ids or [], queries) if doc_id]
+        if not keyed:
+            return
+        start_time = time.time()
+        ranked = self.precomputed.compute(
+            [doc_id for doc_id, _ in keyed], [query for _, query in keyed]
+        )
+        self.logger.info(
+            f"[{self.name}] Precomputed retrieval for {ranked} documents "
+            f"({len(keyed) - ranked} saved) in {time.time() - start_time:.2f} seconds"
+        )
+    
+    @staticmethod
+    def query_text(text: str) -> str:
+        """Retrieval query for a document: its first 500 characters."""
+        return text[:500]
+    
+    def _retrieve_context(self, text: str, doc_id: Optional[str] = None) -> str:
         """
         Retrieve relevant context from vector store.
         
         Args:
             text: Document text to use as query
+            doc_id: Document ID, whose precomputed results are used if saved
             
         Returns:
             Retrieved context as formatted string
         """
         # Use first few sentences or a summary of the text as query
-        query = text[:500] if len(text) > 500 else text
+        query = self.query_text(text)
         
-        self.logger.debug(f"[{self.name}] Retrieving context with top_k={self.top_k}")
-        results = self.vector_store.search(query, top_k=self.top_k)
+        results = self.precomputed.get(doc_id, query) if doc_id else None
+        if results is None:
+            self.logger.debug(f"[{self.name}] Retrieving context with top_k={self.top_k}")
+            results = self.vector_store.search(query, top_k=self.top_k)
+        else:
+            self.logger.debug(f"[{self.name}] Using precomputed context")
         
         if not results:
             self.logger.debug(f"[{self.name}] No relevant context found")
@@ -76,17 +187,75 @@ class RAGPrompter(LLMPrompter):
         for i, result in enumerate(results, 1):
             similarity = result.get('similarity', 0.0)
             self.logger.debug(f"[{self.name}] Context {i}: similarity={similarity:.3f}")
+            source = f"Source: {result['filename']}, " if result.get('filename') else ""
+            # Results are passages bounded by Config.RAG_CHUNK_SIZE, so they are used whole
             context_parts.append(
-                f"[Context {i}] (Similarity: {similarity:.3f})\n"
-                f"{result.get('text', '')[:500]}...\n"
+                f"[Context {i}] ({source}Similarity: {similarity:.3f})\n"
+                f"{result.get('text', '')}\n"
             )
         
         return "\n".join(context_parts)
     
+    def _retrieve_literature(self, text: str, doc_id: Optional[str] = None) -> str:
+        """
+        Retrieve related abstracts from the local PubMed index.
+        
+        Args:
+            text: Document text to use as query
+            doc_id: Document ID (its PubMed ID), excluded from the results
+            
+        Returns:
+            Retrieved abstracts as formatted string ("" if disabled or none found)
+        """
+        if self.pubmed_retriever is None or self.pubmed_top_k <= 0:
+            return ""
+        results = self.pubmed_retriever.retrieve(
+            text, top_k=self.pubmed_top_k, exclude_ids=[doc_id] if doc_id else None
+        )
+        self.logger.debug(f"[{self.name}] Retrieved {len(results)} related abstracts")
+        return "\n".join(
+            f"[Abstract {i}] (PMID: {result['pmid']}, Score: {result['similarity']:.3f})\n"
+            f"{result['title']}\n{result['text']}\n"
+            for i, result in enumerate(results, 1)
+        )
+    
+    def _retrieve_graph_context(self, text: str, doc_id: Optional[str] = None) -> str:
+        """
+        Retrieve known relations of the document's entities from the knowledge graph.
+        
+        Args:
+            text: Document text whose entities are looked up
+            doc_id: Document ID, whose own annotations are left out
+            
+        Returns:
+            Retrieved relations as formatted string
+        """
+        results = self.graph_retriever.retrieve(
+            text, top_k=Config.RAG_GRAPH_TOP_K, exclude_ids=[doc_id] if doc_id else None
+        )
+        self.logger.debug(f"[{self.name}] Retrieved {len(results)} known relations")
+        if not results:
+            return "No known relations found."
+        return "\n".join(
+            f"- {result['text']} (seen in {result['support']} "
+            f"document{'s' if result['support'] != 1 else ''})"
+            for result in results
+        )
+    
     def _build_prompt(self, text: str, doc_id: Optional[str] = None) -> str:
         """Build the prompt for RAG prompting."""
         # Retrieve relevant context
-        context = self._retrieve_context(text)
+        context_parts = []
+        if self.context_source != "graph":
+            context_parts.append(self._retrieve_context(text, doc_id))
+        if self.context_source != "passages":
+            context_parts.append(
+                "Known relations between entities of this document and related entities, "
+                "from annotated training documents:\n"
+                + self._retrieve_graph_context(text, doc_id)
+            )
+        context = "\n\n".join(context_parts)
+        literature = self._retrieve_literature(text, doc_id)
         
         prompt = self._build_base_prompt(text, doc_id)
         
@@ -94,7 +263,15 @@ class RAGPrompter(LLMPrompter):
 {context}
 
 ---
+"""
+        if literature:
+            prompt += f"""
+Related Literature (PubMed abstracts):
+{literature}
 
+---
+"""
+        prompt += f"""
 Now extract all biomedical relations from the text above. The context provided above may help you understand the entities and relations better, but you must extract entity mentions as EXACT text spans from the original document text (not from the context).
 
 For each relation, identify:
@@ -130,7 +307,9 @@ IMPORTANT: Use EXACT text spans from the original document for entity mentions.
         self.logger.debug(f"[{self.name}] Document text length: {len(text)} characters")
         self.logger.debug(f"[{self.name}] Using model: {self.model}")
         
-        prompt = self._build_prompt(text, doc_id)
+        prompt = self.prefetcher.take(text, doc_id) if self.prefetcher is not None else None
+        if prompt is None:
+            prompt = self._build_prompt(text, doc_id)
         self.logger.debug(f"[{self.name}] Prompt length: {len(prompt)} characters")
         
         headers = {
@@ -177,7 +356,10 @@ IMPORTANT: Use EXACT text spans from the original document for entity mentions.
         self, texts: List[str], doc_ids: Optional[List[str]] = None
     ) -> List[str]:
         """
-        Get responses for multiple documents (sequential for now).
+        Get responses for multiple documents.
+        
+        Requests are sent one at a time; with prefetching enabled the
+        prompts of the next documents are built while they are in flight.
         
         Args:
             texts: List of document texts
@@ -189,8 +371,13 @@ IMPORTANT: Use EXACT text spans from the original document for entity mentions.
         if doc_ids is None:
             doc_ids = [None] * len(texts)
         
+        self.prepare(texts, doc_ids)
         responses = []
-        for text, doc_id in zip(texts, doc_ids):
-            responses.append(self.get_response(text, doc_id))
+        try:
+            for text, doc_id in zip(texts, doc_ids):
+                responses.append(self.get_response(text, doc_id))
+        finally:
+            if self.prefetcher is not None:
+                self.prefetcher.stop()
         
         return responses
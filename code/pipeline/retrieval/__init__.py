@@ -2,14 +2,50 @@
 
 from .base import Retriever
 from .vector_store import VectorStore
+from .precomputed import PrecomputedRetrieval
+from .ann_index import ANNIndex, IVFIndex, create_ann_index
+from .quantization import QuantizedIndex, Int8Index, PQIndex
+from .query_cache import QueryEmbeddingCache
+from .cache_manifest import CacheManifest, cache_namespace
+from .bm25 import BM25Index, reciprocal_rank_fusion
 from .embeddings import EmbeddingGenerator, compute_file_hash, compute_text_hash
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_backends import (
+    EmbeddingBackend,
+    APIEmbeddingBackend,
+    HashedNgramEmbeddingBackend,
+    create_embedding_backend,
+)
 from .pubmed_retriever import PubMedRetriever
+from .graph_retriever import KnowledgeGraphRetriever
+from .mentions import MentionLexicon
+from .demonstrations import DemonstrationIndex
 
 __all__ = [
     "Retriever",
     "VectorStore",
+    "PrecomputedRetrieval",
+    "ANNIndex",
+    "IVFIndex",
+    "create_ann_index",
+    "QuantizedIndex",
+    "Int8Index",
+    "PQIndex",
+    "QueryEmbeddingCache",
+    "CacheManifest",
+    "cache_namespace",
+    "BM25Index",
+    "reciprocal_rank_fusion",
     "EmbeddingGenerator",
+    "EmbeddingBatcher",
+    "EmbeddingBackend",
+    "APIEmbeddingBackend",
+    "HashedNgramEmbeddingBackend",
+    "create_embedding_backend",
     "compute_file_hash",
     "compute_text_hash",
     "PubMedRetriever",
+    "KnowledgeGraphRetriever",
+    "MentionLexicon",
+    "DemonstrationIndex",
 ]
@@ -0,0 +1,408 @@
+"""Approximate nearest-neighbour indexes over normalized embeddings."""
+
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+# Rows scored against the centroids at once when assigning vectors to lists
+_ASSIGN_CHUNK_ROWS = 16384
+
+
+class ANNIndex(ABC):
+    """
+    Abstract base class for approximate nearest-neighbour indexes.
+
+    Indexes do not own the vectors: they index the rows of the VectorStore
+    embedding matrix (unit-length float32) and read candidates from it at
+    search time. Rows are append-only, so indexes grow incrementally.
+    """
+
+    @property
+    @abstractmethod
+    def num_rows(self) -> int:
+        """Number of embedding rows covered by the index."""
+        pass
+
+    @abstractmethod
+    def is_ready(self, embeddings: np.ndarray) -> bool:
+        """
+        Whether the index can answer queries over the given matrix.
+
+        Args:
+            embeddings: Embedding matrix of the store
+
+        Returns:
+            True if the index is built and covers every row
+        """
+        pass
+
+    @abstractmethod
+    def update(self, embeddings: np.ndarray) -> None:
+        """
+        Bring the index up to date with the embedding matrix.
+
+        Indexes new rows appended since the last update, rebuilding from
+        scratch when needed.
+
+        Args:
+            embeddings: Embedding matrix of the store
+        """
+        pass
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Drop all indexed state."""
+        pass
+
+    @abstractmethod
+    def search(
+        self,
+        embeddings: np.ndarray,
+        query: np.ndarray,
+        top_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the rows most similar to a normalized query vector.
+
+        Args:
+            embeddings: Embedding matrix of the store
+            query: Unit-length float32 query vector
+            top_k: Number of rows to return
+
+        Returns:
+            Tuple of (row indices, similarities), best first
+        """
+        pass
+
+    @abstractmethod
+    def save(self, path: Path) -> None:
+        """Persist the index to a file."""
+        pass
+
+    @abstractmethod
+    def load(self, path: Path) -> None:
+        """Restore the index from a file written by save()."""
+        pass
+
+
+class IVFIndex(ANNIndex):
+    """
+    Inverted file index (IVF-flat) with spherical k-means centroids.
+
+    Every row is assigned to its most similar centroid. A query scores the
+    centroids, then scores exactly only the rows of the nprobe best lists;
+    raising nprobe trades speed for recall (nprobe == num_lists is exact).
+    """
+
+    def __init__(
+        self,
+        num_lists: Optional[int] = None,
+        nprobe: int = 16,
+        kmeans_iterations: int = 10,
+        retrain_factor: float = 4.0,
+        seed: int = 0
+    ):
+        """
+        Initialize an empty IVF index.
+
+        Args:
+            num_lists: Number of centroids (defaults to about 4 * sqrt(rows))
+            nprobe: Number of lists scanned per query
+            kmeans_iterations: Iterations of k-means when training
+            retrain_factor: Retrain once the index holds this many times the
+                rows it was trained on, as centroids drift out of date
+            seed: Random seed for centroid initialization
+        """
+        self.num_lists = num_lists
+        self.nprobe = nprobe
+        self.kmeans_iterations = kmeans_iterations
+        self.retrain_factor = retrain_factor
+        self.seed = seed
+
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.empty(0, dtype=np.int32)
+        self.trained_rows = 0
+
+        # Rows grouped by list (CSR layout), rebuilt lazily after updates
+        self._list_rows: Optional[np.ndarray] = None
+        self._list_offsets: Optional[np.ndarray] = None
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.assignments)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def is_ready(self, embeddings: np.ndarray) -> bool:
+        return self.is_trained and self.num_rows == len(embeddings)
+
+    def update(self, embeddings: np.ndarray) -> None:
+        if len(embeddings) == 0:
+            self.reset()
+            return
+
+        if (
+            not self.is_trained
+            or self.num_rows > len(embeddings)
+            or self.centroids.shape[1] != embeddings.shape[1]
+            or len(embeddings) > self.retrain_factor * self.trained_rows
+        ):
+            self.train(embeddings)
+        elif self.num_rows < len(embeddings):
+            new_assignments = nearest_centroids(embeddings[self.num_rows:], self.centroids)
+            self.assignments = np.concatenate([self.assignments, new_assignments])
+            self._list_rows = None
+
+    def reset(self) -> None:
+        """Drop centroids and assignments."""
+        self.centroids = None
+        self.assignments = np.empty(0, dtype=np.int32)
+        self.trained_rows = 0
+        self._list_rows = None
+        self._list_offsets = None
+
+    def train(self, embeddings: np.ndarray) -> None:
+        """
+        Train centroids on the matrix and assign all of its rows.
+
+        Args:
+            embeddings: Embedding matrix of the store
+        """
+        num_rows = len(embeddings)
+        num_lists = self.num_lists or max(1, int(4 * np.sqrt(num_rows)))
+        num_lists = min(num_lists, num_rows)
+        rng = np.random.default_rng(self.seed)
+
+        # A sample of ~40 rows per list is enough for stable centroids
+        sample_size = min(num_rows, num_lists * 40)
+        sample_rows = np.sort(rng.choice(num_rows, size=sample_size, replace=False))
+        sample = np.asarray(embeddings[sample_rows], dtype=np.float32)
+
+        self.centroids = kmeans(sample, num_lists, self.kmeans_iterations, rng, spherical=True)
+        self.assignments = nearest_centroids(embeddings, self.centroids)
+        self.trained_rows = num_rows
+        self._list_rows = None
+
+    def search(
+        self,
+        embeddings: np.ndarray,
+        query: np.ndarray,
+        top_k: int,
+        nprobe: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the rows most similar to a normalized query vector.
+
+        Args:
+            embeddings: Embedding matrix of the store
+            query: Unit-length float32 query vector
+            top_k: Number of rows to return
+            nprobe: Lists to scan (defaults to self.nprobe)
+
+        Returns:
+            Tuple of (row indices, similarities), best first
+        """
+        if self._list_rows is None:
+            self._build_lists()
+
+        probe = top_k_indices(self.centroids @ query, nprobe or self.nprobe)
+        candidates = np.concatenate([
+            self._list_rows[self._list_offsets[i]:self._list_offsets[i + 1]]
+            for i in probe.tolist()
+        ])
+        # Ascending row order keeps reads from the memory-mapped matrix sequential
+        candidates.sort()
+
+        scores = embeddings[candidates] @ query
+        best = top_k_indices(scores, top_k)
+        return candidates[best], scores[best]
+
+    def _build_lists(self) -> None:
+        """Group row indices by list."""
+        self._list_rows = np.argsort(self.assignments, kind='stable')
+        counts = np.bincount(self.assignments, minlength=len(self.centroids))
+        self._list_offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def save(self, path: Path) -> None:
+        if not self.is_trained:
+            if path.exists():
+                path.unlink()
+            return
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp_path,
+            centroids=self.centroids,
+            assignments=self.assignments,
+            trained_rows=self.trained_rows,
+        )
+        os.replace(tmp_path, path)
+
+    def load(self, path: Path) -> None:
+        """
+        Load centroids and assignments saved with save().
+
+        Search and training parameters are taken from this instance.
+
+        Args:
+            path: File written by save()
+        """
+        with np.load(path) as data:
+            self.centroids = data["centroids"]
+            self.assignments = data["assignments"]
+            self.trained_rows = int(data["trained_rows"])
+        self._list_rows = None
+
+
+ANN_INDEX_TYPES = ("none", "ivf", "int8", "pq")
+
+
+def create_ann_index(index_type: str, nprobe: int = 16) -> Optional[ANNIndex]:
+    """
+    Create an ANN index by name.
+
+    Args:
+        index_type: "none" (exact search), "ivf", "int8" or "pq"
+        nprobe: Lists scanned per query (IVF)
+
+    Returns:
+        ANNIndex instance, or None for exact search
+    """
+    # Imported here: the quantized indexes build on this module
+    from .quantization import Int8Index, PQIndex
+
+    if index_type == "none":
+        return None
+    if index_type == "ivf":
+        return IVFIndex(nprobe=nprobe)
+    if index_type == "int8":
+        return Int8Index()
+    if index_type == "pq":
+        return PQIndex()
+    raise ValueError(f"Unknown ANN index type: {index_type}. Must be one of {ANN_INDEX_TYPES}")
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Indices of the top_k highest scores, best first.
+
+    Uses argpartition so only the selected candidates are sorted.
+
+    Args:
+        scores: 1D array of scores
+        top_k: Number of indices to return
+
+    Returns:
+        Array of at most top_k indices
+    """
+    if top_k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if top_k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def top_k_per_row(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Column indices of the top_k highest scores of every row, best first.
+
+    Args:
+        scores: 2D array of scores
+        top_k: Number of indices per row
+
+    Returns:
+        Array of shape (rows, min(top_k, columns))
+    """
+    top_k = min(top_k, scores.shape[1])
+    if top_k <= 0:
+        return np.empty((len(scores), 0), dtype=np.intp)
+    if top_k < scores.shape[1]:
+        candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def kmeans(
+    sample: np.ndarray,
+    num_clusters: int,
+    iterations: int,
+    rng: np.random.Generator,
+    spherical: bool = True
+) -> np.ndarray:
+    """
+    Lloyd's k-means on a float32 sample.
+
+    Args:
+        sample: 2D array of training vectors
+        num_clusters: Number of centroids (at most len(sample))
+        iterations: Number of assignment/update rounds
+        rng: Random generator for initialization and empty-cluster reseeding
+        spherical: Use cosine similarity and unit-length centroids instead
+            of Euclidean distance
+
+    Returns:
+        float32 array of centroids, shape (num_clusters, dim)
+    """
+    sample_size = len(sample)
+    centroids = sample[rng.choice(sample_size, size=num_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        labels = nearest_centroids(sample, centroids, euclidean=not spherical)
+        counts = np.bincount(labels, minlength=num_clusters)
+
+        # Per-cluster sums via one sort + reduceat (much faster than np.add.at)
+        order = np.argsort(labels, kind='stable')
+        present = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts[present])[:-1]])
+        sums = np.zeros_like(centroids)
+        sums[present] = np.add.reduceat(sample[order], starts, axis=0)
+
+        if spherical:
+            centroids = sums
+        else:
+            centroids = sums / np.maximum(counts, 1)[:, None]
+
+        # Re-seed empty clusters with random sample rows
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = sample[rng.choice(sample_size, size=len(empty), replace=False)]
+
+        if spherical:
+            centroids = centroids / (np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-10)
+        centroids = centroids.astype(np.float32)
+    return centroids
+
+
+def nearest_centroids(
+    matrix: np.ndarray,
+    centroids: np.ndarray,
+    euclidean: bool = False
+) -> np.ndarray:
+    """
+    Index of the nearest centroid for every row, computed in chunks.
+
+    Args:
+        matrix: 2D array of vectors (may be memory-mapped)
+        centroids: 2D float32 array of centroids
+        euclidean: Minimize Euclidean distance instead of maximizing the dot product
+
+    Returns:
+        int32 array of centroid indices
+    """
+    # argmin |x - c|^2 == argmax (x . c - |c|^2 / 2)
+    bias = -0.5 * np.einsum('ij,ij->i', centroids, centroids) if euclidean else None
+    labels = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), _ASSIGN_CHUNK_ROWS):
+        chunk = np.asarray(matrix[start:start + _ASSIGN_CHUNK_ROWS], dtype=np.float32)
+        scores = chunk @ centroids.T
+        if bias is not None:
+            scores += bias
+        labels[start:start + len(chunk)] = np.argmax(scores, axis=1)
+    return labels
@@ -0,0 +1,230 @@
+"""Lexical retrieval: BM25 over an inverted index, and rank fusion."""
+
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .ann_index import top_k_indices
+
+
+# Words, numbers and compounds such as "il-6", "tnf-alpha" or "5-ht2a"
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-/.][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase index terms.
+
+    Compound tokens (gene symbols, chemical names) are kept whole so they
+    match exactly, and their parts are added as well.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms, with repetitions
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(part for part in re.split(r"[-/.]", token) if part)
+    return terms
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index in CSR layout.
+
+    Postings for term t are rows[offsets[t]:offsets[t + 1]] with term
+    frequencies tfs[...] in the same positions. Like the ANN indexes it
+    indexes rows of the VectorStore embedding matrix, one text per row,
+    and grows by appending rows.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize an empty BM25 index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization (0 = none, 1 = full)
+        """
+        self.k1 = k1
+        self.b = b
+        self.reset()
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.doc_lengths)
+
+    def reset(self) -> None:
+        """Drop all indexed rows."""
+        self.terms: List[str] = []
+        self.term_ids: Dict[str, int] = {}
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.rows = np.empty(0, dtype=np.int32)
+        self.tfs = np.empty(0, dtype=np.float32)
+        self.doc_lengths = np.empty(0, dtype=np.float32)
+        self._length_norm = np.empty(0, dtype=np.float32)
+
+    def update(self, texts: Sequence[str]) -> None:
+        """
+        Index texts as the next rows.
+
+        Args:
+            texts: Text of each new row, in row order
+        """
+        self.update_terms([tokenize(text) for text in texts])
+
+    def update_terms(self, term_lists: Sequence[Sequence[str]]) -> None:
+        """
+        Index pre-tokenized rows (e.g. entity identifiers) as the next rows.
+
+        Args:
+            term_lists: Terms of each new row, with repetitions, in row order
+        """
+        if not term_lists:
+            return
+        new_terms: List[int] = []
+        new_rows: List[int] = []
+        new_tfs: List[int] = []
+        lengths: List[int] = []
+        for row, terms in enumerate(term_lists, self.num_rows):
+            counts = Counter(terms)
+            lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                term_id = self.term_ids.get(term)
+                if term_id is None:
+                    term_id = self.term_ids[term] = len(self.terms)
+                    self.terms.append(term)
+                new_terms.append(term_id)
+                new_rows.append(row)
+                new_tfs.append(count)
+
+        # Merge into the CSR arrays; the stable sort keeps each posting list in row order
+        old_terms = np.repeat(np.arange(len(self.offsets) - 1), np.diff(self.offsets))
+        all_terms = np.concatenate([old_terms, np.asarray(new_terms, dtype=np.int64)])
+        order = np.argsort(all_terms, kind='stable')
+        self.rows = np.concatenate([self.rows, np.asarray(new_rows, dtype=np.int32)])[order]
+        self.tfs = np.concatenate([self.tfs, np.asarray(new_tfs, dtype=np.float32)])[order]
+        counts = np.bincount(all_terms, minlength=len(self.terms))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.doc_lengths = np.concatenate([self.doc_lengths, np.asarray(lengths, dtype=np.float32)])
+        self._update_length_norm()
+
+    def _update_length_norm(self) -> None:
+        """Precompute k1 * (1 - b + b * length / average length) per row."""
+        average = self.doc_lengths.mean() if self.num_rows else 0.0
+        if average > 0:
+            self._length_norm = (
+                self.k1 * (1 - self.b + self.b * self.doc_lengths / average)
+            ).astype(np.float32)
+        else:
+            self._length_norm = np.full(self.num_rows, self.k1, dtype=np.float32)
+
+    def search(self, query: str, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the rows with the highest BM25 score for a query.
+
+        Args:
+            query: Query text
+            top_k: Number of rows to return
+
+        Returns:
+            Tuple of (row indices, scores), best first; rows sharing no term
+            with the query are never returned
+        """
+        scores = self.score_terms(tokenize(query))
+        candidates = np.flatnonzero(scores > 0)
+        best = candidates[top_k_indices(scores[candidates], top_k)]
+        return best, scores[best]
+
+    def score_terms(self, terms: Sequence[str]) -> np.ndarray:
+        """
+        BM25 score of every row for a query given as terms.
+
+        Args:
+            terms: Query terms (unknown terms are ignored)
+
+        Returns:
+            Scores, one per row (0 for rows sharing no term with the query)
+        """
+        num_rows = self.num_rows
+        scores = np.zeros(num_rows, dtype=np.float32)
+        term_ids = {self.term_ids[term] for term in terms if term in self.term_ids}
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            rows = self.rows[start:end]
+            tfs = self.tfs[start:end]
+            doc_freq = end - start
+            idf = np.log1p((num_rows - doc_freq + 0.5) / (doc_freq + 0.5))
+            # Rows are unique within a posting list, so fancy-index += is safe
+            scores[rows] += idf * tfs * (self.k1 + 1) / (tfs + self._length_norm[rows])
+        return scores
+
+    def save(self, path: Path) -> None:
+        """Persist the index, replacing the old file atomically."""
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp_path,
+            terms=np.array(self.terms, dtype=np.str_),
+            offsets=self.offsets,
+            rows=self.rows,
+            tfs=self.tfs,
+            doc_lengths=self.doc_lengths,
+        )
+        os.replace(tmp_path, path)
+
+    def load(self, path: Path) -> None:
+        """
+        Restore the index from a file written by save().
+
+        Args:
+            path: File written by save()
+        """
+        with np.load(path) as data:
+            self.terms = data["terms"].tolist()
+            self.offsets = data["offsets"]
+            self.rows = data["rows"]
+            self.tfs = data["tfs"]
+            self.doc_lengths = data["doc_lengths"]
+        self.term_ids = {term: term_id for term_id, term in enumerate(self.terms)}
+        self._update_length_norm()
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[np.ndarray],
+    top_k: int,
+    k: int = 60
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fuse rankings of rows with reciprocal rank fusion.
+
+    Each row scores sum(1 / (k + rank)) over the rankings it appears in
+    (rank starting at 1), so raw scores on different scales never need to
+    be compared.
+
+    Args:
+        rankings: Arrays of row indices, best first
+        top_k: Number of rows to return
+        k: Rank offset; larger values flatten the contribution of top ranks
+
+    Returns:
+        Tuple of (row indices, fused scores), best first
+    """
+    rankings = [ranking for ranking in rankings if len(ranking)]
+    if not rankings:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+    rows = np.concatenate(rankings)
+    contributions = np.concatenate([
+        1.0 / (k + np.arange(1, len(ranking) + 1)) for ranking in rankings
+    ])
+    unique_rows, inverse = np.unique(rows, return_inverse=True)
+    fused = np.bincount(inverse, weights=contributions)
+    best = top_k_indices(fused, top_k)
+    return unique_rows[best], fused[best]
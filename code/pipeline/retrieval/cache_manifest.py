@@ -0,0 +1,133 @@
+"""Manifest of the embedding cache namespaces."""
+
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .storage import FileLock
+
+
+# Bump when the layout of a namespace directory changes incompatibly
+CACHE_FORMAT_VERSION = 1
+
+
+def cache_namespace(
+    model: str,
+    dimensions: Optional[int],
+    chunk_size: int,
+    chunk_overlap: int
+) -> str:
+    """
+    Directory name of the cache for one embedding and chunking configuration.
+
+    Args:
+        model: Embedding model name
+        dimensions: Requested embedding dimensions (None for the model default)
+        chunk_size: Passage size in characters
+        chunk_overlap: Passage overlap in characters
+
+    Returns:
+        Namespace name, e.g. "text-embedding-3-small-dauto-c1000-o200"
+    """
+    dims = dimensions if dimensions else "auto"
+    return f"{model_key(model)}-d{dims}-c{chunk_size}-o{chunk_overlap}"
+
+
+def model_key(model: str, dimensions: Optional[int] = None) -> str:
+    """
+    File-system safe key of an embedding model and its output dimensions.
+
+    Args:
+        model: Embedding model name
+        dimensions: Requested embedding dimensions (None for the model default)
+
+    Returns:
+        Key string
+    """
+    key = re.sub(r"[^A-Za-z0-9_.-]+", "_", model)
+    return f"{key}-{dimensions}d" if dimensions else key
+
+
+class CacheManifest:
+    """
+    manifest.json at the root of the embedding cache.
+
+    Records, for every namespace directory, the configuration its vectors
+    were produced with, the actual vector dimension and when it was last
+    used. The manifest describes the cache; the namespace directories are
+    authoritative for their own contents.
+
+    Processes sharing the cache update the manifest under a lock, reloading
+    it first, so concurrent registrations are not lost.
+    """
+
+    def __init__(self, root: Path):
+        """
+        Load the manifest of a cache directory.
+
+        Args:
+            root: Root directory of the embedding cache
+        """
+        self.path = root / "manifest.json"
+        # Also held while a namespace directory is created or adopted
+        self.lock = FileLock(root / "manifest.lock")
+        self.namespaces: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """Read the manifest from disk, if present."""
+        self.namespaces = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_FORMAT_VERSION:
+                    self.namespaces = data.get("namespaces", {})
+                else:
+                    print(f"Warning: Ignoring embedding cache manifest version {data.get('version')}")
+            except Exception as e:
+                print(f"Warning: Failed to load embedding cache manifest: {e}")
+
+    def register(self, namespace: str, **info: Any) -> Dict[str, Any]:
+        """
+        Create or update the entry of a namespace and save the manifest.
+
+        Args:
+            namespace: Namespace name
+            **info: Fields to set (e.g. model, dim, chunk_size)
+
+        Returns:
+            The updated entry
+        """
+        with self.lock:
+            self._load()
+            now = datetime.now().isoformat(timespec="seconds")
+            entry = self.namespaces.setdefault(namespace, {"created": now})
+            entry.update(info)
+            entry["last_used"] = now
+            self.save()
+        return entry
+
+    def remove(self, namespace: str) -> None:
+        """
+        Drop the entry of a namespace and save the manifest.
+
+        Args:
+            namespace: Namespace name
+        """
+        with self.lock:
+            self._load()
+            if self.namespaces.pop(namespace, None) is not None:
+                self.save()
+
+    def save(self) -> None:
+        """Write the manifest, replacing the old file atomically."""
+        tmp_path = self.path.with_suffix(".tmp.json")
+        with open(tmp_path, 'w') as f:
+            json.dump(
+                {"version": CACHE_FORMAT_VERSION, "namespaces": self.namespaces}, f, indent=2
+            )
+        os.replace(tmp_path, self.path)
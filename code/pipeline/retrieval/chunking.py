@@ -0,0 +1,109 @@
+"""Split source texts into overlapping passages for embedding."""
+
+import re
+from typing import List, Tuple
+
+
+# Preferred split points, strongest first: paragraph breaks, line breaks,
+# sentence ends, then any whitespace
+_BREAK_PATTERNS = [
+    re.compile(r"\n\s*\n"),
+    re.compile(r"\n"),
+    re.compile(r"(?<=[.!?])\s+"),
+    re.compile(r"\s+"),
+]
+
+
+def chunk_text(text: str, chunk_size: int, overlap: int = 0) -> List[Tuple[int, int]]:
+    """
+    Split text into passages of at most chunk_size characters.
+
+    The text is first cut into segments at natural boundaries (paragraphs,
+    then lines, sentences and words, falling back to hard cuts only for
+    unbroken runs longer than chunk_size). Segments are packed greedily into
+    passages, and each passage repeats the trailing segments of the previous
+    one, up to overlap characters. Because passage boundaries follow the
+    segments, an edit usually changes only the passages around it and the
+    rest keep their exact text.
+
+    Args:
+        text: Text to split
+        chunk_size: Maximum passage length in characters
+        overlap: Maximum characters shared by consecutive passages
+
+    Returns:
+        List of (start, end) character offsets into text, in order
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    overlap = max(0, min(overlap, chunk_size // 2))
+    if not text.strip():
+        return []
+
+    segments = _split_segments(text, 0, len(text), chunk_size, 0)
+    chunks: List[Tuple[int, int]] = []
+    first = 0
+    while first < len(segments):
+        # Pack as many whole segments as fit
+        last = first
+        while last + 1 < len(segments) and segments[last + 1][1] - segments[first][0] <= chunk_size:
+            last += 1
+        chunks.append((segments[first][0], segments[last][1]))
+        if last + 1 == len(segments):
+            break
+
+        # Start the next passage with the trailing segments that fit in overlap
+        next_first = last + 1
+        while next_first - 1 > first and segments[last][1] - segments[next_first - 1][0] <= overlap:
+            next_first -= 1
+        # The overlap must leave room for at least one new segment
+        while (
+            next_first <= last
+            and segments[last + 1][1] - segments[next_first][0] > chunk_size
+        ):
+            next_first += 1
+        first = next_first
+
+    # Once surrounding whitespace is stripped, drop passages that are empty or
+    # nested in a neighbour
+    spans: List[Tuple[int, int]] = []
+    for start, end in chunks:
+        start, end = _strip_span(text, start, end)
+        if start == end or (spans and end <= spans[-1][1]):
+            continue
+        if spans and start <= spans[-1][0]:
+            spans[-1] = (start, end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def _split_segments(
+    text: str,
+    start: int,
+    end: int,
+    chunk_size: int,
+    level: int
+) -> List[Tuple[int, int]]:
+    """Recursively split text[start:end] into segments no longer than chunk_size."""
+    if end - start <= chunk_size:
+        return [(start, end)]
+    if level == len(_BREAK_PATTERNS):
+        return [(i, min(i + chunk_size, end)) for i in range(start, end, chunk_size)]
+
+    # Segments end right after a break, so they tile the text without gaps
+    cuts = [match.end() for match in _BREAK_PATTERNS[level].finditer(text, start, end)]
+    bounds = [start] + [cut for cut in cuts if start < cut < end] + [end]
+    segments = []
+    for seg_start, seg_end in zip(bounds, bounds[1:]):
+        segments.extend(_split_segments(text, seg_start, seg_end, chunk_size, level + 1))
+    return segments
+
+
+def _strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Shrink a span so it neither starts nor ends with whitespace."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
@@ -0,0 +1,420 @@
+"""Index of annotated training documents used as few-shot demonstrations."""
+
+import hashlib
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from config import Config
+from .base import Retriever
+from .bm25 import BM25Index, tokenize
+from .cache_manifest import model_key
+from .embedding_batcher import EmbeddingBatcher, estimate_tokens
+from .embeddings import EmbeddingGenerator, compute_text_hash
+from .query_cache import QueryEmbeddingCache
+from .storage import FileLock, append_jsonl, read_jsonl, repair_jsonl_tail, write_array_atomic, write_jsonl
+from ..data.loader import DatasetLoader
+from ..types import Document, GoldRelations
+
+
+# How demonstrations are compared with a document: BM25 over their text,
+# or cosine similarity of embeddings
+DEMONSTRATION_METHODS = ("bm25", "dense")
+
+# Bump when the layout of the index directory changes incompatibly
+DEMONSTRATION_INDEX_VERSION = 1
+
+
+class DemonstrationIndex(Retriever):
+    """
+    Annotated training documents, selected per input as few-shot demonstrations.
+
+    Every document of the split with at least one gold relation becomes a
+    demonstration: its text and its relations in the answer format of the
+    prompts (head and tail as the entity's most frequent mention). The
+    index lives on disk in index_dir:
+
+    - demonstrations.jsonl: one demonstration per line, with its estimated
+      token count
+    - bm25.npz or vectors.npy: precomputed postings or unit-length
+      embeddings of the texts
+    - sources.json: method, embedding model and a digest of the source
+      files; the index is rebuilt when any of them changes
+    - selections.jsonl: demonstrations chosen per (document, k, token
+      budget), so a document's selection is computed once
+    """
+
+    def __init__(
+        self,
+        method: Optional[str] = None,
+        index_dir: Optional[Path] = None,
+        clean_text_path: Optional[Path] = None,
+        gold_relations_path: Optional[Path] = None,
+        split: str = "train"
+    ):
+        """
+        Load the index, building it if it is missing or stale.
+
+        Args:
+            method: "bm25" (lexical, offline) or "dense" (embeddings); defaults
+                to Config.FEW_SHOT_METHOD
+            index_dir: Directory for the index (defaults to Config.DEMONSTRATION_INDEX_DIR)
+            clean_text_path: Path to clean_text directory (defaults to config)
+            gold_relations_path: Path to gold_relations directory (defaults to config)
+            split: Split the demonstrations are taken from
+        """
+        self.method = method or Config.FEW_SHOT_METHOD
+        if self.method not in DEMONSTRATION_METHODS:
+            raise ValueError(
+                f"Unknown demonstration method: {self.method}. Must be one of {DEMONSTRATION_METHODS}"
+            )
+        self.index_dir = index_dir or Config.DEMONSTRATION_INDEX_DIR
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.loader = DatasetLoader(
+            clean_text_path or Config.CLEAN_TEXT_PATH,
+            gold_relations_path or Config.GOLD_RELATIONS_PATH,
+        )
+        self.split = split
+
+        self.demonstrations_file = self.index_dir / "demonstrations.jsonl"
+        self.bm25_file = self.index_dir / "bm25.npz"
+        self.vectors_file = self.index_dir / "vectors.npy"
+        self.sources_file = self.index_dir / "sources.json"
+        self.selections_file = self.index_dir / "selections.jsonl"
+        # Demonstrations given to add_documents, indexed with the split
+        self.added_file = self.index_dir / "added.jsonl"
+        # Serializes appends of processes sharing the index
+        self.lock = FileLock(self.index_dir / "lock")
+
+        self.embedding_generator = None
+        self.query_cache = None
+        if self.method == "dense":
+            self.embedding_generator = EmbeddingGenerator()
+            self.query_cache = QueryEmbeddingCache(
+                self.index_dir / "query_cache",
+                model_key(self.embedding_generator.model, self.embedding_generator.dimensions),
+            )
+
+        self.demonstrations: List[Dict[str, Any]] = []
+        self.bm25_index = BM25Index()
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self._row_by_id: Dict[str, int] = {}
+        # Selection key -> chosen doc_ids
+        self._selections: Dict[str, List[str]] = {}
+
+        if not self._load():
+            self.build()
+
+    def __len__(self) -> int:
+        return len(self.demonstrations)
+
+    def _source_files(self) -> List[Path]:
+        """Text and gold relation files of the split."""
+        files = []
+        for split_dir in (
+            self.loader.document_loader.clean_text_path / _TEXT_DIRS[self.split],
+            self.loader.gold_relations_loader.gold_relations_path / self.split,
+        ):
+            if split_dir.exists():
+                files.extend(path for path in sorted(split_dir.iterdir()) if path.is_file())
+        if self.added_file.exists():
+            files.append(self.added_file)
+        return files
+
+    def _signature(self) -> Dict[str, Any]:
+        """Settings and source files the index is built from."""
+        digest = hashlib.sha256()
+        for path in self._source_files():
+            stat = path.stat()
+            digest.update(f"{path}|{stat.st_size}|{stat.st_mtime_ns}\n".encode("utf-8"))
+        model = None
+        if self.embedding_generator is not None:
+            model = model_key(self.embedding_generator.model, self.embedding_generator.dimensions)
+        return {
+            "version": DEMONSTRATION_INDEX_VERSION,
+            "split": self.split,
+            "method": self.method,
+            "model": model,
+            "sources": digest.hexdigest(),
+        }
+
+    def _load(self) -> bool:
+        """
+        Load the index if it is current.
+
+        Returns:
+            True if loaded, False if it must be rebuilt
+        """
+        if not self.sources_file.exists():
+            return False
+        try:
+            with open(self.sources_file, 'r') as f:
+                if json.load(f) != self._signature():
+                    return False
+            self.demonstrations = read_jsonl(self.demonstrations_file)
+            if self.method == "bm25":
+                self.bm25_index.load(self.bm25_file)
+            else:
+                self.vectors = np.load(self.vectors_file)
+        except Exception as e:
+            print(f"Warning: Failed to load demonstration index, rebuilding: {e}")
+            return False
+        self._row_by_id = {demo["doc_id"]: row for row, demo in enumerate(self.demonstrations)}
+        if self.selections_file.exists():
+            self._selections = {
+                record["key"]: record["doc_ids"] for record in read_jsonl(self.selections_file)
+            }
+        return True
+
+    def build(self) -> None:
+        """Rebuild the index from the split and the added demonstrations."""
+        # Without sources.json the index counts as stale until the build completes
+        if self.sources_file.exists():
+            self.sources_file.unlink()
+        signature = self._signature()
+        documents, gold_relations = self.loader.load(self.split)
+        self.demonstrations = [
+            _demonstration(doc, gold) for doc, gold in zip(documents, gold_relations)
+            if gold.relations
+        ]
+        if self.added_file.exists():
+            self.demonstrations.extend(read_jsonl(self.added_file))
+        print(f"Building demonstration index from {len(self.demonstrations)} annotated documents...")
+
+        texts = [demo["text"] for demo in self.demonstrations]
+        if self.method == "bm25":
+            self.bm25_index.reset()
+            self.bm25_index.update(texts)
+            self.bm25_index.save(self.bm25_file)
+        else:
+            batcher = EmbeddingBatcher(self.embedding_generator)
+            self.vectors = _unit_rows(batcher.embed(texts)) if texts else np.zeros((0, 0), np.float32)
+            write_array_atomic(self.vectors_file, self.vectors)
+
+        write_jsonl(self.demonstrations_file, self.demonstrations)
+        # Selections refer to the old demonstrations
+        if self.selections_file.exists():
+            self.selections_file.unlink()
+        self._selections = {}
+        self._row_by_id = {demo["doc_id"]: row for row, demo in enumerate(self.demonstrations)}
+        tmp_path = self.sources_file.with_suffix(".tmp.json")
+        with open(tmp_path, 'w') as f:
+            json.dump(signature, f)
+        os.replace(tmp_path, self.sources_file)
+
+    def _scores(self, texts: List[str]) -> np.ndarray:
+        """Similarity of every text to every demonstration, shape (texts, demonstrations)."""
+        if not self.demonstrations:
+            return np.zeros((len(texts), 0), dtype=np.float32)
+        if self.method == "bm25":
+            return np.stack([self.bm25_index.score_terms(tokenize(text)) for text in texts])
+        missing = self.query_cache.missing(texts)
+        if missing:
+            batcher = EmbeddingBatcher(self.embedding_generator)
+            batcher.embed(
+                missing,
+                on_batch=lambda batch, embeddings: self.query_cache.put(batch, _unit_rows(embeddings)),
+            )
+        queries = np.stack([self.query_cache.get(text) for text in texts])
+        return queries @ self.vectors.T
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        exclude_ids: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve the demonstrations most similar to a text.
+
+        Args:
+            query: Document text
+            top_k: Number of demonstrations
+            exclude_ids: Document IDs never returned (e.g. the document itself)
+
+        Returns:
+            Demonstrations ({"doc_id", "text", "relations", "tokens"}) with a
+            'similarity' field, best first
+        """
+        scores = self._scores([query])[0]
+        excluded = set(exclude_ids or ())
+        results = []
+        for row in np.argsort(-scores, kind='stable').tolist():
+            if len(results) >= top_k:
+                break
+            if self.demonstrations[row]["doc_id"] not in excluded:
+                results.append(dict(self.demonstrations[row], similarity=float(scores[row])))
+        return results
+
+    def select(
+        self,
+        text: str,
+        doc_id: Optional[str] = None,
+        k: Optional[int] = None,
+        token_budget: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Choose the demonstrations for one document (see select_batch).
+
+        Args:
+            text: Document text
+            doc_id: Document ID, never chosen as its own demonstration
+            k: Maximum number of demonstrations (defaults to Config.FEW_SHOT_K)
+            token_budget: Maximum estimated tokens of the chosen demonstrations
+                (defaults to Config.FEW_SHOT_TOKEN_BUDGET)
+
+        Returns:
+            Demonstrations, most similar first
+        """
+        return self.select_batch([text], [doc_id], k, token_budget)[0]
+
+    def select_batch(
+        self,
+        texts: Sequence[str],
+        doc_ids: Optional[Sequence[Optional[str]]] = None,
+        k: Optional[int] = None,
+        token_budget: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Choose the demonstrations of many documents.
+
+        Candidates are taken in order of similarity and kept while they fit
+        the remaining token budget, until k are chosen. Selections are saved,
+        so only documents not seen before (with these k and budget) are scored,
+        all at once.
+
+        Args:
+            texts: Document texts
+            doc_ids: Document IDs, never chosen as their own demonstration
+            k: Maximum number of demonstrations per document (defaults to Config.FEW_SHOT_K)
+            token_budget: Maximum estimated tokens of one document's demonstrations
+                (defaults to Config.FEW_SHOT_TOKEN_BUDGET)
+
+        Returns:
+            Demonstrations per document, most similar first
+        """
+        k = Config.FEW_SHOT_K if k is None else k
+        token_budget = Config.FEW_SHOT_TOKEN_BUDGET if token_budget is None else token_budget
+        if doc_ids is None:
+            doc_ids = [None] * len(texts)
+        keys = [
+            f"{doc_id or ''}|{compute_text_hash(text)}|{k}|{token_budget}"
+            for text, doc_id in zip(texts, doc_ids)
+        ]
+
+        missing = [position for position, key in enumerate(keys) if key not in self._selections]
+        if missing:
+            scores = self._scores([texts[position] for position in missing])
+            records = []
+            for position, row_scores in zip(missing, scores):
+                chosen = self._choose(row_scores, doc_ids[position], k, token_budget)
+                self._selections[keys[position]] = chosen
+                records.append({"key": keys[position], "doc_ids": chosen})
+            with self.lock:
+                repair_jsonl_tail(self.selections_file)
+                append_jsonl(self.selections_file, records)
+
+        return [
+            [self.demonstrations[self._row_by_id[demo_id]] for demo_id in self._selections[key]]
+            for key in keys
+        ]
+
+    def _choose(
+        self,
+        scores: np.ndarray,
+        doc_id: Optional[str],
+        k: int,
+        token_budget: int
+    ) -> List[str]:
+        """Doc IDs of the most similar demonstrations that fit the budget."""
+        chosen = []
+        remaining = token_budget
+        for row in np.argsort(-scores, kind='stable').tolist():
+            if len(chosen) >= k or remaining <= 0:
+                break
+            demo = self.demonstrations[row]
+            if demo["doc_id"] == doc_id or demo["tokens"] > remaining:
+                continue
+            if self.method == "bm25" and scores[row] <= 0:
+                break  # No shared terms with the rest either
+            chosen.append(demo["doc_id"])
+            remaining -= demo["tokens"]
+        return chosen
+
+    def add_documents(self, documents: List[Dict[str, Any]]) -> None:
+        """
+        Add demonstrations and rebuild the index.
+
+        Args:
+            documents: Documents with "doc_id", "text" and "relations"
+                ([{"head_mention", "tail_mention", "relation_type"}])
+        """
+        with self.lock:
+            repair_jsonl_tail(self.added_file)
+            append_jsonl(self.added_file, (
+                {
+                    "doc_id": str(doc["doc_id"]),
+                    "text": doc["text"],
+                    "relations": doc["relations"],
+                    "tokens": estimate_tokens(_demonstration_text(doc["text"], doc["relations"])),
+                }
+                for doc in documents
+            ))
+        self.build()
+
+
+def format_demonstration(demonstration: Dict[str, Any]) -> str:
+    """
+    Render a demonstration for a prompt.
+
+    Args:
+        demonstration: Demonstration from select or retrieve
+
+    Returns:
+        The text followed by its relations as a JSON array
+    """
+    return _demonstration_text(demonstration["text"], demonstration["relations"])
+
+
+# Directory of each split under clean_text (see DocumentLoader)
+_TEXT_DIRS = {"dev": "devtexts", "test": "testtexts", "train": "trainingtexts"}
+
+
+def _demonstration(doc: Document, gold: GoldRelations) -> Dict[str, Any]:
+    """Demonstration of an annotated document."""
+    # Entities are named by their most frequent mention in the document
+    names = {}
+    for entity in gold.entities:
+        mentions = Counter(mention.text for mention in entity.mentions)
+        if mentions:
+            names[entity.id] = mentions.most_common(1)[0][0]
+    relations = []
+    seen = set()
+    for relation in gold.relations:
+        head, tail = names.get(relation.head_id), names.get(relation.tail_id)
+        key = (head, tail, relation.type)
+        if head and tail and key not in seen:
+            seen.add(key)
+            relations.append({"head_mention": head, "tail_mention": tail, "relation_type": relation.type})
+    return {
+        "doc_id": doc.doc_id,
+        "text": doc.text,
+        "relations": relations,
+        "tokens": estimate_tokens(_demonstration_text(doc.text, relations)),
+    }
+
+
+def _demonstration_text(text: str, relations: List[Dict[str, str]]) -> str:
+    """A demonstration as shown in prompts."""
+    return f"Text:\n{text}\n\nRelations:\n{json.dumps(relations, indent=2)}\n"
+
+
+def _unit_rows(embeddings) -> np.ndarray:
+    """Embeddings as unit-length float32 rows."""
+    matrix = np.asarray(embeddings, dtype=np.float64)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return (matrix / np.where(norms > 0, norms, 1.0)).astype(np.float32)
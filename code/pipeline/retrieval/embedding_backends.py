@@ -0,0 +1,247 @@
+"""Embedding backends: remote embedding APIs and a local offline model."""
+
+import re
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence
+
+import numpy as np
+import requests
+from openai import OpenAI
+
+from config import Config
+
+
+class EmbeddingBackend(ABC):
+    """
+    Abstract base class for embedding backends.
+
+    A backend turns texts into fixed-size vectors. Its model name and
+    dimensions identify the vector space, so embeddings cached for one
+    backend are never mixed with another's (see cache_namespace).
+    """
+
+    @property
+    @abstractmethod
+    def model(self) -> str:
+        """Model name identifying the vector space."""
+        pass
+
+    @property
+    @abstractmethod
+    def dimensions(self) -> Optional[int]:
+        """Requested output dimensions (None for the model default)."""
+        pass
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One embedding vector per text, in order
+        """
+        pass
+
+
+class APIEmbeddingBackend(EmbeddingBackend):
+    """
+    Embeddings from the OpenAI API, or OpenRouter's OpenAI-compatible API.
+
+    The provider is fixed when the backend is created. Request errors are
+    raised to the caller (EmbeddingBatcher retries, rate-limits and splits
+    failed batches) rather than switching providers.
+    """
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        use_openrouter: bool = False,
+        dimensions: Optional[int] = None
+    ):
+        """
+        Initialize the API backend.
+
+        Args:
+            model: Embedding model name (defaults to config)
+            use_openrouter: Whether to use OpenRouter API (if False, uses OpenAI directly)
+            dimensions: Output dimensions for models that support shortening
+                (defaults to config; None keeps the model default)
+        """
+        self._model = model or Config.RAG_EMBEDDING_MODEL
+        self._dimensions = dimensions or Config.RAG_EMBEDDING_DIMENSIONS
+        self.use_openrouter = use_openrouter
+        self.api_key = Config.OPENROUTER_API_KEY
+
+        self.client = None
+        if not use_openrouter:
+            # OpenAI directly: OPENROUTER_API_KEY must hold an OpenAI key
+            self.client = OpenAI(api_key=self.api_key)
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    @property
+    def dimensions(self) -> Optional[int]:
+        return self._dimensions
+
+    def _dimensions_option(self) -> dict:
+        """Request option for the output dimensions, if configured."""
+        return {"dimensions": self._dimensions} if self._dimensions else {}
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if self.use_openrouter:
+            return self._embed_openrouter(texts)
+        return self._embed_openai(texts)
+
+    def _embed_openai(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings using OpenAI client."""
+        response = self.client.embeddings.create(
+            model=self._model,
+            input=texts,
+            **self._dimensions_option()
+        )
+        return [item.embedding for item in response.data]
+
+    def _embed_openrouter(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings using OpenRouter API."""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+        payload = {
+            "model": f"openai/{self._model}",  # OpenRouter format
+            "input": texts,
+            **self._dimensions_option()
+        }
+
+        try:
+            response = requests.post(
+                "https://openrouter.ai/api/v1/embeddings",
+                headers=headers,
+                json=payload,
+                timeout=60
+            )
+            response.raise_for_status()
+            result = response.json()
+            return [item["embedding"] for item in result["data"]]
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate embeddings: {e}")
+
+
+class HashedNgramEmbeddingBackend(EmbeddingBackend):
+    """
+    Local embeddings from hashed character n-grams (no network, no model files).
+
+    Every character n-gram of the lowercased, whitespace-normalized text is
+    hashed to one of `dimensions` buckets with a random sign (the hashing
+    trick), weighted by sublinear term frequency 1 + log(tf). Texts sharing
+    words, word pieces or identifiers therefore get similar vectors.
+
+    The mapping is fixed and needs no fitting, so vectors never go stale as
+    the corpus grows; corpus-level term weighting is left to BM25 (see
+    bm25.py), which hybrid search combines with these vectors.
+    """
+
+    def __init__(
+        self,
+        dimensions: Optional[int] = None,
+        ngram_range: Sequence[int] = (3, 5)
+    ):
+        """
+        Initialize the local backend.
+
+        Args:
+            dimensions: Output dimensions (defaults to config, else 1024)
+            ngram_range: Smallest and largest n-gram length in characters
+        """
+        self._dimensions = dimensions or Config.RAG_EMBEDDING_DIMENSIONS or 1024
+        self.min_n, self.max_n = ngram_range
+
+    @property
+    def model(self) -> str:
+        return f"local-hashed-ngram-{self.min_n}-{self.max_n}"
+
+    @property
+    def dimensions(self) -> Optional[int]:
+        return self._dimensions
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed_one(text).tolist() for text in texts]
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        """Hashed n-gram vector of one text."""
+        normalized = " " + re.sub(r"\s+", " ", text.lower()).strip() + " "
+        data = np.frombuffer(normalized.encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+
+        hashes = []
+        for n in range(self.min_n, self.max_n + 1):
+            if len(data) < n:
+                break
+            # Polynomial hash of every n-byte window, wrapping modulo 2**64
+            window_hash = np.full(len(data) - n + 1, n, dtype=np.uint64)
+            for i in range(n):
+                window_hash = window_hash * _HASH_MULTIPLIER + data[i:len(data) - n + 1 + i]
+            hashes.append(window_hash)
+        vector = np.zeros(self._dimensions, dtype=np.float64)
+        if not hashes:
+            return vector
+
+        ngram_hashes, counts = np.unique(np.concatenate(hashes), return_counts=True)
+        mixed = _mix64(ngram_hashes)
+        buckets = (mixed % np.uint64(self._dimensions)).astype(np.intp)
+        signs = np.where(mixed >> np.uint64(63), -1.0, 1.0)
+        weights = signs * (1.0 + np.log(counts))
+        vector += np.bincount(buckets, weights=weights, minlength=self._dimensions)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+
+# Odd 64-bit constants for hashing (from splitmix64 / FNV)
+_HASH_MULTIPLIER = np.uint64(0x100000001B3)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: spread hash bits so buckets and signs are independent."""
+    values = values ^ (values >> np.uint64(30))
+    values = values * _MIX_1
+    values = values ^ (values >> np.uint64(27))
+    values = values * _MIX_2
+    return values ^ (values >> np.uint64(31))
+
+
+EMBEDDING_BACKENDS = ("openai", "openrouter", "local")
+
+
+def create_embedding_backend(
+    backend: str,
+    model: Optional[str] = None,
+    use_openrouter: bool = False,
+    dimensions: Optional[int] = None
+) -> EmbeddingBackend:
+    """
+    Create an embedding backend by name.
+
+    Args:
+        backend: "openai" (OpenAI API), "openrouter" (OpenRouter API) or
+            "local" (hashed n-grams, offline)
+        model: Embedding model name (API backends)
+        use_openrouter: Whether the "openai" backend uses OpenRouter API instead
+        dimensions: Output dimensions
+
+    Returns:
+        EmbeddingBackend instance
+    """
+    if backend == "openai":
+        return APIEmbeddingBackend(model, use_openrouter, dimensions)
+    if backend == "openrouter":
+        return APIEmbeddingBackend(model, True, dimensions)
+    if backend == "local":
+        return HashedNgramEmbeddingBackend(dimensions)
+    raise ValueError(f"Unknown embedding backend: {backend}. Must be one of {EMBEDDING_BACKENDS}")
@@ -0,0 +1,243 @@
+"""Concurrent, rate-limited embedding of many texts in size-limited batches."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from config import Config
+
+
+# Conservative characters-per-token ratio: biomedical text (gene symbols,
+# chemical names, numbers) tokenizes denser than everyday English
+_CHARS_PER_TOKEN = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Upper estimate of the number of tokens in a text.
+
+    Args:
+        text: Text to estimate
+
+    Returns:
+        Estimated token count
+    """
+    return len(text) // _CHARS_PER_TOKEN + 1
+
+
+def batch_texts(texts: List[str], max_items: int, max_tokens: int) -> Iterator[List[int]]:
+    """
+    Split texts into batches limited by count and estimated tokens.
+
+    A single text over max_tokens forms a batch of its own.
+
+    Args:
+        texts: Texts to split, in order
+        max_items: Maximum number of texts per batch
+        max_tokens: Maximum estimated tokens per batch
+
+    Yields:
+        Consecutive lists of positions into texts
+    """
+    batch: List[int] = []
+    batch_tokens = 0
+    for position, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if batch and (len(batch) >= max_items or batch_tokens + tokens > max_tokens):
+            yield batch
+            batch = []
+            batch_tokens = 0
+        batch.append(position)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+class RateLimiter:
+    """Spaces calls evenly so at most requests_per_minute start per minute."""
+
+    def __init__(self, requests_per_minute: Optional[float]):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            requests_per_minute: Allowed request rate (None or 0 = unlimited)
+        """
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until the next request may start."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+# Callback receiving each completed batch: (texts, embeddings)
+BatchCallback = Callable[[List[str], List[List[float]]], None]
+
+
+class EmbeddingBatcher:
+    """
+    Embed many texts with concurrent, rate-limited batch requests.
+
+    Texts are split into batches by item count and estimated tokens, and
+    the batches are sent from a thread pool, no faster than the configured
+    request rate. A failed batch is retried with exponential backoff; if it
+    keeps failing it is split in half and each half is retried on its own,
+    so one bad input or an oversized request only loses itself.
+
+    Completed batches are handed to a callback as soon as they arrive, in
+    the calling thread, so callers can persist them before the remaining
+    batches finish. Batches that still fail are reported after all others
+    have completed.
+    """
+
+    def __init__(
+        self,
+        embedding_generator,
+        max_items: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        workers: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        retry_delay: float = 1.0
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            embedding_generator: EmbeddingGenerator used for the requests
+            max_items: Maximum texts per request (defaults to config)
+            max_tokens: Maximum estimated tokens per request (defaults to config)
+            workers: Concurrent requests (defaults to config)
+            requests_per_minute: Request rate limit (defaults to config; None = unlimited)
+            max_retries: Retries of a failed batch before it is split (defaults to config)
+            retry_delay: Delay before the first retry in seconds, doubled on each retry
+        """
+        self.embedding_generator = embedding_generator
+        self.max_items = max_items or Config.RAG_EMBEDDING_BATCH_SIZE
+        self.max_tokens = max_tokens or Config.RAG_EMBEDDING_BATCH_MAX_TOKENS
+        self.workers = workers or Config.RAG_EMBEDDING_WORKERS
+        self.rate_limiter = RateLimiter(
+            requests_per_minute if requests_per_minute is not None
+            else Config.RAG_EMBEDDING_REQUESTS_PER_MINUTE
+        )
+        self.max_retries = max_retries if max_retries is not None else Config.RAG_EMBEDDING_MAX_RETRIES
+        self.retry_delay = retry_delay
+
+    def embed(
+        self,
+        texts: List[str],
+        on_batch: Optional[BatchCallback] = None
+    ) -> List[List[float]]:
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+            on_batch: Called with (texts, embeddings) of every completed batch,
+                in completion order
+
+        Returns:
+            One embedding vector per text, in order
+
+        Raises:
+            RuntimeError: If some texts could not be embedded; all other
+                batches have completed (and been passed to on_batch) by then
+        """
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        failures: List[Tuple[List[int], Exception]] = []
+        batches = list(batch_texts(texts, self.max_items, self.max_tokens))
+        if not batches:
+            return []
+
+        def run(positions: List[int]):
+            return self._embed_batch([texts[position] for position in positions], positions)
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as executor:
+            futures = [executor.submit(run, positions) for positions in batches]
+            for future in as_completed(futures):
+                completed, failed = future.result()
+                failures.extend(failed)
+                for positions, batch_embeddings in completed:
+                    for position, embedding in zip(positions, batch_embeddings):
+                        embeddings[position] = embedding
+                    if on_batch is not None:
+                        on_batch([texts[position] for position in positions], batch_embeddings)
+
+        if failures:
+            num_failed = sum(len(positions) for positions, _ in failures)
+            raise RuntimeError(
+                f"Failed to embed {num_failed} of {len(texts)} texts: {failures[0][1]}"
+            )
+        return embeddings
+
+    def _embed_batch(self, batch: List[str], positions: List[int]):
+        """
+        Embed one batch with retries, splitting it in half if it keeps failing.
+
+        Halves that fail are split again, so a bad input is isolated in
+        log2(batch size) steps. If both halves fail the cause is not one
+        input (the API is down, say), and the batch is given up instead.
+
+        Returns:
+            Tuple of (completed, failed): completed is a list of (positions,
+            embeddings), failed a list of (positions, last error)
+        """
+        result, error = self._request(batch)
+        if result is not None:
+            return [(positions, result)], []
+        return self._split_failed(batch, positions, error)
+
+    def _split_failed(self, batch: List[str], positions: List[int], error: Exception):
+        """Retry the halves of a batch that failed with error (see _embed_batch)."""
+        if len(batch) == 1:
+            return [], [(positions, error)]
+
+        print(f"Warning: Embedding batch of {len(batch)} texts failed, retrying in halves: {error}")
+        middle = len(batch) // 2
+        halves = [(batch[:middle], positions[:middle]), (batch[middle:], positions[middle:])]
+        results = [self._request(half) for half, _ in halves]
+        if all(half_result is None for half_result, _ in results):
+            return [], [(positions, results[-1][1])]
+
+        completed, failed = [], []
+        for (half, half_positions), (half_result, half_error) in zip(halves, results):
+            if half_result is not None:
+                completed.append((half_positions, half_result))
+            else:
+                half_completed, half_failed = self._split_failed(half, half_positions, half_error)
+                completed.extend(half_completed)
+                failed.extend(half_failed)
+        return completed, failed
+
+    def _request(self, batch: List[str]) -> Tuple[Optional[List[List[float]]], Optional[Exception]]:
+        """
+        Send one embedding request, retrying with exponential backoff.
+
+        Returns:
+            Tuple of (embeddings, None) on success, or (None, last error)
+        """
+        error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+            self.rate_limiter.acquire()
+            try:
+                result = self.embedding_generator.generate_embeddings_batch(batch)
+                if len(result) != len(batch):
+                    raise RuntimeError(
+                        f"Got {len(result)} embeddings for a batch of {len(batch)} texts"
+                    )
+                return result, None
+            except Exception as e:
+                error = e
+        return None, error
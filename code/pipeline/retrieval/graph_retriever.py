@@ -0,0 +1,286 @@
+"""Retriever over the entity graph of gold relations."""
+
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from config import Config
+from .base import Retriever
+from .mentions import MentionLexicon
+from ..data.loader import GoldRelationsLoader
+from ..types import GoldRelations
+
+
+class KnowledgeGraphRetriever(Retriever):
+    """
+    Retriever over the relations annotated in a gold split (train by default).
+
+    Every distinct (head_id, relation_type, tail_id) triple is an edge,
+    supported by the documents annotating it. The graph is held in CSR
+    arrays: the edges incident to entity e are
+    adjacency[adjacency_offsets[e]:adjacency_offsets[e + 1]], most
+    supported first, and the edges of document d are
+    doc_edges[doc_offsets[d]:doc_offsets[d + 1]], so a document's own
+    annotations can be left out at query time.
+
+    Entities are found in text with a lexicon of the annotated mentions.
+    """
+
+    def __init__(
+        self,
+        gold_relations: Optional[Sequence[GoldRelations]] = None,
+        gold_relations_path: Optional[Path] = None,
+        split: str = "train"
+    ):
+        """
+        Build the graph.
+
+        Args:
+            gold_relations: Gold relations to index (loaded from the split if None)
+            gold_relations_path: Path to gold_relations directory (defaults to config)
+            split: Split loaded when gold_relations is None
+        """
+        self._documents: List[Dict[str, Any]] = []
+        if gold_relations is None:
+            loader = GoldRelationsLoader(gold_relations_path or Config.GOLD_RELATIONS_PATH)
+            gold_relations = loader.load(split)
+        self.add_documents([_gold_to_dict(gold) for gold in gold_relations])
+
+    def add_documents(self, documents: List[Dict[str, Any]]) -> None:
+        """
+        Add annotated documents and rebuild the graph.
+
+        Args:
+            documents: Documents in the gold relations JSON format: "doc_id",
+                "entities" ([{"id", "type", "mentions": [{"text"}, ...]}]) and
+                "relations" ([{"head_id", "tail_id", "type"}])
+        """
+        self._documents.extend(documents)
+        self._build()
+
+    def _build(self) -> None:
+        """Build the entity, edge and adjacency arrays from the documents."""
+        entity_ids: Dict[str, int] = {}
+        entity_types: Dict[str, Counter] = {}
+        entity_names: Dict[str, Counter] = {}
+        mention_pairs = []
+        relation_types: Dict[str, int] = {}
+        edge_ids: Dict[tuple, int] = {}
+        doc_edge_lists: List[List[int]] = []
+
+        def entity_index(entity_id: str) -> int:
+            return entity_ids.setdefault(entity_id, len(entity_ids))
+
+        for doc in self._documents:
+            for entity in doc.get("entities", []):
+                entity_index(entity["id"])
+                entity_types.setdefault(entity["id"], Counter())[entity.get("type", "")] += 1
+                for mention in entity.get("mentions", []):
+                    entity_names.setdefault(entity["id"], Counter())[mention["text"]] += 1
+                    mention_pairs.append((mention["text"], entity["id"]))
+            edges = set()
+            for relation in doc.get("relations", []):
+                key = (
+                    entity_index(relation["head_id"]),
+                    relation_types.setdefault(relation["type"], len(relation_types)),
+                    entity_index(relation["tail_id"]),
+                )
+                edges.add(edge_ids.setdefault(key, len(edge_ids)))
+            doc_edge_lists.append(sorted(edges))
+
+        self.entity_ids = list(entity_ids)
+        self._entity_index = entity_ids
+        self.entity_types = [
+            entity_types[entity].most_common(1)[0][0] if entity in entity_types else ""
+            for entity in self.entity_ids
+        ]
+        # Canonical name: the most frequent mention text
+        self.entity_names = [
+            entity_names[entity].most_common(1)[0][0] if entity in entity_names else entity
+            for entity in self.entity_ids
+        ]
+        self.relation_types = list(relation_types)
+        self.lexicon = MentionLexicon.build(mention_pairs)
+
+        triples = np.array(list(edge_ids), dtype=np.int32).reshape(-1, 3)
+        self.edge_heads, self.edge_types, self.edge_tails = triples[:, 0], triples[:, 1], triples[:, 2]
+        self.doc_ids = [str(doc.get("doc_id", "")) for doc in self._documents]
+        self._doc_index = {doc_id: index for index, doc_id in enumerate(self.doc_ids)}
+        self.doc_offsets = np.concatenate(
+            [[0], np.cumsum([len(edges) for edges in doc_edge_lists])]
+        ).astype(np.int64)
+        self.doc_edges = np.array(
+            [edge for edges in doc_edge_lists for edge in edges], dtype=np.int32
+        )
+        self.edge_support = np.bincount(self.doc_edges, minlength=len(triples)).astype(np.int32)
+
+        # Both endpoints list the edge (once for self-loops), most supported first
+        num_entities = len(self.entity_ids)
+        edges = np.arange(len(triples), dtype=np.int32)
+        loops = self.edge_heads == self.edge_tails
+        endpoints = np.concatenate([self.edge_heads, self.edge_tails[~loops]])
+        incident = np.concatenate([edges, edges[~loops]])
+        order = np.lexsort((-self.edge_support[incident], endpoints))
+        self.adjacency = incident[order]
+        self.adjacency_offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(endpoints, minlength=num_entities))]
+        ).astype(np.int64)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edge_support)
+
+    def find_entities(self, text: str) -> List[str]:
+        """
+        Identifiers of the graph entities mentioned in a text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Entity identifiers, in order of first mention
+        """
+        return [entity for entity in self.lexicon.find(text) if entity in self._entity_index]
+
+    def _support(self, edges: np.ndarray, exclude_ids: Optional[Iterable[str]]) -> np.ndarray:
+        """Support of edges, not counting the excluded documents."""
+        support = self.edge_support[edges]
+        for doc_id in exclude_ids or ():
+            doc = self._doc_index.get(doc_id)
+            if doc is not None:
+                own_edges = self.doc_edges[self.doc_offsets[doc]:self.doc_offsets[doc + 1]]
+                support = support - np.isin(edges, own_edges)
+        return support
+
+    def _incident_edges(self, entities: Sequence[str]) -> np.ndarray:
+        """Unique edges incident to any of the entities."""
+        rows = [self._entity_index[entity] for entity in entities if entity in self._entity_index]
+        if not rows:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate([
+            self.adjacency[self.adjacency_offsets[row]:self.adjacency_offsets[row + 1]]
+            for row in rows
+        ]))
+
+    def neighbours(
+        self,
+        entity_id: str,
+        exclude_ids: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Entities related to an entity.
+
+        Args:
+            entity_id: Entity identifier
+            exclude_ids: Document IDs whose annotations are left out
+
+        Returns:
+            List of {"id", "name", "type", "relation_type", "direction"
+            ("out" if entity_id is the head), "support"}, most supported first
+        """
+        row = self._entity_index.get(entity_id)
+        if row is None:
+            return []
+        edges = self.adjacency[self.adjacency_offsets[row]:self.adjacency_offsets[row + 1]]
+        support = self._support(edges, exclude_ids)
+        results = []
+        for edge, count in zip(edges.tolist(), support.tolist()):
+            if count <= 0:
+                continue
+            outgoing = self.edge_heads[edge] == row
+            other = int(self.edge_tails[edge] if outgoing else self.edge_heads[edge])
+            results.append({
+                "id": self.entity_ids[other],
+                "name": self.entity_names[other],
+                "type": self.entity_types[other],
+                "relation_type": self.relation_types[self.edge_types[edge]],
+                "direction": "out" if outgoing else "in",
+                "support": count,
+            })
+        results.sort(key=lambda result: -result["support"])
+        return results
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        entity_ids: Optional[Iterable[str]] = None,
+        exclude_ids: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve known relations of the entities mentioned in a query.
+
+        Relations between two entities of the query rank first (they may
+        hold in the query document too), then relations to neighbours
+        outside it; ties are broken by support.
+
+        Args:
+            query: Text whose entities are looked up (e.g. the document)
+            top_k: Number of relations to return
+            entity_ids: Entity identifiers to use in addition to those
+                mentioned in the query
+            exclude_ids: Document IDs whose annotations are left out (e.g.
+                the document being processed, when it is in the graph)
+
+        Returns:
+            List of relations ({"head_id", "head_name", "relation_type",
+            "tail_id", "tail_name", "support", "text", "similarity"}), best first
+        """
+        entities = self.find_entities(query) + [
+            entity for entity in entity_ids or () if entity in self._entity_index
+        ]
+        edges = self._incident_edges(entities)
+        if not len(edges):
+            return []
+        support = self._support(edges, exclude_ids)
+        rows = np.array([self._entity_index[entity] for entity in entities], dtype=np.int32)
+        inside = (
+            np.isin(self.edge_heads[edges], rows).astype(np.int32)
+            + np.isin(self.edge_tails[edges], rows).astype(np.int32)
+        )
+        keep = support > 0
+        edges, support, inside = edges[keep], support[keep], inside[keep]
+        order = np.lexsort((-support, -inside))[:top_k]
+
+        results = []
+        for edge, count, shared in zip(
+            edges[order].tolist(), support[order].tolist(), inside[order].tolist()
+        ):
+            head, tail = int(self.edge_heads[edge]), int(self.edge_tails[edge])
+            relation_type = self.relation_types[self.edge_types[edge]]
+            results.append({
+                "head_id": self.entity_ids[head],
+                "head_name": self.entity_names[head],
+                "relation_type": relation_type,
+                "tail_id": self.entity_ids[tail],
+                "tail_name": self.entity_names[tail],
+                "support": count,
+                "text": (
+                    f"{self.entity_names[head]} ({self.entity_ids[head]}) --{relation_type}--> "
+                    f"{self.entity_names[tail]} ({self.entity_ids[tail]})"
+                ),
+                # Query entities on the edge, then support, squashed below 1
+                "similarity": shared + count / (count + 1),
+            })
+        return results
+
+
+def _gold_to_dict(gold: GoldRelations) -> Dict[str, Any]:
+    """Gold relations in the JSON format accepted by add_documents."""
+    return {
+        "doc_id": gold.doc_id,
+        "entities": [
+            {
+                "id": entity.id,
+                "type": entity.type,
+                "mentions": [{"text": mention.text} for mention in entity.mentions],
+            }
+            for entity in gold.entities
+        ],
+        "relations": [
+            {"head_id": relation.head_id, "tail_id": relation.tail_id, "type": relation.type}
+            for relation in gold.relations
+        ],
+    }
@@ -0,0 +1,99 @@
+"""Dictionary matching of annotated entity mentions in free text."""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+
+# Mentions are matched on normalized word sequences
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def normalize_mention(text: str) -> str:
+    """Lowercase words of a mention, joined by single spaces."""
+    return " ".join(_WORD_PATTERN.findall(text.lower()))
+
+
+class MentionLexicon:
+    """
+    Maps mention texts to entity identifiers and finds them in text.
+
+    Built from annotated (mention text, identifier) pairs; a mention seen
+    with several identifiers resolves to its most frequent one. Matching
+    is greedy longest-first over word n-grams, so "sodium iodide
+    symporter" wins over "iodide".
+    """
+
+    def __init__(self, mentions: Dict[str, str] = None, min_chars: int = 3):
+        """
+        Initialize the lexicon.
+
+        Args:
+            mentions: Normalized mention -> entity identifier (see to_dict)
+            min_chars: Shorter normalized mentions are ignored (too ambiguous)
+        """
+        self.min_chars = min_chars
+        self.mentions: Dict[str, str] = {}
+        # First word -> word count of the longest mention starting with it
+        self._max_words: Dict[str, int] = {}
+        if mentions:
+            self._set(mentions)
+
+    @classmethod
+    def build(cls, pairs: Iterable[Tuple[str, str]], min_chars: int = 3) -> "MentionLexicon":
+        """
+        Build a lexicon from annotations.
+
+        Args:
+            pairs: (mention text, entity identifier) pairs, with repetitions
+            min_chars: Shorter normalized mentions are ignored
+
+        Returns:
+            MentionLexicon
+        """
+        counts: Dict[str, Counter] = {}
+        for text, entity_id in pairs:
+            mention = normalize_mention(text)
+            if len(mention) >= min_chars and entity_id:
+                counts.setdefault(mention, Counter())[entity_id] += 1
+        lexicon = cls(min_chars=min_chars)
+        lexicon._set({mention: ids.most_common(1)[0][0] for mention, ids in counts.items()})
+        return lexicon
+
+    def _set(self, mentions: Dict[str, str]) -> None:
+        self.mentions = dict(mentions)
+        self._max_words = {}
+        for mention in self.mentions:
+            words = mention.split(" ")
+            self._max_words[words[0]] = max(self._max_words.get(words[0], 0), len(words))
+
+    def __len__(self) -> int:
+        return len(self.mentions)
+
+    def find(self, text: str) -> List[str]:
+        """
+        Identifiers of the entities mentioned in a text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Entity identifiers, in order of first mention
+        """
+        words = _WORD_PATTERN.findall(text.lower())
+        found: Dict[str, None] = {}
+        start = 0
+        while start < len(words):
+            length = min(self._max_words.get(words[start], 0), len(words) - start)
+            while length > 0:
+                entity_id = self.mentions.get(" ".join(words[start:start + length]))
+                if entity_id is not None:
+                    found.setdefault(entity_id)
+                    break
+                length -= 1
+            start += max(length, 1)
+        return list(found)
+
+    def to_dict(self) -> Dict[str, str]:
+        """Normalized mention -> entity identifier, for persistence."""
+        return self.mentions
@@ -0,0 +1,156 @@
+"""Retrieval results computed ahead of prompting."""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import Config
+from .embeddings import compute_text_hash
+from .storage import append_jsonl, read_jsonl, repair_jsonl_tail
+from .vector_store import SEARCH_MODES, VectorStore
+
+
+class PrecomputedRetrieval:
+    """
+    Top-k retrieval results of a whole split, computed in batch and kept on disk.
+
+    compute() ranks the queries of many documents at once with
+    VectorStore.search_rows (one blocked matrix product per batch in dense
+    mode) and saves the ranked rows of each document to
+    <namespace dir>/contexts/<mode>-k<top_k>-<version>.jsonl, one
+    {"doc_id", "query_hash", "rows", "scores"} record per document. The
+    version identifies the store contents and search settings, so a file
+    is never read after the store changes; older files are deleted on the
+    next compute(). get() turns a saved entry into the results search()
+    would return, without searching.
+    """
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        top_k: Optional[int] = None,
+        mode: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ):
+        """
+        Initialize precomputed retrieval.
+
+        Args:
+            vector_store: Store searched
+            top_k: Number of results per document (defaults to Config.RAG_TOP_K)
+            mode: Search mode (defaults to the store's search mode)
+            batch_size: Queries ranked together (defaults to Config.RAG_PRECOMPUTE_BATCH_SIZE)
+        """
+        self.vector_store = vector_store
+        self.top_k = top_k or Config.RAG_TOP_K
+        self.mode = mode or vector_store.search_mode
+        if self.mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {self.mode}. Must be one of {SEARCH_MODES}")
+        self.batch_size = batch_size or Config.RAG_PRECOMPUTE_BATCH_SIZE
+        self.contexts_dir = vector_store.embeddings_dir / "contexts"
+
+        # doc_id -> saved record, for the version below
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._version: Optional[str] = None
+
+    @property
+    def version(self) -> str:
+        """Store contents and the settings the results depend on."""
+        settings = f"{self.vector_store.index_version}|{self.mode}"
+        if self.mode == "hybrid":
+            settings += f"|{Config.RAG_HYBRID_DEPTH}|{Config.RAG_RRF_K}"
+        return compute_text_hash(settings)[:16]
+
+    def _path(self, version: str) -> Path:
+        return self.contexts_dir / f"{self.mode}-k{self.top_k}-{version}.jsonl"
+
+    def _load(self) -> str:
+        """Load the entries of the current version (if not loaded yet) and return it."""
+        version = self.version
+        if version != self._version:
+            path = self._path(version)
+            # Appends by other processes sharing the store happen under its lock
+            with self.vector_store.lock:
+                records = read_jsonl(path) if path.exists() else []
+            self._entries = {record["doc_id"]: record for record in records}
+            self._version = version
+        return version
+
+    def _remove_stale(self, version: str) -> None:
+        """Delete results saved for other versions of the store."""
+        current = self._path(version)
+        for path in self.contexts_dir.glob(f"{self.mode}-k{self.top_k}-*.jsonl"):
+            if path != current:
+                path.unlink()
+
+    def compute(self, doc_ids: Sequence[str], queries: Sequence[str]) -> int:
+        """
+        Rank and save the results of documents that have none for the current version.
+
+        Args:
+            doc_ids: Document IDs
+            queries: Retrieval query of each document
+
+        Returns:
+            Number of documents ranked (the others were already saved)
+        """
+        version = self._load()
+        self.contexts_dir.mkdir(exist_ok=True)
+        with self.vector_store.lock:
+            self._remove_stale(version)
+
+        pending: Dict[str, tuple] = {}
+        for doc_id, query in zip(doc_ids, queries):
+            query_hash = compute_text_hash(query)
+            entry = self._entries.get(doc_id)
+            if entry is None or entry["query_hash"] != query_hash:
+                pending[doc_id] = (query, query_hash)
+        if not pending:
+            return 0
+        if self.mode != "bm25":
+            # Fail here rather than save BM25-only rankings as hybrid ones
+            self.vector_store.embed_queries([query for query, _ in pending.values()])
+
+        items = list(pending.items())
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            rankings = self.vector_store.search_rows(
+                [query for _, (query, _) in batch], self.top_k, self.mode
+            )
+            records = [
+                {
+                    "doc_id": doc_id,
+                    "query_hash": query_hash,
+                    "rows": rows.tolist(),
+                    "scores": scores.tolist(),
+                }
+                for (doc_id, (_, query_hash)), (rows, scores) in zip(batch, rankings)
+            ]
+            with self.vector_store.lock:
+                repair_jsonl_tail(self._path(version))
+                append_jsonl(self._path(version), records)
+            self._entries.update((record["doc_id"], record) for record in records)
+        return len(items)
+
+    def get(self, doc_id: str, query: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Saved results of a document.
+
+        Args:
+            doc_id: Document ID
+            query: Retrieval query of the document
+
+        Returns:
+            Results as returned by VectorStore.search, or None if none are
+            saved for this query and the current version of the store
+        """
+        self._load()
+        entry = self._entries.get(doc_id)
+        if entry is None or entry["query_hash"] != compute_text_hash(query):
+            return None
+        return self.vector_store.rows_to_results(
+            np.asarray(entry["rows"], dtype=np.intp),
+            np.asarray(entry["scores"], dtype=np.float64),
+            self.top_k,
+        )
@@ -1,26 +1,324 @@
-"""PubMed retriever (placeholder for future implementation)."""
+"""Retriever over a local collection of PubMed abstracts."""
 
-from typing import List, Dict, Any
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import Config
+from .ann_index import top_k_indices
 from .base import Retriever
+from .bm25 import BM25Index, tokenize
+from .mentions import MentionLexicon
+from .storage import append_jsonl, write_array_atomic
+from ..data.corpus import CORPUS_SUFFIXES, read_abstracts
+
+
+# Bump when the layout of the index directory changes incompatibly
+PUBMED_INDEX_VERSION = 1
 
 
 class PubMedRetriever(Retriever):
-    """PubMed API retriever (placeholder)."""
-    
-    def retrieve(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    """
+    Retriever over local PubMed abstracts, with no network access.
+
+    Abstracts are read from PubTator, BioC JSON and JSON Lines dumps (see
+    read_abstracts) in the configured source files and directories, and
+    each PubMed ID is indexed once. The index lives on disk in index_dir:
+
+    - abstracts.jsonl: one record per abstract, with byte offsets in
+      offsets.npy so results are read without loading the collection
+    - title.npz, abstract.npz: BM25 postings of the two text fields
+    - entity.npz: postings of the annotated entity identifiers
+    - mentions.json: normalized mention text -> entity identifier, used to
+      find entities in queries
+    - sources.json: size and modification time of every source; the index
+      is rebuilt when a source changes, appears or disappears
+
+    A query scores title_weight * BM25(title) + BM25(abstract) +
+    entity_weight * BM25(entity identifiers).
+    """
+
+    def __init__(
+        self,
+        sources: Optional[Sequence[Path]] = None,
+        index_dir: Optional[Path] = None,
+        title_weight: float = 2.0,
+        entity_weight: float = 1.0
+    ):
         """
-        Retrieve PubMed abstracts (placeholder).
-        
+        Load the index, building it if it is missing or stale.
+
+        Args:
+            sources: Corpus files or directories (defaults to Config.PUBMED_SOURCES)
+            index_dir: Directory for the index (defaults to Config.PUBMED_INDEX_DIR)
+            title_weight: Weight of title matches relative to abstract matches
+            entity_weight: Weight of entity identifier matches
+        """
+        self.sources = list(sources) if sources is not None else list(Config.PUBMED_SOURCES)
+        self.index_dir = index_dir or Config.PUBMED_INDEX_DIR
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.title_weight = title_weight
+        self.entity_weight = entity_weight
+
+        self.abstracts_file = self.index_dir / "abstracts.jsonl"
+        self.offsets_file = self.index_dir / "offsets.npy"
+        self.mentions_file = self.index_dir / "mentions.json"
+        self.sources_file = self.index_dir / "sources.json"
+        # Abstracts given to add_documents, indexed like any other source
+        self.added_file = self.index_dir / "added.jsonl"
+        self.field_indexes = {field: BM25Index() for field in ("title", "abstract", "entity")}
+
+        self.offsets = np.zeros(0, dtype=np.int64)
+        self.pmids: List[str] = []
+        self._row_by_pmid: Dict[str, int] = {}
+        self.lexicon = MentionLexicon()
+
+        if not self._load():
+            self.build()
+
+    def __len__(self) -> int:
+        return len(self.pmids)
+
+    def _source_files(self) -> List[Path]:
+        """Corpus files of the configured sources, in a stable order."""
+        files: List[Path] = []
+        for source in self.sources:
+            if source.is_dir():
+                files.extend(
+                    path for path in sorted(source.iterdir())
+                    if path.is_file() and path.suffix.lower() in CORPUS_SUFFIXES
+                )
+            elif source.is_file():
+                files.append(source)
+        if self.added_file.exists():
+            files.append(self.added_file)
+        return files
+
+    def _source_signature(self) -> Dict[str, List[int]]:
+        """Size and modification time of every source file."""
+        signature = {}
+        for path in self._source_files():
+            stat = path.stat()
+            signature[str(path)] = [stat.st_size, stat.st_mtime_ns]
+        return signature
+
+    def _index_file(self, field: str) -> Path:
+        return self.index_dir / f"{field}.npz"
+
+    def _load(self) -> bool:
+        """
+        Load the index if it is current.
+
+        Returns:
+            True if loaded, False if it must be rebuilt
+        """
+        if not self.sources_file.exists():
+            return False
+        try:
+            with open(self.sources_file, 'r') as f:
+                stored = json.load(f)
+            if (
+                stored.get("version") != PUBMED_INDEX_VERSION
+                or stored.get("sources") != self._source_signature()
+            ):
+                return False
+            for field, index in self.field_indexes.items():
+                index.load(self._index_file(field))
+            with open(self.mentions_file, 'r') as f:
+                self.lexicon = MentionLexicon(json.load(f))
+            self.offsets = np.load(self.offsets_file)
+            self.pmids = stored["pmids"]
+        except Exception as e:
+            print(f"Warning: Failed to load PubMed index, rebuilding: {e}")
+            return False
+        self._finish_loading()
+        return True
+
+    def _finish_loading(self) -> None:
+        """Derive lookup tables from the loaded index."""
+        self._row_by_pmid = {pmid: row for row, pmid in enumerate(self.pmids)}
+
+    def build(self) -> None:
+        """Rebuild the index from the source files."""
+        # Without sources.json the index counts as stale until the build completes
+        if self.sources_file.exists():
+            self.sources_file.unlink()
+        signature = self._source_signature()
+        print(f"Building PubMed index from {len(signature)} source files...")
+
+        for index in self.field_indexes.values():
+            index.reset()
+        self.pmids = []
+        offsets: List[int] = []
+        mention_pairs: List[Tuple[str, str]] = []
+        seen = set()
+        batch: List[Dict[str, Any]] = []
+
+        tmp_abstracts = self.abstracts_file.with_suffix(".tmp.jsonl")
+        with open(tmp_abstracts, 'wb') as out:
+            for path in self._source_files():
+                try:
+                    records = list(read_abstracts(path))
+                except Exception as e:
+                    print(f"Warning: Skipping PubMed source {path}: {e}")
+                    continue
+                for record in records:
+                    pmid = record["pmid"]
+                    if not pmid or pmid in seen or not (record["title"] or record["abstract"]):
+                        continue
+                    seen.add(pmid)
+                    stored = _stored_record(record, path.name)
+                    offsets.append(out.tell())
+                    out.write((json.dumps(stored) + "\n").encode("utf-8"))
+                    self.pmids.append(pmid)
+                    mention_pairs.extend(
+                        (entity.get("text", ""), entity["id"]) for entity in record["entities"]
+                    )
+                    batch.append(record)
+                    if len(batch) >= _BUILD_BATCH_SIZE:
+                        self._index_records(batch)
+                        batch = []
+            self._index_records(batch)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_abstracts, self.abstracts_file)
+
+        self.lexicon = MentionLexicon.build(mention_pairs)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        write_array_atomic(self.offsets_file, self.offsets)
+        for field, index in self.field_indexes.items():
+            index.save(self._index_file(field))
+        self._write_json(self.mentions_file, self.lexicon.to_dict())
+        self._write_json(self.sources_file, {
+            "version": PUBMED_INDEX_VERSION, "sources": signature, "pmids": self.pmids
+        })
+        self._finish_loading()
+        print(f"PubMed index contains {len(self.pmids)} abstracts")
+
+    def _index_records(self, records: List[Dict[str, Any]]) -> None:
+        """Add records to the field indexes as the next rows."""
+        if not records:
+            return
+        self.field_indexes["title"].update([record["title"] for record in records])
+        self.field_indexes["abstract"].update([record["abstract"] for record in records])
+        self.field_indexes["entity"].update_terms([
+            [entity["id"] for entity in record["entities"]] for record in records
+        ])
+
+    @staticmethod
+    def _write_json(path: Path, data: Any) -> None:
+        """Write JSON, replacing the old file atomically."""
+        tmp_path = path.with_suffix(".tmp.json")
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def find_entities(self, text: str) -> List[str]:
+        """
+        Identifiers of the annotated entities mentioned in a text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Entity identifiers, in order of first mention
+        """
+        return self.lexicon.find(text)
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        entity_ids: Optional[Iterable[str]] = None,
+        exclude_ids: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve the abstracts most related to a query.
+
         Args:
             query: Search query
             top_k: Number of results
-            
+            entity_ids: Entity identifiers to match in addition to those
+                mentioned in the query
+            exclude_ids: PubMed IDs never returned (e.g. the document being
+                processed, so it cannot retrieve its own annotations)
+
         Returns:
-            List of retrieved documents
+            List of abstracts ({"pmid", "title", "text", "entities",
+            "source", "similarity"}), best first
         """
-        # TODO: Implement PubMed API integration
-        return []
-    
+        if not self.pmids:
+            return []
+        query_terms = tokenize(query)
+        query_entities = self.find_entities(query) + list(entity_ids or [])
+
+        scores = self.field_indexes["abstract"].score_terms(query_terms)
+        scores += self.title_weight * self.field_indexes["title"].score_terms(query_terms)
+        if query_entities:
+            scores += self.entity_weight * self.field_indexes["entity"].score_terms(query_entities)
+        for pmid in exclude_ids or ():
+            row = self._row_by_pmid.get(pmid)
+            if row is not None:
+                scores[row] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        best = candidates[top_k_indices(scores[candidates], top_k)]
+
+        results = []
+        with open(self.abstracts_file, 'rb') as f:
+            for row in best.tolist():
+                f.seek(self.offsets[row])
+                record = json.loads(f.readline())
+                results.append({
+                    "pmid": record["pmid"],
+                    "title": record["title"],
+                    "text": record["abstract"],
+                    "entities": record["entities"],
+                    "source": record["source"],
+                    "similarity": float(scores[row]),
+                })
+        return results
+
     def add_documents(self, documents: List[Dict[str, Any]]) -> None:
-        """Not applicable for PubMed retriever."""
-        pass
+        """
+        Add abstracts to the collection and rebuild the index.
+
+        Args:
+            documents: Abstracts with "pmid" (or "id"), "title" and
+                "abstract" (or "text"), optionally "entities"
+        """
+        append_jsonl(self.added_file, (
+            {
+                "pmid": str(doc.get("pmid", doc.get("id", ""))),
+                "title": doc.get("title", ""),
+                "abstract": doc.get("abstract", doc.get("text", "")),
+                "entities": doc.get("entities", []),
+            }
+            for doc in documents
+        ))
+        self.build()
+
+
+# Records indexed at once while building
+_BUILD_BATCH_SIZE = 1000
+
+
+def _stored_record(record: Dict[str, Any], source: str) -> Dict[str, Any]:
+    """Record kept in abstracts.jsonl: text fields and entities, one entry per identifier."""
+    entities: Dict[str, Dict[str, Any]] = {}
+    for entity in record["entities"]:
+        entry = entities.setdefault(
+            entity["id"], {"id": entity["id"], "type": entity.get("type", ""), "mentions": []}
+        )
+        if entity.get("text") and entity["text"] not in entry["mentions"]:
+            entry["mentions"].append(entity["text"])
+    return {
+        "pmid": record["pmid"],
+        "title": record["title"],
+        "abstract": record["abstract"],
+        "entities": list(entities.values()),
+        "source": source,
+    }
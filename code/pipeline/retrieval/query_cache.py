@@ -0,0 +1,218 @@
+"""Persistent cache of query embeddings."""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .embeddings import compute_text_hash
+from .storage import FileLock, repair_jsonl_tail
+
+
+class QueryEmbeddingCache:
+    """
+    Append-only on-disk cache of normalized query embeddings.
+
+    Entries are keyed by (embedding model, text hash): every model gets its
+    own directory holding a raw float32 vector file and a JSON Lines file
+    with one text hash per row. Both files are only ever appended to, so
+    adding an entry is cheap and an interrupted write loses at most the
+    entries being added. Processes sharing the cache append under a lock,
+    after reading the entries the others appended and removing what an
+    interrupted writer left behind.
+    """
+
+    def __init__(self, cache_dir: Path, model: str):
+        """
+        Initialize query embedding cache.
+
+        Args:
+            cache_dir: Root directory of the cache
+            model: Embedding model name
+        """
+        self.model = model
+        self.model_dir = cache_dir / re.sub(r"[^A-Za-z0-9_.-]+", "_", model)
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        self.vectors_file = self.model_dir / "vectors.f32"
+        self.keys_file = self.model_dir / "keys.jsonl"
+        self.meta_file = self.model_dir / "meta.json"
+        self.lock = FileLock(self.model_dir / "lock")
+
+        self.dim = 0
+        self._rows: Dict[str, int] = {}
+        # Lines and bytes of keys_file read into _rows
+        self._num_rows = 0
+        self._keys_size = 0
+        self._vectors: Optional[np.ndarray] = None
+        with self.lock:
+            self._load()
+
+    def _load(self) -> None:
+        """Load the key index and memory-map the vectors."""
+        try:
+            with open(self.meta_file, 'r') as f:
+                self.dim = json.load(f)["dim"]
+        except Exception as e:
+            if self.meta_file.exists():
+                print(f"Warning: Failed to load query embedding cache, starting empty: {e}")
+            # Without the dimension the vector file cannot be read: start fresh
+            self.dim = 0
+            for path in (self.meta_file, self.vectors_file, self.keys_file):
+                if path.exists():
+                    path.unlink()
+            return
+        self.keys_file.touch()
+        self.vectors_file.touch()
+
+        hashes = []
+        valid_bytes = 0
+        with open(self.keys_file, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn final line, even if it parses
+                try:
+                    hashes.append(json.loads(line)["hash"])
+                except (ValueError, KeyError):
+                    break
+                valid_bytes += len(line)
+
+        # Vectors are written before keys, so after an interrupted write the
+        # vector file may hold extra bytes, never fewer rows than keys.
+        # Truncate both files to the complete entries before appending again.
+        row_bytes = 4 * self.dim
+        num_rows = min(len(hashes), self.vectors_file.stat().st_size // row_bytes)
+        if num_rows < len(hashes):
+            valid_bytes = sum(len(json.dumps({"hash": h}) + "\n") for h in hashes[:num_rows])
+        if self.keys_file.stat().st_size != valid_bytes:
+            os.truncate(self.keys_file, valid_bytes)
+        if self.vectors_file.stat().st_size != num_rows * row_bytes:
+            os.truncate(self.vectors_file, num_rows * row_bytes)
+
+        self._rows = {text_hash: row for row, text_hash in enumerate(hashes[:num_rows])}
+        self._num_rows = num_rows
+        self._keys_size = valid_bytes
+        self._map_vectors()
+
+    def _read_new_keys(self) -> None:
+        """Add the entries appended by other processes since the keys were read."""
+        if not self.dim:
+            if not self.meta_file.exists():
+                return
+            # Another process created the cache after this one was opened
+            self._load()
+            return
+        with open(self.keys_file, 'rb') as f:
+            f.seek(self._keys_size)
+            data = f.read()
+        # Up to the last complete line: a torn tail is left by a writer that
+        # crashed, and removed by _repair before the next append
+        data = data[:data.rfind(b"\n") + 1]
+        for line in data.splitlines(keepends=True):
+            self._rows.setdefault(json.loads(line)["hash"], self._num_rows)
+            self._num_rows += 1
+        self._keys_size += len(data)
+        if data:
+            self._vectors = None
+
+    def _repair(self) -> None:
+        """Remove a torn key line and vector rows without a key (under the lock)."""
+        repair_jsonl_tail(self.keys_file)
+        # Vectors are written before keys, so a crashed writer may leave extra rows
+        row_bytes = 4 * self.dim
+        if self.vectors_file.stat().st_size > self._num_rows * row_bytes:
+            os.truncate(self.vectors_file, self._num_rows * row_bytes)
+
+    def _map_vectors(self) -> None:
+        """(Re)open the vector file memory-mapped."""
+        if self._rows:
+            self._vectors = np.memmap(
+                self.vectors_file, dtype=np.float32, mode='r', shape=(self._num_rows, self.dim)
+            )
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, text: str) -> bool:
+        return compute_text_hash(text) in self._rows
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Look up the embedding of a query text.
+
+        Args:
+            text: Query text
+
+        Returns:
+            Normalized float32 embedding, or None if not cached
+        """
+        row = self._rows.get(compute_text_hash(text))
+        if row is None:
+            return None
+        if self._vectors is None or row >= len(self._vectors):
+            self._map_vectors()
+        return np.array(self._vectors[row])
+
+    def missing(self, texts: List[str]) -> List[str]:
+        """
+        Distinct texts that are not cached yet, in first-seen order.
+
+        Args:
+            texts: Query texts
+
+        Returns:
+            List of uncached texts
+        """
+        seen = set()
+        missing = []
+        for text in texts:
+            text_hash = compute_text_hash(text)
+            if text_hash not in self._rows and text_hash not in seen:
+                seen.add(text_hash)
+                missing.append(text)
+        return missing
+
+    def put(self, texts: List[str], embeddings: np.ndarray) -> None:
+        """
+        Add normalized embeddings for query texts and append them to disk.
+
+        Args:
+            texts: Query texts
+            embeddings: 2D float32 array of normalized embeddings, one row per text
+        """
+        with self.lock:
+            self._read_new_keys()
+            new_hashes = {}  # text hash -> embedding, insertion-ordered
+            for text, embedding in zip(texts, embeddings):
+                text_hash = compute_text_hash(text)
+                if text_hash not in self._rows:
+                    new_hashes.setdefault(text_hash, embedding)
+            new_rows = list(new_hashes.values())
+            if not new_rows:
+                return
+
+            matrix = np.ascontiguousarray(new_rows, dtype=np.float32)
+            if not self.dim:
+                self.dim = matrix.shape[1]
+                with open(self.meta_file, 'w') as f:
+                    json.dump({"model": self.model, "dim": self.dim}, f)
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(
+                    f"Embedding dimension {matrix.shape[1]} does not match cache dimension {self.dim}"
+                )
+            else:
+                self._repair()
+
+            with open(self.vectors_file, 'ab') as f:
+                f.write(matrix.tobytes())
+            keys = "".join(json.dumps({"hash": text_hash}) + "\n" for text_hash in new_hashes)
+            with open(self.keys_file, 'a') as f:
+                f.write(keys)
+
+            for text_hash in new_hashes:
+                self._rows[text_hash] = self._num_rows
+                self._num_rows += 1
+            self._keys_size += len(keys.encode("utf-8"))
+            self._vectors = None
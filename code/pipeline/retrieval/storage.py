@@ -0,0 +1,219 @@
+"""Crash-safe file writes and inter-process locking for the embedding cache."""
+
+import io
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only exclude threads of one process
+    fcntl = None
+
+
+# Bytes read at a time when looking for the last line of a file
+_TAIL_BLOCK_SIZE = 1 << 16
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on a file, shared by processes and threads.
+
+    Processes are excluded with flock() on the lock file, threads of one
+    process with a reentrant lock, so a holder may enter it again (e.g. an
+    update that compacts). The flock is released when the outermost
+    holder exits, or by the OS if the process dies.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Initialize the lock.
+
+        Args:
+            path: Lock file (created on first use, never deleted)
+        """
+        self.path = path
+        self.depth = 0
+        self._thread_lock = threading.RLock()
+        self._file = None
+
+    def __enter__(self) -> "FileLock":
+        self._thread_lock.acquire()
+        if self.depth == 0:
+            try:
+                self._file = open(self.path, 'a')
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+        self.depth += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.depth -= 1
+        if self.depth == 0:
+            # Closing the file releases the flock
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+
+def write_array_atomic(path: Path, array: np.ndarray) -> None:
+    """
+    Write an array as .npy, replacing the old file atomically.
+
+    Args:
+        path: Destination .npy file
+        array: Array to write
+    """
+    tmp_path = path.with_suffix(".tmp.npy")
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+def append_npy_rows(path: Path, rows: np.ndarray) -> bool:
+    """
+    Append rows to a 2D C-order .npy file in place.
+
+    The rows are written after the existing data and flushed before the
+    shape in the header is updated, so an interrupted append leaves the
+    file readable with its old shape. NumPy pads .npy headers so the row
+    count can grow without changing the header size; if it would change,
+    nothing is written.
+
+    Args:
+        path: Existing .npy file
+        rows: 2D array with the file's dtype and number of columns
+
+    Returns:
+        True if the rows were appended, False if the file must be rewritten
+    """
+    with open(path, 'r+b') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        header_size = f.tell()
+        if fortran_order or dtype != rows.dtype or len(shape) != 2 or shape[1] != rows.shape[1]:
+            return False
+
+        header = io.BytesIO()
+        header_data = {
+            'descr': np.lib.format.dtype_to_descr(dtype),
+            'fortran_order': False,
+            'shape': (shape[0] + len(rows), shape[1]),
+        }
+        if version == (1, 0):
+            np.lib.format.write_array_header_1_0(header, header_data)
+        else:
+            np.lib.format.write_array_header_2_0(header, header_data)
+        if len(header.getvalue()) != header_size:
+            return False
+
+        # Drop bytes left behind by an interrupted append, then add the rows
+        f.seek(header_size + shape[0] * shape[1] * dtype.itemsize)
+        f.truncate()
+        f.write(np.ascontiguousarray(rows).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+        f.seek(0)
+        f.write(header.getvalue())
+        f.flush()
+        os.fsync(f.fileno())
+    return True
+
+
+def read_jsonl(path: Path) -> List[Dict[str, Any]]:
+    """
+    Read a JSON Lines file without modifying it.
+
+    A final line with no newline is an append in progress (or one cut off
+    by a crash) and is skipped, as is any line that does not decode.
+    Writers remove a torn tail with repair_jsonl_tail before appending.
+
+    Args:
+        path: JSON Lines file
+
+    Returns:
+        List of records
+    """
+    records = []
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def repair_jsonl_tail(path: Path) -> None:
+    """
+    Remove a torn final line from a JSON Lines file, so an append starts on a clean line.
+
+    Only the bytes after the last newline are removed. Call it while
+    holding the lock that serializes appends to the file, right before
+    appending; otherwise it may cut off another writer's append.
+
+    Args:
+        path: JSON Lines file (nothing happens if missing)
+    """
+    if not path.exists():
+        return
+    with open(path, 'r+b') as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - _TAIL_BLOCK_SIZE)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        if end != size:
+            f.truncate(end)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def append_jsonl(path: Path, records: Iterable[Dict[str, Any]]) -> None:
+    """
+    Append records to a JSON Lines file.
+
+    Args:
+        path: JSON Lines file (created if missing)
+        records: Records to append
+    """
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_jsonl(path: Path, records: Iterable[Dict[str, Any]]) -> None:
+    """
+    Write records to a new JSON Lines file, flushed to disk.
+
+    Args:
+        path: Destination file (overwritten)
+        records: Records to write
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
@@ -1,37 +1,253 @@
 """Vector store with file-based embedding caching."""
 
+import functools
 import json
+import os
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 
 from config import Config
 from .embeddings import EmbeddingGenerator, compute_file_hash, compute_text_hash
+from .embedding_batcher import EmbeddingBatcher
+from .ann_index import ANNIndex, create_ann_index, top_k_indices, top_k_per_row
+from .bm25 import BM25Index, reciprocal_rank_fusion
+from .query_cache import QueryEmbeddingCache
+from .chunking import chunk_text
+from .cache_manifest import CacheManifest, cache_namespace, model_key
+from .storage import (
+    FileLock,
+    append_jsonl,
+    append_npy_rows,
+    read_jsonl,
+    repair_jsonl_tail,
+    write_array_atomic,
+    write_jsonl,
+)
+
+
+def _update(method):
+    """Run a VectorStore method as an update of the files on disk (see _writing)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._writing():
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class VectorStore:
-    """Vector store with file-based embedding caching and hash checking."""
+    """
+    Vector store with file-based embedding caching and hash checking.
+    
+    Several processes can share one cache. Updates hold an advisory lock
+    on the namespace directory and start by loading what other processes
+    changed; files are only appended to (rows before the records naming
+    them) or replaced atomically. A store searches the snapshot it loaded,
+    which later updates by others do not disturb, until refresh().
+    """
     
-    def __init__(self, embeddings_dir: Path = None):
+    def __init__(
+        self,
+        embeddings_dir: Path = None,
+        ann_index: Optional[ANNIndex] = None,
+        search_mode: Optional[str] = None
+    ):
         """
         Initialize vector store.
         
+        The cache is partitioned by (embedding model, dimensions, chunking
+        config): each combination gets its own namespace directory under
+        the cache root, listed in the root's manifest.json, so switching
+        between configurations reuses their embeddings.
+        
         Args:
-            embeddings_dir: Directory to store embeddings cache
+            embeddings_dir: Root directory of the embeddings cache
+            ann_index: Optional approximate nearest-neighbour index (defaults to
+                Config.RAG_ANN_INDEX; None there means exact search)
+            search_mode: "dense", "bm25" or "hybrid" (defaults to Config.RAG_SEARCH_MODE)
         """
-        self.embeddings_dir = embeddings_dir or Config.RAG_EMBEDDINGS_DIR
-        self.embeddings_dir.mkdir(exist_ok=True)
+        self.cache_root = embeddings_dir or Config.RAG_EMBEDDINGS_DIR
+        self.cache_root.mkdir(exist_ok=True)
         
         self.embedding_generator = EmbeddingGenerator()
-        self.embeddings: List[List[float]] = []
+        self.batcher = EmbeddingBatcher(self.embedding_generator)
+        self.chunk_size = Config.RAG_CHUNK_SIZE
+        self.chunk_overlap = Config.RAG_CHUNK_OVERLAP
+        dimensions = self.embedding_generator.dimensions
+        self.namespace = cache_namespace(
+            self.embedding_generator.model, dimensions, self.chunk_size, self.chunk_overlap
+        )
+        self.embeddings_dir = self.cache_root / self.namespace
+        self.manifest = CacheManifest(self.cache_root)
+        with self.manifest.lock:
+            self._adopt_unversioned_cache()
+            self.embeddings_dir.mkdir(exist_ok=True)
+        # Held by updates of the namespace, in any process
+        self.lock = FileLock(self.embeddings_dir / "lock")
+        # Incremented whenever rows are renumbered (compaction, clear)
+        self.generation_file = self.embeddings_dir / "generation"
+        
+        # Query embeddings do not depend on chunking, so they are shared
+        self.query_cache = QueryEmbeddingCache(
+            self.cache_root / "query_cache", model_key(self.embedding_generator.model, dimensions)
+        )
+        # Unit-length float32 rows (memory-mapped when loaded from disk)
+        self.embeddings: np.ndarray = _empty_matrix()
         self.documents: List[Dict[str, Any]] = []
         self.hash_index_path = self.embeddings_dir / "hash_index.json"
         self.embeddings_file = self.embeddings_dir / "embeddings.npy"
-        self.documents_file = self.embeddings_dir / "documents.json"
+        # Append-only journal of document additions and file removals
+        self.documents_file = self.embeddings_dir / "documents.jsonl"
+        self.legacy_documents_file = self.embeddings_dir / "documents.json"
+        # Files staged by compact(), swapped in while the marker exists
+        self.compacted_embeddings_file = self.embeddings_dir / "embeddings.compact.npy"
+        self.compacted_documents_file = self.embeddings_dir / "documents.compact.jsonl"
+        self.compaction_marker = self.embeddings_dir / "compact.pending"
+        self.ann_index_file = self.embeddings_dir / "ann_index.npz"
+        self.ann_index = ann_index or create_ann_index(
+            Config.RAG_ANN_INDEX, nprobe=Config.RAG_ANN_NPROBE
+        )
+        self.search_mode = search_mode or Config.RAG_SEARCH_MODE
+        if self.search_mode not in SEARCH_MODES:
+            raise ValueError(
+                f"Unknown search mode: {self.search_mode}. Must be one of {SEARCH_MODES}"
+            )
+        # Lexical index over the same rows, loaded and built on first use
+        self.bm25_index = BM25Index()
+        self.bm25_index_file = self.embeddings_dir / "bm25_index.npz"
+        self._bm25_loaded = False
+        
+        # Lookup indexes over self.documents (see _rebuild_document_indexes)
+        self._docs_by_row: Dict[int, List[Dict[str, Any]]] = {}
+        self._docs_by_path: Dict[str, List[Dict[str, Any]]] = {}
+        # text hash -> embedding row, for every row whose text is known
+        # (see _index_document and _store_embedding_batch)
+        self._row_by_text_hash: Dict[str, int] = {}
+        # Records in the document journal, live or not, and how many of
+        # them record embedded rows
+        self._journal_records = 0
+        self._row_records = 0
+        # Snapshot in memory: generation of its rows and journal size
+        self._generation = 0
+        self._journal_size = 0
         
         # Load existing index if available
-        self.hash_index: Dict[str, str] = self._load_hash_index()
+        self.hash_index: Dict[str, str] = {}
+        with self.lock:
+            self._load()
+            self._journal_size = self._journal_file_size()
+        self._register_namespace()
+    
+    def _load(self) -> None:
+        """Load the store from disk, completing interrupted updates (lock held)."""
+        self.hash_index = self._load_hash_index()
         self._load_cached_embeddings()
+        self._rebuild_document_indexes()
+        if self.legacy_documents_file.exists():
+            # Cache written by an older version: convert documents.json to the journal
+            self.compact()
+            self.legacy_documents_file.unlink()
+        self._load_ann_index()
+    
+    def _reload(self) -> None:
+        """Replace the in-memory store with the one on disk (lock held)."""
+        self.embeddings = _empty_matrix()
+        self.documents = []
+        self._row_by_text_hash = {}
+        self._journal_records = 0
+        self._row_records = 0
+        if self.ann_index is not None:
+            self.ann_index.reset()
+        self.bm25_index.reset()
+        self._bm25_loaded = False
+        self._load()
+    
+    def _journal_file_size(self) -> int:
+        return self.documents_file.stat().st_size if self.documents_file.exists() else 0
+    
+    def _read_generation(self) -> int:
+        try:
+            return int(self.generation_file.read_text())
+        except (OSError, ValueError):
+            return 0
+    
+    def _bump_generation(self) -> None:
+        """Record that rows were renumbered, replacing the generation file atomically."""
+        self._generation = self._read_generation() + 1
+        tmp_path = self.generation_file.with_suffix(".tmp")
+        tmp_path.write_text(str(self._generation))
+        os.replace(tmp_path, self.generation_file)
+    
+    def _is_current(self) -> bool:
+        """Whether no other process changed the store since its snapshot."""
+        return (
+            self._read_generation() == self._generation
+            and self._journal_file_size() == self._journal_size
+        )
+    
+    @contextmanager
+    def _writing(self):
+        """
+        Hold the store lock for an update.
+        
+        The outermost update first reloads the store if another process
+        changed it, so new rows and records extend the current files.
+        """
+        with self.lock:
+            if self.lock.depth == 1 and not self._is_current():
+                self._reload()
+            try:
+                yield
+            finally:
+                if self.lock.depth == 1:
+                    self._journal_size = self._journal_file_size()
+    
+    def refresh(self) -> bool:
+        """
+        Load the updates other processes made since the store was loaded.
+        
+        Returns:
+            True if the store changed and was reloaded
+        """
+        with self.lock:
+            if self._is_current():
+                return False
+            self._reload()
+            self._journal_size = self._journal_file_size()
+        return True
+    
+    def _register_namespace(self) -> None:
+        """Record this namespace and its vector dimension in the manifest."""
+        info = {
+            "model": self.embedding_generator.model,
+            "dimensions": self.embedding_generator.dimensions,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+        }
+        if len(self.embeddings):
+            info["dim"] = int(self.embeddings.shape[1])
+        self.manifest.register(self.namespace, **info)
+    
+    def _adopt_unversioned_cache(self) -> None:
+        """
+        Move a cache written before namespacing into this namespace.
+        
+        Such a cache sits directly in the cache root and was built with
+        the configured model, so it is adopted unless the namespace already
+        has its own files.
+        """
+        names = [
+            "embeddings.npy", "documents.jsonl", "documents.json",
+            "hash_index.json", "ann_index.npz", "bm25_index.npz"
+        ]
+        legacy_files = [self.cache_root / name for name in names if (self.cache_root / name).exists()]
+        if not legacy_files or self.embeddings_dir.exists():
+            return
+        print(f"Moving unversioned embedding cache into {self.embeddings_dir}")
+        self.embeddings_dir.mkdir()
+        for path in legacy_files:
+            os.replace(path, self.embeddings_dir / path.name)
     
     def _load_hash_index(self) -> Dict[str, str]:
         """Load hash index mapping file paths to hashes."""
@@ -44,32 +260,337 @@ class VectorStore:
         return {}
     
     def _save_hash_index(self) -> None:
-        """Save hash index to disk."""
-        with open(self.hash_index_path, 'w') as f:
+        """Save hash index to disk, replacing the old file atomically."""
+        tmp_path = self.hash_index_path.with_suffix(".tmp.json")
+        with open(tmp_path, 'w') as f:
             json.dump(self.hash_index, f, indent=2)
+        os.replace(tmp_path, self.hash_index_path)
     
     def _load_cached_embeddings(self) -> None:
         """Load cached embeddings and documents from disk."""
-        if self.embeddings_file.exists() and self.documents_file.exists():
+        self._finish_compaction()
+        self._generation = self._read_generation()
+        documents_file = self.documents_file
+        if not documents_file.exists():
+            documents_file = self.legacy_documents_file
+        if self.embeddings_file.exists() and documents_file.exists():
             try:
-                self.embeddings = np.load(self.embeddings_file).tolist()
-                with open(self.documents_file, 'r') as f:
-                    self.documents = json.load(f)
+                embeddings = np.load(self.embeddings_file, mmap_mode='r')
+                if embeddings.size == 0:
+                    embeddings = _empty_matrix()
+                elif embeddings.dtype != np.float32:
+                    # Cache written by an older version: raw float64 vectors
+                    self._write_matrix(_normalize_rows(np.asarray(embeddings, dtype=np.float64)))
+                    embeddings = np.load(self.embeddings_file, mmap_mode='r')
+                self.embeddings = embeddings
+                if documents_file == self.documents_file:
+                    self.documents = self._replay_journal()
+                else:
+                    with open(documents_file, 'r') as f:
+                        self.documents = json.load(f)
             except Exception as e:
                 print(f"Warning: Failed to load cached embeddings: {e}")
-                self.embeddings = []
+                self.embeddings = _empty_matrix()
                 self.documents = []
     
-    def _save_embeddings(self) -> None:
-        """Save embeddings and documents to disk."""
-        np.save(self.embeddings_file, np.array(self.embeddings))
-        with open(self.documents_file, 'w') as f:
-            json.dump(self.documents, f, indent=2)
+    def _replay_journal(self) -> List[Dict[str, Any]]:
+        """
+        Rebuild the document list from the journal.
+        
+        Records are {"add": document}, {"remove_file": path} or {"rows":
+        first row, "text_hashes": [...]}. A removal drops the documents of
+        that file added before it; a rows record names the texts of
+        embedding rows appended before their documents were added, so an
+        interrupted run can reuse them.
+        
+        Returns:
+            Live documents, in the order they were added
+        """
+        records = read_jsonl(self.documents_file)
+        self._journal_records = len(records)
+        self._row_records = 0
+        added = []
+        removed_at: Dict[str, int] = {}
+        for position, record in enumerate(records):
+            if 'remove_file' in record:
+                removed_at[record['remove_file']] = position
+            elif 'rows' in record:
+                self._row_records += 1
+                for row, text_hash in enumerate(record['text_hashes'], record['rows']):
+                    if row < len(self.embeddings):
+                        self._row_by_text_hash.setdefault(text_hash, row)
+            else:
+                added.append((position, record['add']))
+        return [
+            doc for position, doc in added
+            if position > removed_at.get(doc.get('file_path'), -1)
+        ]
+    
+    def _rebuild_document_indexes(self) -> None:
+        """
+        Rebuild the embedding row and file path indexes.
+        
+        Rows never change their text, so text hashes of rows (including
+        rows no document refers to any more) are kept.
+        """
+        self._docs_by_row = {}
+        self._docs_by_path = {}
+        for doc in self.documents:
+            self._index_document(doc)
+    
+    def _index_document(self, doc: Dict[str, Any]) -> None:
+        """Add one document to the lookup indexes (first row wins per text hash)."""
+        row = doc.get('embedding_index')
+        if row is not None:
+            self._docs_by_row.setdefault(row, []).append(doc)
+            if doc.get('text_hash'):
+                self._row_by_text_hash.setdefault(doc['text_hash'], row)
+        if doc.get('file_path'):
+            self._docs_by_path.setdefault(doc['file_path'], []).append(doc)
+    
+    def _append_journal(self, records: List[Dict[str, Any]]) -> None:
+        """Append records to the document journal (under the store lock)."""
+        if records:
+            repair_jsonl_tail(self.documents_file)
+            append_jsonl(self.documents_file, records)
+            self._journal_records += len(records)
     
+    def _finish_update(self) -> None:
+        """Compact if enough garbage accumulated, then update the ANN index."""
+        orphaned_rows = len(self.embeddings) - len(self._docs_by_row)
+        stale_records = self._journal_records - self._row_records - len(self.documents)
+        ratio = Config.RAG_COMPACT_GARBAGE_RATIO
+        if orphaned_rows > ratio * len(self.embeddings) or stale_records > ratio * self._journal_records:
+            self.compact()
+        self._update_ann_index()
+        if self.search_mode != "dense":
+            self._update_bm25_index()
+    
+    @_update
+    def compact(self) -> int:
+        """
+        Drop embedding rows no document refers to and rewrite the journal.
+        
+        Rows are renumbered in their current order and 'embedding_index' is
+        updated on every document. The new matrix and journal are staged
+        next to the old files and swapped in together (see
+        _finish_compaction), so an interrupted compaction never mixes them.
+        
+        Returns:
+            Number of embedding rows dropped
+        """
+        live_rows = np.array(sorted(self._docs_by_row), dtype=np.int64)
+        num_dropped = len(self.embeddings) - len(live_rows)
+        documents = self.documents
+        
+        if num_dropped:
+            new_index = np.full(len(self.embeddings), -1, dtype=np.int64)
+            new_index[live_rows] = np.arange(len(live_rows))
+            documents = [
+                dict(doc, embedding_index=int(new_index[doc['embedding_index']]))
+                if doc.get('embedding_index') is not None else doc
+                for doc in self.documents
+            ]
+            dim = self.embeddings.shape[1] if len(live_rows) else 0
+            matrix = np.lib.format.open_memmap(
+                self.compacted_embeddings_file, mode='w+', dtype=np.float32,
+                shape=(len(live_rows), dim)
+            )
+            for start in range(0, len(live_rows), _COMPACT_CHUNK_ROWS):
+                chunk_rows = live_rows[start:start + _COMPACT_CHUNK_ROWS]
+                matrix[start:start + len(chunk_rows)] = self.embeddings[chunk_rows]
+            matrix.flush()
+            del matrix
+            # Row numbers change, so the ANN and BM25 indexes are rebuilt
+            if self.ann_index is not None:
+                self.ann_index.reset()
+            self.bm25_index.reset()
+            for path in (self.ann_index_file, self.bm25_index_file):
+                if path.exists():
+                    path.unlink()
+        
+        write_jsonl(self.compacted_documents_file, ({"add": doc} for doc in documents))
+        self.compaction_marker.touch()
+        self._finish_compaction()
+        
+        self.documents = documents
+        self._journal_records = len(documents)
+        self._row_records = 0
+        if num_dropped:
+            self.embeddings = (
+                np.load(self.embeddings_file, mmap_mode='r') if len(live_rows) else _empty_matrix()
+            )
+            self._row_by_text_hash = {}
+            self._rebuild_document_indexes()
+        return num_dropped
+    
+    def _finish_compaction(self) -> None:
+        """
+        Swap staged compaction files in.
+        
+        Also completes a compaction interrupted after staging, or discards
+        staged files of one interrupted before the marker was written.
+        """
+        staged = [
+            (self.compacted_embeddings_file, self.embeddings_file),
+            (self.compacted_documents_file, self.documents_file),
+        ]
+        if not self.compaction_marker.exists():
+            for staged_file, _ in staged:
+                if staged_file.exists():
+                    staged_file.unlink()
+            return
+        for staged_file, target in staged:
+            if staged_file.exists():
+                os.replace(staged_file, target)
+        self._bump_generation()
+        self.compaction_marker.unlink()
+    
+    def _load_ann_index(self) -> None:
+        """Load the persisted ANN index and index rows added since it was saved."""
+        if self.ann_index is None:
+            return
+        if self.ann_index_file.exists():
+            try:
+                self.ann_index.load(self.ann_index_file)
+            except Exception as e:
+                print(f"Warning: Failed to load ANN index, rebuilding: {e}")
+                self.ann_index.reset()
+        if not self.ann_index.is_ready(self.embeddings):
+            self._update_ann_index()
+    
+    def _update_ann_index(self) -> None:
+        """Incrementally update and persist the ANN index (large stores only)."""
+        if self.ann_index is None or len(self.embeddings) < Config.RAG_ANN_MIN_ROWS:
+            return
+        if not self.ann_index.is_ready(self.embeddings):
+            self.ann_index.update(self.embeddings)
+            self._save_index(self.ann_index, self.ann_index_file)
+    
+    def _update_bm25_index(self) -> None:
+        """Index rows added since the BM25 index was last updated, and persist it."""
+        if not self._bm25_loaded:
+            self._bm25_loaded = True
+            with self.lock:
+                if self.bm25_index_file.exists() and self._read_generation() == self._generation:
+                    try:
+                        self.bm25_index.load(self.bm25_index_file)
+                    except Exception as e:
+                        print(f"Warning: Failed to load BM25 index, rebuilding: {e}")
+                        self.bm25_index.reset()
+        if self.bm25_index.num_rows > len(self.embeddings):
+            self.bm25_index.reset()
+        if self.bm25_index.num_rows < len(self.embeddings):
+            self.bm25_index.update([
+                self._row_text(row) for row in range(self.bm25_index.num_rows, len(self.embeddings))
+            ])
+            self._save_index(self.bm25_index, self.bm25_index_file)
+    
+    def _save_index(self, index, path: Path) -> None:
+        """
+        Persist an ANN or BM25 index of the snapshot's rows.
+        
+        Skipped if another process renumbered the rows since the snapshot
+        was loaded: the index would not match the files on disk.
+        """
+        with self.lock:
+            if self._read_generation() == self._generation:
+                index.save(path)
+    
+    def _row_text(self, row: int) -> str:
+        """Text embedded in a row ("" for rows no document refers to)."""
+        docs = self._docs_by_row.get(row)
+        return docs[0]['text'] if docs else ""
+    
+    def _write_matrix(self, matrix: np.ndarray) -> None:
+        """Write the embedding matrix, replacing the old file atomically."""
+        write_array_atomic(self.embeddings_file, np.ascontiguousarray(matrix, dtype=np.float32))
+    
+    def _append_embeddings(self, embeddings: List[List[float]]) -> int:
+        """
+        Normalize embedding vectors and append them to the matrix on disk.
+        
+        Only the new rows are written; the matrix is then re-mapped.
+        
+        Args:
+            embeddings: New embedding vectors
+            
+        Returns:
+            Row index of the first appended vector
+        """
+        start_idx = len(self.embeddings)
+        if len(embeddings) == 0:
+            return start_idx
+        new_rows = _normalize_rows(np.asarray(embeddings, dtype=np.float64))
+        if start_idx == 0:
+            self._write_matrix(new_rows)
+        elif new_rows.shape[1] != self.embeddings.shape[1]:
+            raise ValueError(
+                f"Embedding dimension {new_rows.shape[1]} does not match "
+                f"cached dimension {self.embeddings.shape[1]}"
+            )
+        elif not append_npy_rows(self.embeddings_file, new_rows):
+            self._write_matrix(np.concatenate([self.embeddings, new_rows]))
+        self.embeddings = np.load(self.embeddings_file, mmap_mode='r')
+        if start_idx == 0:
+            # First vectors of this namespace: record their dimension
+            self._register_namespace()
+        return start_idx
+    
+    def _store_embedding_batch(self, texts: List[str], embeddings: List[List[float]]) -> None:
+        """
+        Persist one completed batch of embeddings.
+        
+        The rows are appended and their text hashes journaled right away,
+        so if indexing is interrupted, the next run reuses them instead of
+        embedding the texts again.
+        """
+        start_idx = self._append_embeddings(embeddings)
+        text_hashes = [compute_text_hash(text) for text in texts]
+        self._append_journal([{"rows": start_idx, "text_hashes": text_hashes}])
+        self._row_records += 1
+        for row, text_hash in enumerate(text_hashes, start_idx):
+            self._row_by_text_hash.setdefault(text_hash, row)
+    
+    def _assign_embeddings(self, documents: List[Dict[str, Any]]) -> int:
+        """
+        Set 'text_hash' and 'embedding_index' on documents.
+        
+        Texts already in the store reuse their embedding row; each new
+        distinct text is embedded once (see EmbeddingBatcher) and appended,
+        batch by batch as the requests complete.
+        
+        Args:
+            documents: Documents with 'text' field
+            
+        Returns:
+            Number of texts embedded
+        """
+        new_texts = []
+        pending = set()
+        for doc in documents:
+            text_hash = compute_text_hash(doc['text'])
+            doc['text_hash'] = text_hash
+            if text_hash not in self._row_by_text_hash and text_hash not in pending:
+                # Repeated texts are embedded once
+                pending.add(text_hash)
+                new_texts.append(doc['text'])
+        
+        if new_texts:
+            self.batcher.embed(new_texts, on_batch=self._store_embedding_batch)
+        for doc in documents:
+            doc['embedding_index'] = self._row_by_text_hash[doc['text_hash']]
+        return len(new_texts)
+    
+    @_update
     def add_documents_from_files(self, source_dir: Path) -> None:
         """
         Add documents from source directory with hash checking.
         
+        Every file is split into overlapping passages (see chunk_text); each
+        passage is stored as a document pointing to its parent file, with
+        character offsets into it.
+        
         Args:
             source_dir: Directory containing source files
         """
@@ -77,74 +598,89 @@ class VectorStore:
             print(f"Warning: Source directory {source_dir} does not exist")
             return
         
-        new_documents = []
         files_to_process = []
-        embedding_start_idx = len(self.embeddings)
+        seen_paths = set()
         
         # Check all files in source directory
         for file_path in sorted(source_dir.rglob("*")):
             if file_path.is_file() and file_path.suffix in ['.txt', '.md', '.json']:
+                seen_paths.add(str(file_path))
                 current_hash = compute_file_hash(file_path)
                 stored_hash = self.hash_index.get(str(file_path))
+                existing_passages = self._docs_by_path.get(str(file_path), [])
                 
-                if stored_hash != current_hash:
+                # Whole-file documents from older caches are re-chunked
+                if stored_hash != current_hash or not all(
+                    'chunk_index' in doc for doc in existing_passages
+                ):
                     # File changed or new file
                     files_to_process.append((file_path, current_hash))
-                else:
-                    # File unchanged, find existing document
-                    existing_doc = next(
-                        (doc for doc in self.documents 
-                         if doc.get('file_path') == str(file_path)),
-                        None
-                    )
-                    if existing_doc is not None:
-                        # Preserve embedding index
-                        new_documents.append(existing_doc.copy())
+        
+        # Passages of changed and deleted files are replaced; unchanged files
+        # keep theirs (and their embedding indices)
+        removed_paths = {str(file_path) for file_path, _ in files_to_process}
+        removed_paths.update(path for path in self._docs_by_path if path not in seen_paths)
+        removed_paths.intersection_update(self._docs_by_path)
+        for path in removed_paths:
+            self.hash_index.pop(path, None)
+        new_passages = []
+        file_hashes: Dict[str, str] = {}
         
         # Process changed/new files
         if files_to_process:
             print(f"Processing {len(files_to_process)} new/changed files...")
-            texts = []
-            new_docs_to_add = []
             for file_path, file_hash in files_to_process:
                 try:
                     with open(file_path, 'r', encoding='utf-8') as f:
                         text = f.read()
-                    
-                    doc = {
-                        'file_path': str(file_path),
-                        'text': text,
-                        'hash': file_hash,
-                        'filename': file_path.name
-                    }
-                    texts.append(text)
-                    new_docs_to_add.append(doc)
-                    self.hash_index[str(file_path)] = file_hash
                 except Exception as e:
                     print(f"Error reading {file_path}: {e}")
-            
-            # Generate embeddings for new/changed files
-            if texts:
-                print(f"Generating embeddings for {len(texts)} documents...")
-                new_embeddings = self.embedding_generator.generate_embeddings_batch(texts)
+                    continue
                 
-                # Add to existing embeddings and set indices
-                for doc, embedding in zip(new_docs_to_add, new_embeddings):
-                    idx = len(self.embeddings)
-                    self.embeddings.append(embedding)
-                    doc['embedding_index'] = idx
-                    new_documents.append(doc)
+                spans = chunk_text(text, self.chunk_size, self.chunk_overlap)
+                for chunk_index, (start, end) in enumerate(spans):
+                    new_passages.append({
+                        'file_path': str(file_path),
+                        'text': text[start:end],
+                        'hash': file_hash,
+                        'filename': file_path.name,
+                        'chunk_index': chunk_index,
+                        'start': start,
+                        'end': end,
+                    })
+                file_hashes[str(file_path)] = file_hash
+            
+            # Only passages whose text is not in the store yet are embedded.
+            # Files count as indexed once all their passages are: if some
+            # batches fail, the completed ones are kept for the next run
+            num_embedded = self._assign_embeddings(new_passages)
+            self.hash_index.update(file_hashes)
+            print(
+                f"Generated embeddings for {num_embedded} of {len(new_passages)} passages "
+                f"({len(new_passages) - num_embedded} unchanged)"
+            )
         else:
             print("No new or changed files detected. Using cached embeddings.")
         
-        # Update documents list
-        self.documents = new_documents
+        # Update documents list; rows were already appended, so the journal
+        # never refers to missing rows
+        self._append_journal(
+            [{"remove_file": path} for path in sorted(removed_paths)]
+            + [{"add": doc} for doc in new_passages]
+        )
+        if removed_paths:
+            self.documents = [
+                doc for doc in self.documents if doc.get('file_path') not in removed_paths
+            ]
+        self.documents.extend(new_passages)
+        self._rebuild_document_indexes()
         
-        # Save updated index and embeddings
+        # Save updated index
         self._save_hash_index()
-        self._save_embeddings()
-        print(f"Vector store now contains {len(self.documents)} documents")
+        self._finish_update()
+        print(f"Vector store now contains {len(self.documents)} passages")
     
+    @_update
     def add_documents(self, documents: List[Dict[str, Any]]) -> None:
         """
         Add documents directly (for programmatic addition).
@@ -152,88 +688,124 @@ class VectorStore:
         Args:
             documents: List of documents with 'text' field
         """
-        texts = [doc['text'] for doc in documents]
-        
-        # Check for existing documents by text hash
-        new_texts = []
-        new_docs = []
-        for doc, text in zip(documents, texts):
-            text_hash = compute_text_hash(text)
-            existing_idx = next(
-                (i for i, d in enumerate(self.documents) 
-                 if d.get('text_hash') == text_hash),
-                None
-            )
-            
-            if existing_idx is None:
-                doc['text_hash'] = text_hash
-                new_texts.append(text)
-                new_docs.append(doc)
-            else:
-                # Reuse existing embedding
-                doc['embedding_index'] = self.documents[existing_idx]['embedding_index']
-                new_docs.append(doc)
-        
-        # Generate embeddings for new documents
-        if new_texts:
-            new_embeddings = self.embedding_generator.generate_embeddings_batch(new_texts)
-            for doc, embedding in zip(new_docs[-len(new_texts):], new_embeddings):
-                idx = len(self.embeddings)
-                self.embeddings.append(embedding)
-                doc['embedding_index'] = idx
-        
-        self.documents.extend(new_docs)
-        self._save_embeddings()
+        self._assign_embeddings(documents)
+        self._append_journal([{"add": doc} for doc in documents])
+        self.documents.extend(documents)
+        for doc in documents:
+            self._index_document(doc)
+        self._finish_update()
     
-    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        mode: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """
         Search for similar documents.
         
         Args:
             query: Search query
             top_k: Number of results to return
+            mode: "dense" (embedding similarity), "bm25" (lexical, no embedding
+                call) or "hybrid" (reciprocal rank fusion of both); defaults
+                to self.search_mode
             
         Returns:
-            List of similar documents with similarity scores
+            List of similar documents with similarity scores (cosine, BM25
+            or fused score, depending on the mode)
         """
-        if not self.embeddings or not self.documents:
+        mode = self._check_mode(mode)
+        if len(self.embeddings) == 0 or not self.documents:
             return []
         
-        # Generate query embedding
-        query_embedding = self.embedding_generator.generate_embedding(query)
-        
-        # Compute cosine similarity
-        embeddings_array = np.array(self.embeddings)
-        query_array = np.array(query_embedding)
+        if mode == "dense":
+            top_indices, top_scores = self._dense_search(query, top_k)
+        elif mode == "bm25":
+            top_indices, top_scores = self._lexical_search(query, top_k)
+        else:
+            top_indices, top_scores = self._hybrid_search(query, top_k)
+        return self.rows_to_results(top_indices, top_scores, top_k)
+    
+    def search_rows(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        mode: Optional[str] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Rank embedding rows for many queries at once.
         
-        # Normalize for cosine similarity
-        query_norm = query_array / (np.linalg.norm(query_array) + 1e-10)
-        embeddings_norm = embeddings_array / (np.linalg.norm(embeddings_array, axis=1, keepdims=True) + 1e-10)
+        In dense mode the queries are embedded in batches and compared with
+        all rows in one blocked matrix product (without an ANN index), so
+        the matrix is read once for the whole batch. BM25 ranks each query
+        on its own; hybrid fuses both.
         
-        similarities = np.dot(embeddings_norm, query_norm)
+        Args:
+            queries: Search queries
+            top_k: Number of rows per query
+            mode: Search mode (defaults to self.search_mode)
+            
+        Returns:
+            (row indices, scores) per query, best first; see rows_to_results
+        """
+        mode = self._check_mode(mode)
+        no_rows = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32))
+        if len(self.embeddings) == 0 or not self.documents or not queries:
+            return [no_rows] * len(queries)
+        if mode == "dense":
+            return self._dense_search_batch(queries, top_k)
+        if mode == "bm25":
+            return [self._lexical_search(query, top_k) for query in queries]
         
-        # Get top_k indices (these are embedding array indices)
-        top_indices = np.argsort(similarities)[::-1][:top_k]
+        depth = max(top_k, Config.RAG_HYBRID_DEPTH)
+        try:
+            dense_rankings = self._dense_search_batch(queries, depth)
+        except Exception as e:
+            print(f"Warning: Dense retrieval failed, using BM25 only: {e}")
+            dense_rankings = [no_rows] * len(queries)
+        return [
+            reciprocal_rank_fusion(
+                [dense_rows, self._lexical_search(query, depth)[0]], top_k, k=Config.RAG_RRF_K
+            )
+            for query, (dense_rows, _) in zip(queries, dense_rankings)
+        ]
+    
+    def rows_to_results(
+        self,
+        top_indices: np.ndarray,
+        top_scores: np.ndarray,
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Documents of ranked embedding rows, with their scores.
         
-        # Return documents with similarity scores
+        Args:
+            top_indices: Embedding row indices, best first
+            top_scores: Score of each row
+            top_k: Maximum number of documents to return
+            
+        Returns:
+            List of documents with a 'similarity' field, without duplicates
+        """
         # Find documents that match these embedding indices
         results = []
-        for emb_idx in top_indices:
+        for emb_idx, score in zip(top_indices.tolist(), top_scores.tolist()):
             # Find document(s) with this embedding index
-            matching_docs = [
-                doc for doc in self.documents 
-                if doc.get('embedding_index') == emb_idx
-            ]
-            for doc in matching_docs:
+            for doc in self._docs_by_row.get(emb_idx, ()):
                 doc_copy = doc.copy()
-                doc_copy['similarity'] = float(similarities[emb_idx])
+                doc_copy['similarity'] = score
                 results.append(doc_copy)
         
         # Remove duplicates and limit to top_k
         seen = set()
         unique_results = []
         for doc in results:
-            doc_id = doc.get('file_path') or doc.get('text_hash') or id(doc)
+            if doc.get('file_path'):
+                # Several passages of one file may be returned
+                doc_id = (doc['file_path'], doc.get('chunk_index'))
+            else:
+                doc_id = doc.get('text_hash') or id(doc)
             if doc_id not in seen:
                 seen.add(doc_id)
                 unique_results.append(doc)
@@ -242,14 +814,176 @@ class VectorStore:
         
         return unique_results
     
+    def _dense_search(self, query: str, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top rows by cosine similarity to the query embedding."""
+        query_norm = self._query_vector(query)
+        
+        if self.ann_index is not None and self.ann_index.is_ready(self.embeddings):
+            return self.ann_index.search(self.embeddings, query_norm, top_k)
+        # Rows are stored unit-length, so cosine similarity is a single matvec
+        similarities = self.embeddings @ query_norm
+        # Get top_k indices (these are embedding array indices)
+        top_indices = top_k_indices(similarities, top_k)
+        return top_indices, similarities[top_indices]
+    
+    def _dense_search_batch(
+        self,
+        queries: List[str],
+        top_k: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Top rows by cosine similarity for many queries, from blocks of the matrix."""
+        self.embed_queries(queries)
+        query_matrix = np.stack([self._query_vector(query) for query in queries])
+        if self.ann_index is not None and self.ann_index.is_ready(self.embeddings):
+            return [self.ann_index.search(self.embeddings, query, top_k) for query in query_matrix]
+        
+        num_queries = len(queries)
+        best_rows = np.empty((num_queries, 0), dtype=np.intp)
+        best_scores = np.empty((num_queries, 0), dtype=np.float32)
+        # Bound the score block (queries x rows) held in memory at once
+        block_rows = max(_MIN_SEARCH_BLOCK_ROWS, _SEARCH_BLOCK_ELEMENTS // num_queries)
+        for start in range(0, len(self.embeddings), block_rows):
+            block = self.embeddings[start:start + block_rows]
+            rows = np.arange(start, start + len(block))
+            scores = np.concatenate([best_scores, query_matrix @ block.T], axis=1)
+            rows = np.concatenate([best_rows, np.broadcast_to(rows, (num_queries, len(rows)))], axis=1)
+            top = top_k_per_row(scores, top_k)
+            best_scores = np.take_along_axis(scores, top, axis=1)
+            best_rows = np.take_along_axis(rows, top, axis=1)
+        return list(zip(best_rows, best_scores))
+    
+    def _lexical_search(self, query: str, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top rows by BM25 score."""
+        if self.bm25_index.num_rows != len(self.embeddings) or not self._bm25_loaded:
+            self._update_bm25_index()
+        return self.bm25_index.search(query, top_k)
+    
+    def _hybrid_search(self, query: str, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Reciprocal rank fusion of the dense and BM25 rankings."""
+        depth = max(top_k, Config.RAG_HYBRID_DEPTH)
+        lexical_rows, _ = self._lexical_search(query, depth)
+        try:
+            dense_rows, _ = self._dense_search(query, depth)
+        except Exception as e:
+            # Keep retrieving while the embedding API is unavailable
+            print(f"Warning: Dense retrieval failed, using BM25 only: {e}")
+            dense_rows = np.empty(0, dtype=np.intp)
+        return reciprocal_rank_fusion([dense_rows, lexical_rows], top_k, k=Config.RAG_RRF_K)
+    
+    def embed_queries(self, queries: List[str]) -> int:
+        """
+        Embed and cache queries ahead of search, in concurrent batches.
+        
+        Queries already in the query cache are skipped, so repeated runs
+        make no embedding calls; each batch is cached as it completes.
+        
+        Args:
+            queries: Query texts
+            
+        Returns:
+            Number of queries embedded
+        """
+        missing = self.query_cache.missing(queries)
+        self.batcher.embed(
+            missing,
+            on_batch=lambda batch, embeddings: self.query_cache.put(
+                batch, _normalize_rows(np.asarray(embeddings, dtype=np.float64))
+            )
+        )
+        return len(missing)
+    
+    def _check_mode(self, mode: Optional[str]) -> str:
+        """Validate a search mode, defaulting to self.search_mode."""
+        mode = mode or self.search_mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}. Must be one of {SEARCH_MODES}")
+        return mode
+    
+    @property
+    def index_version(self) -> str:
+        """
+        Identifier of the snapshot of the store held in memory.
+        
+        Every update appends to the journal or renumbers the rows (bumping
+        the generation), so the version changes with it; search results
+        computed for one version stay valid for it.
+        """
+        ann = type(self.ann_index).__name__ if self.ann_index is not None else "exact"
+        state = (
+            f"{self.namespace}|{self._generation}|{len(self.embeddings)}|{self._journal_records}|"
+            f"{self._journal_size}|{ann}"
+        )
+        return compute_text_hash(state)[:16]
+    
+    def _query_vector(self, query: str) -> np.ndarray:
+        """Normalized query embedding, from the query cache when available."""
+        query_norm = self.query_cache.get(query)
+        if query_norm is None:
+            query_embedding = self.embedding_generator.generate_embedding(query)
+            query_norm = _normalize_rows(np.asarray([query_embedding], dtype=np.float64))
+            self.query_cache.put([query], query_norm)
+            query_norm = query_norm[0]
+        return query_norm
+    
+    @_update
     def clear(self) -> None:
-        """Clear all embeddings and documents."""
-        self.embeddings = []
+        """Clear all embeddings and documents of this namespace."""
+        self.embeddings = _empty_matrix()
         self.documents = []
         self.hash_index = {}
+        self._rebuild_document_indexes()
+        if self.ann_index is not None:
+            self.ann_index.reset()
+        if self.ann_index_file.exists():
+            self.ann_index_file.unlink()
+        self.bm25_index.reset()
+        if self.bm25_index_file.exists():
+            self.bm25_index_file.unlink()
         if self.embeddings_file.exists():
             self.embeddings_file.unlink()
-        if self.documents_file.exists():
-            self.documents_file.unlink()
+        self._row_by_text_hash = {}
+        self._journal_records = 0
+        self._row_records = 0
+        for path in (
+            self.documents_file, self.legacy_documents_file, self.compaction_marker,
+            self.compacted_embeddings_file, self.compacted_documents_file
+        ):
+            if path.exists():
+                path.unlink()
         if self.hash_index_path.exists():
             self.hash_index_path.unlink()
+        self._bump_generation()
+        self.manifest.remove(self.namespace)
+
+
+SEARCH_MODES = ("dense", "bm25", "hybrid")
+
+# Rows copied at once when compacting the embedding matrix
+_COMPACT_CHUNK_ROWS = 16384
+
+# Scores computed at once by batch search (queries x rows), and the
+# smallest block of rows scanned per step
+_SEARCH_BLOCK_ELEMENTS = 1 << 24
+_MIN_SEARCH_BLOCK_ROWS = 1024
+
+
+def _empty_matrix() -> np.ndarray:
+    """Embedding matrix without rows."""
+    return np.empty((0, 0), dtype=np.float32)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Scale rows to unit length for cosine similarity.
+    
+    Norms are computed in the input precision before casting to float32.
+    
+    Args:
+        matrix: 2D array of embedding vectors
+        
+    Returns:
+        Contiguous float32 array of normalized rows
+    """
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-10
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
@@ -1,7 +1,10 @@
 """Type definitions for the relation extraction pipeline."""
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .data.gold_index import GoldIndex
 
 
 @dataclass
@@ -50,6 +53,9 @@ class GoldRelations:
     title: Optional[str] = None
     body: Optional[str] = None
     file_path: Optional[str] = None  # Path to the gold relations JSON file
+    # Lookup index built once at load time (see pipeline.data.gold_index);
+    # reset it to None if relations are modified afterwards
+    index: Optional["GoldIndex"] = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -113,6 +119,7 @@ class EvaluationResult:
 class AggregateResults:
     """Aggregated results across all documents for a technique."""
     technique_name: str
+    num_documents: int = 0
     macro_precision: float = 0.0
     macro_recall: float = 0.0
     macro_f1: float = 0.0
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+"""
+benchmark_ann.py
+
+Compare the approximate indexes of the RAG VectorStore against exact
+(brute-force) search: the IVF index for every nprobe value, and the int8 and
+product-quantized (PQ) indexes with exact re-ranking. For each the script
+reports recall@k against the exact top-k, the mean query latency and, for
+the quantized indexes, the memory footprint relative to float32.
+
+By default a synthetic clustered corpus is generated; pass --embeddings to
+benchmark an existing embeddings.npy from the RAG embeddings cache instead.
+
+Usage:
+
+    uv run scripts/benchmark_ann.py --rows 200000 --dim 256
+
+    uv run scripts/benchmark_ann.py \
+        --embeddings rag_embeddings/embeddings.npy \
+        --nprobe 1 4 8 16 32 --methods ivf pq
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pipeline.retrieval.ann_index import IVFIndex, top_k_indices  # noqa: E402
+from pipeline.retrieval.quantization import Int8Index, PQIndex  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark IVF approximate search against exact search."
+    )
+    parser.add_argument(
+        "--embeddings",
+        type=Path,
+        default=None,
+        help="Existing embeddings.npy to benchmark (default: synthetic data).",
+    )
+    parser.add_argument("--rows", type=int, default=100000, help="Synthetic corpus size.")
+    parser.add_argument("--dim", type=int, default=256, help="Synthetic vector dimension.")
+    parser.add_argument(
+        "--noise",
+        type=float,
+        default=0.8,
+        help="Synthetic spread around topic centres (higher = harder to index).",
+    )
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries.")
+    parser.add_argument("--top-k", type=int, default=5, help="Results per query.")
+    parser.add_argument(
+        "--nprobe",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8, 16, 32],
+        help="nprobe values to evaluate.",
+    )
+    parser.add_argument(
+        "--num-lists",
+        type=int,
+        default=None,
+        help="IVF lists (default: about 4 * sqrt(rows)).",
+    )
+    parser.add_argument(
+        "--methods",
+        nargs="+",
+        choices=["ivf", "int8", "pq"],
+        default=["ivf", "int8", "pq"],
+        help="Indexes to benchmark.",
+    )
+    parser.add_argument(
+        "--rerank-factor",
+        type=int,
+        default=16,
+        help="Quantized indexes: candidates re-scored exactly, as a multiple of top_k.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    return parser.parse_args()
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-10
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+def synthetic_corpus(rows: int, dim: int, noise: float, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors scattered around random topic centres, like text embeddings."""
+    num_topics = max(1, rows // 500)
+    topics = rng.standard_normal((num_topics, dim))
+    labels = rng.integers(num_topics, size=rows)
+    return normalize(topics[labels] + noise * rng.standard_normal((rows, dim)))
+
+
+def main() -> None:
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    if args.embeddings:
+        embeddings = np.load(args.embeddings, mmap_mode="r")
+        if embeddings.dtype != np.float32:
+            embeddings = normalize(np.asarray(embeddings, dtype=np.float64))
+    else:
+        embeddings = synthetic_corpus(args.rows, args.dim, args.noise, rng)
+
+    # Queries: perturbed corpus rows, so each has meaningful neighbours
+    query_rows = rng.choice(len(embeddings), size=args.queries, replace=False)
+    queries = normalize(
+        embeddings[np.sort(query_rows)] + 0.3 * rng.standard_normal((args.queries, embeddings.shape[1]))
+    )
+
+    print(f"Corpus: {len(embeddings)} x {embeddings.shape[1]}, {args.queries} queries, top_k={args.top_k}")
+
+    start = time.perf_counter()
+    exact = [top_k_indices(embeddings @ q, args.top_k) for q in queries]
+    exact_ms = (time.perf_counter() - start) / args.queries * 1000
+    print(f"{'exact':>12}  recall@{args.top_k}=1.000  {exact_ms:8.3f} ms/query")
+
+    def recall_and_latency(search) -> tuple:
+        start = time.perf_counter()
+        results = [search(q) for q in queries]
+        elapsed_ms = (time.perf_counter() - start) / args.queries * 1000
+        hits = sum(len(np.intersect1d(found, expected)) for found, expected in zip(results, exact))
+        return hits / (args.queries * args.top_k), elapsed_ms
+
+    if "ivf" in args.methods:
+        index = IVFIndex(num_lists=args.num_lists, seed=args.seed)
+        start = time.perf_counter()
+        index.update(embeddings)
+        print(f"IVF build: {len(index.centroids)} lists in {time.perf_counter() - start:.2f} s")
+
+        for nprobe in args.nprobe:
+            if nprobe > len(index.centroids):
+                continue
+            recall, elapsed_ms = recall_and_latency(
+                lambda q: index.search(embeddings, q, args.top_k, nprobe=nprobe)[0]
+            )
+            print(
+                f"{'nprobe=' + str(nprobe):>12}  recall@{args.top_k}={recall:.3f}  "
+                f"{elapsed_ms:8.3f} ms/query  ({exact_ms / elapsed_ms:5.1f}x)"
+            )
+
+    float_bytes = len(embeddings) * embeddings.shape[1] * 4
+    quantized = {"int8": Int8Index, "pq": PQIndex}
+    for name in [m for m in args.methods if m in quantized]:
+        index = quantized[name](rerank_factor=args.rerank_factor, seed=args.seed)
+        start = time.perf_counter()
+        index.update(embeddings)
+        build_s = time.perf_counter() - start
+        recall, elapsed_ms = recall_and_latency(
+            lambda q: index.search(embeddings, q, args.top_k)[0]
+        )
+        print(
+            f"{name:>12}  recall@{args.top_k}={recall:.3f}  "
+            f"{elapsed_ms:8.3f} ms/query  ({exact_ms / elapsed_ms:5.1f}x)  "
+            f"memory {float_bytes / index.memory_bytes:5.1f}x smaller  build {build_s:.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,8 @@
 """
 generate_clean_text_output.py
 
-Read a BioC JSON file (with a top-level "documents" list) and, for each
+Read a BioC JSON file (with a top-level "documents" list), a BioC XML file
+or a PubTator file (by suffix: .json, .xml, .pubtator) and, for each
 document, write a plain-text file containing:
 
     <title>
@@ -14,24 +15,49 @@ Usage:
     uv run generate_clean_text_output.py \
         --input path/to/train.BioC.JSON \
         --output-dir outputs/train_texts
+
+    uv run generate_clean_text_output.py \
+        --input data/Train.PubTator \
+        --output-dir clean_text/trainingtexts
+
+Documents are streamed from the input one at a time (see
+pipeline.data.corpus.iter_bioc_documents), so memory stays flat for large
+collections. To also write the gold graphs in the same pass, use
+generate_gold_graph_output.py with --text-output-dir.
+
+Files are written by --workers processes, each under a temporary name and
+renamed into place. With --incremental, files whose source document is
+unchanged since the last run are skipped (see
+pipeline.data.regeneration), so regenerating after an upstream fix only
+touches what changed.
 """
 
 import argparse
-import json
+import os
+import sys
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pipeline.data.corpus import iter_bioc_documents  # noqa: E402
+from pipeline.data.regeneration import OutputSpec, regenerate  # noqa: E402
+
+# Name and format version of the text files, hashed with their sources;
+# bump when the text format changes so --incremental rewrites them
+GENERATOR = "clean_text/1"
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
-        description="Generate plain text files (title + text) from BioC JSON."
+        description="Generate plain text files (title + text) from BioC JSON, BioC XML or PubTator."
     )
     parser.add_argument(
         "--input",
         "-i",
         type=Path,
         required=True,
-        help="Path to the BioC JSON file (e.g. train.BioC.JSON).",
+        help="Path to the BioC JSON, BioC XML or PubTator file (e.g. Train.BioC.XML).",
     )
     parser.add_argument(
         "--output-dir",
@@ -46,24 +72,21 @@ def parse_args() -> argparse.Namespace:
         default="utf-8",
         help="Text encoding for reading and writing files (default: utf-8).",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only write files whose source document changed since the last run "
+        "(recorded in <output dir>/.manifest.jsonl).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes writing the files (default: number of CPUs).",
+    )
     return parser.parse_args()
 
 
-def load_bioc_json(path: Path, encoding: str = "utf-8") -> Dict[str, Any]:
-    with path.open("r", encoding=encoding) as f:
-        data = json.load(f)
-
-    # Some BioC files may already be a list of documents; others use {"documents": [...]}
-    if isinstance(data, dict) and "documents" in data:
-        return data
-    elif isinstance(data, list):
-        return {"documents": data}
-    else:
-        raise ValueError(
-            f"Unsupported JSON structure in {path}. Expected 'documents' key or a list."
-        )
-
-
 def extract_title_and_body(passages: List[Dict[str, Any]]) -> Dict[str, str]:
     """
     Given a list of passages, return a dict with 'title' and 'body'.
@@ -88,58 +111,68 @@ def extract_title_and_body(passages: List[Dict[str, Any]]) -> Dict[str, str]:
     return {"title": title, "body": body}
 
 
-def write_document_text(
-    doc_id: str,
-    title: str,
-    body: str,
-    output_dir: Path,
-    encoding: str = "utf-8",
-) -> None:
+def compose_document_text(title: str, body: str) -> str:
     """
-    Write a single document to <output_dir>/<doc_id>.txt with:
+    Compose the text of a document:
 
         <title>
 
         <body>
     """
-    output_dir.mkdir(parents=True, exist_ok=True)
-    out_path = output_dir / f"{doc_id}.txt"
-
     # Compose final text: title + blank line + body (if any body exists)
     if body:
-        text = f"{title}\n\n{body}".strip() + "\n"
-    else:
-        text = (title or "").strip() + "\n"
+        return f"{title}\n\n{body}".strip() + "\n"
+    return (title or "").strip() + "\n"
 
-    with out_path.open("w", encoding=encoding) as f:
-        f.write(text)
 
+def text_file_name(doc: Dict[str, Any]) -> Optional[str]:
+    """Name of the text file of a document, or None to skip it."""
+    doc_id = str(doc.get("id", "")).strip()
+    if not doc_id:
+        # Skip documents without an ID to avoid weird filenames
+        return None
+    return f"{doc_id}.txt"
+
+
+def render_document_text(doc: Dict[str, Any]) -> str:
+    """Text file contents of a document."""
+    title_body = extract_title_and_body(doc.get("passages", []))
+    return compose_document_text(title_body["title"], title_body["body"])
+
+
+def text_source(doc: Dict[str, Any]) -> List[Any]:
+    """The passages a text file is rendered from, so annotation changes leave it alone."""
+    return [[p.get("offset", 0), p.get("text")] for p in doc.get("passages", []) or []]
 
-def main() -> None:
-    args = parse_args()
 
-    bioc = load_bioc_json(args.input, encoding=args.encoding)
-    documents = bioc.get("documents", [])
+def text_output(output_dir: Path, encoding: str = "utf-8") -> OutputSpec:
+    """
+    The <output_dir>/<doc_id>.txt files, for pipeline.data.regeneration.
 
-    if not isinstance(documents, list):
-        raise ValueError("Expected 'documents' to be a list in the BioC JSON file.")
+    Args:
+        output_dir: Directory of the text files
+        encoding: Text encoding of the files
+    """
+    return OutputSpec(
+        output_dir=output_dir,
+        generator=GENERATOR,
+        file_name=text_file_name,
+        render=render_document_text,
+        encoding=encoding,
+        source=text_source,
+    )
 
-    for doc in documents:
-        doc_id = str(doc.get("id", "")).strip()
-        if not doc_id:
-            # Skip documents without an ID to avoid weird filenames
-            continue
 
-        passages = doc.get("passages", [])
-        title_body = extract_title_and_body(passages)
+def main() -> None:
+    args = parse_args()
 
-        write_document_text(
-            doc_id=doc_id,
-            title=title_body["title"],
-            body=title_body["body"],
-            output_dir=args.output_dir,
-            encoding=args.encoding,
-        )
+    counts = regenerate(
+        iter_bioc_documents(args.input, encoding=args.encoding),
+        [text_output(args.output_dir, args.encoding)],
+        workers=args.workers,
+        incremental=args.incremental,
+    )
+    print(f"Wrote {counts['written']} files ({counts['unchanged']} unchanged)")
 
 
 if __name__ == "__main__":
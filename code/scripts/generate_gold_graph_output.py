@@ -2,7 +2,8 @@
 """
 generate_gold_graph_output.py
 
-Read a BioC JSON file and, for each document, export the GOLD
+Read a BioC JSON, BioC XML or PubTator file (by suffix: .json, .xml,
+.pubtator) and, for each document, export the GOLD
 entity graph and relations into a separate JSON file.
 
 For each BioC document with id <doc_id>, the script writes:
@@ -49,24 +50,59 @@ Typical usage (with uv):
     uv run generate_gold_graph_output.py \
         --input path/to/train.BioC.JSON \
         --output-dir outputs/train_gold_graphs
+
+Documents are streamed from the input one at a time (see
+pipeline.data.corpus.iter_bioc_documents), so memory stays flat for large
+collections. With --text-output-dir the plain text files of
+generate_clean_text_output.py are written in the same pass, reading the
+input once for both outputs:
+
+    uv run generate_gold_graph_output.py \
+        --input data/Train.BioC.XML \
+        --output-dir gold_relations/train \
+        --text-output-dir clean_text/trainingtexts
+
+Files are written by --workers processes, each under a temporary name and
+renamed into place. With --incremental, files whose source document is
+unchanged since the last run are skipped (see
+pipeline.data.regeneration), so regenerating after an upstream fix only
+touches what changed:
+
+    uv run generate_gold_graph_output.py \
+        --input data/Train.BioC.XML \
+        --output-dir gold_relations/train \
+        --text-output-dir clean_text/trainingtexts \
+        --incremental
 """
 
 import argparse
 import json
+import os
+import sys
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_clean_text_output import text_output  # noqa: E402
+from pipeline.data.corpus import iter_bioc_documents  # noqa: E402
+from pipeline.data.regeneration import OutputSpec, regenerate  # noqa: E402
+
+# Name and format version of the gold graph files, hashed with their
+# sources; bump when the record format changes so --incremental rewrites them
+GENERATOR = "gold_graph/1"
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
-        description="Generate per-document gold entity graphs and relations from BioC JSON."
+        description="Generate per-document gold entity graphs and relations from BioC JSON, BioC XML or PubTator."
     )
     parser.add_argument(
         "--input",
         "-i",
         type=Path,
         required=True,
-        help="Path to the BioC JSON file (e.g. train.BioC.JSON).",
+        help="Path to the BioC JSON, BioC XML or PubTator file (e.g. Train.BioC.XML).",
     )
     parser.add_argument(
         "--output-dir",
@@ -75,30 +111,33 @@ def parse_args() -> argparse.Namespace:
         required=True,
         help="Directory where per-document gold graph JSON files will be written.",
     )
+    parser.add_argument(
+        "--text-output-dir",
+        type=Path,
+        default=None,
+        help="Also write the plain text files (title + text) to this directory, in the same pass.",
+    )
     parser.add_argument(
         "--encoding",
         type=str,
         default="utf-8",
         help="Text encoding for reading and writing files (default: utf-8).",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only write files whose source document changed since the last run "
+        "(recorded in <output dir>/.manifest.jsonl).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes writing the files (default: number of CPUs).",
+    )
     return parser.parse_args()
 
 
-def load_bioc_json(path: Path, encoding: str = "utf-8") -> Dict[str, Any]:
-    with path.open("r", encoding=encoding) as f:
-        data = json.load(f)
-
-    # Some BioC files may already be a list of documents; others use {"documents": [...]}
-    if isinstance(data, dict) and "documents" in data:
-        return data
-    elif isinstance(data, list):
-        return {"documents": data}
-    else:
-        raise ValueError(
-            f"Unsupported JSON structure in {path}. Expected 'documents' key or a list."
-        )
-
-
 def extract_title_and_body(passages: List[Dict[str, Any]]) -> Tuple[str, str]:
     """
     Given a list of passages, return (title, body).
@@ -194,46 +233,63 @@ def collect_relations(doc: Dict[str, Any]) -> List[Dict[str, Any]]:
     return relations
 
 
-def main() -> None:
-    args = parse_args()
-    bioc = load_bioc_json(args.input, encoding=args.encoding)
-    documents = bioc.get("documents", [])
+def gold_file_name(doc: Dict[str, Any]) -> Optional[str]:
+    """Name of the gold graph file of a document, or None to skip it."""
+    doc_id = str(doc.get("id", "")).strip()
+    if not doc_id:
+        # Skip documents without an ID
+        return None
+    return f"{doc_id}.json"
+
+
+def render_gold_graph(doc: Dict[str, Any]) -> str:
+    """Gold graph file contents of a document."""
+    doc_id = str(doc.get("id", "")).strip()
+    passages = doc.get("passages", []) or []
+    title, body = extract_title_and_body(passages)
+    entities_by_id = collect_entities(passages)
+    relations = collect_relations(doc)
+
+    # Keep only relations whose endpoints appear as entities
+    entity_ids = set(entities_by_id.keys())
+    relations_filtered = [
+        r
+        for r in relations
+        if (r["head_id"] in entity_ids and r["tail_id"] in entity_ids)
+    ]
 
-    if not isinstance(documents, list):
-        raise ValueError("Expected 'documents' to be a list in the BioC JSON file.")
+    record = {
+        "doc_id": doc_id,
+        "title": title,
+        "body": body,
+        "entities": list(entities_by_id.values()),
+        "relations": relations_filtered,
+    }
+    return json.dumps(record, ensure_ascii=False, indent=2)
 
-    args.output_dir.mkdir(parents=True, exist_ok=True)
 
-    for doc in documents:
-        doc_id = str(doc.get("id", "")).strip()
-        if not doc_id:
-            # Skip documents without an ID
-            continue
+def main() -> None:
+    args = parse_args()
 
-        passages = doc.get("passages", []) or []
-        title, body = extract_title_and_body(passages)
-        entities_by_id = collect_entities(passages)
-        relations = collect_relations(doc)
-
-        # Keep only relations whose endpoints appear as entities
-        entity_ids = set(entities_by_id.keys())
-        relations_filtered = [
-            r
-            for r in relations
-            if (r["head_id"] in entity_ids and r["tail_id"] in entity_ids)
-        ]
-
-        record = {
-            "doc_id": doc_id,
-            "title": title,
-            "body": body,
-            "entities": list(entities_by_id.values()),
-            "relations": relations_filtered,
-        }
-
-        out_path = args.output_dir / f"{doc_id}.json"
-        with out_path.open("w", encoding=args.encoding) as f:
-            json.dump(record, f, ensure_ascii=False, indent=2)
+    outputs = [
+        OutputSpec(
+            output_dir=args.output_dir,
+            generator=GENERATOR,
+            file_name=gold_file_name,
+            render=render_gold_graph,
+            encoding=args.encoding,
+        )
+    ]
+    if args.text_output_dir is not None:
+        outputs.append(text_output(args.text_output_dir, args.encoding))
+
+    counts = regenerate(
+        iter_bioc_documents(args.input, encoding=args.encoding),
+        outputs,
+        workers=args.workers,
+        incremental=args.incremental,
+    )
+    print(f"Wrote {counts['written']} files ({counts['unchanged']} unchanged)")
 
 
 if __name__ == "__main__":
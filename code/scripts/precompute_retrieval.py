@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+precompute_retrieval.py
+
+Rank the RAG passages of every document of a split ahead of a pipeline
+run. The retrieval queries are embedded in batches, ranked against the
+whole vector store in blocked matrix products, and the results saved in
+the embeddings cache (see PrecomputedRetrieval), where the RAG prompter
+reads them instead of searching. Results are kept per store version, so
+rerunning after the RAG sources change recomputes them.
+
+Usage:
+
+    uv run scripts/precompute_retrieval.py --split dev
+
+    uv run scripts/precompute_retrieval.py --split test --top-k 10 --mode hybrid
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import Config  # noqa: E402
+from pipeline.data.loader import DocumentLoader  # noqa: E402
+from pipeline.llm_prompter.rag_prompter import RAGPrompter  # noqa: E402
+from pipeline.retrieval import PrecomputedRetrieval, VectorStore  # noqa: E402
+from pipeline.retrieval.vector_store import SEARCH_MODES  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Precompute RAG retrieval results for a split."
+    )
+    parser.add_argument(
+        "--split", choices=("dev", "test", "train"), default="dev",
+        help="Split whose documents are ranked (default: dev)",
+    )
+    parser.add_argument(
+        "--top-k", type=int, default=Config.RAG_TOP_K,
+        help=f"Results per document (default: {Config.RAG_TOP_K})",
+    )
+    parser.add_argument(
+        "--mode", choices=SEARCH_MODES, default=Config.RAG_SEARCH_MODE,
+        help=f"Search mode (default: {Config.RAG_SEARCH_MODE})",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=Config.RAG_PRECOMPUTE_BATCH_SIZE,
+        help=f"Queries ranked together (default: {Config.RAG_PRECOMPUTE_BATCH_SIZE})",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    documents = DocumentLoader(Config.CLEAN_TEXT_PATH).load(args.split)
+    print(f"Loaded {len(documents)} {args.split} documents")
+
+    vector_store = VectorStore(search_mode=args.mode)
+    vector_store.add_documents_from_files(Config.RAG_SOURCE_DIR)
+    precomputed = PrecomputedRetrieval(
+        vector_store, top_k=args.top_k, mode=args.mode, batch_size=args.batch_size
+    )
+
+    start_time = time.time()
+    ranked = precomputed.compute(
+        [doc.doc_id for doc in documents],
+        [RAGPrompter.query_text(doc.text) for doc in documents],
+    )
+    print(
+        f"Ranked {ranked} documents ({len(documents) - ranked} already saved) "
+        f"in {time.time() - start_time:.2f} seconds"
+    )
+
+
+if __name__ == "__main__":
+    main()